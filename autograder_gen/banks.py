@@ -0,0 +1,241 @@
+"""
+Question banks: questions shared by several assessments.
+
+A config (or a bank) takes questions from bank files with `questions_from`,
+relative to its own location:
+
+    questions_from:
+      - banks/basics.yaml              # every question of the bank
+      - file: banks/functions.yaml     # only the named questions
+        questions: [Fibonacci, Factorial]
+    questions:                          # the config's own questions follow
+      - ...
+
+A bank file is a YAML or JSON document with a `questions` list, and may
+itself use `questions_from`. Each bank is parsed and validated once per
+process and kept until the bank or one of the banks it includes changes.
+The files a config depends on are its include graph, which incremental,
+watch and batch builds use to find the assessments a changed bank affects.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from autograder_gen.config import (
+    CONFIG_FORMATS,
+    DATA_FILE_FIELDS,
+    Question,
+    QuestionsFromModel,
+    parse_config_bytes,
+)
+from autograder_gen.utils import FileState, file_state
+
+# Banks kept in memory per process
+MAX_BANKS = 256
+
+class QuestionBank:
+    """A parsed and validated bank file, with the banks it includes resolved."""
+
+    def __init__(
+        self,
+        path: str,
+        digest: str,
+        questions: List[Dict[str, Any]],
+        models: List[Question],
+        files: Dict[str, FileState],
+    ):
+        self.path = path
+        # SHA-256 of the bank and of every bank it includes
+        self.digest = digest
+        self.questions = questions
+        self.models = models
+        # This bank and the banks it includes, with their state when read
+        self.files = files
+        self.by_name = {question["name"]: n for n, question in enumerate(questions)}
+
+    def is_current(self) -> bool:
+        return all(file_state(path) == state for path, state in self.files.items())
+
+
+class Resolution:
+    """A config with the questions of its banks filled in."""
+
+    def __init__(
+        self,
+        data: Any,
+        questions: Optional[List[Any]] = None,
+        files: Optional[Dict[str, FileState]] = None,
+        digests: Optional[List[str]] = None,
+    ):
+        # The config as if the bank questions had been written in it
+        self.data = data
+        # Input for the questions of the model: validated bank questions
+        # and the config's own question data; None without banks
+        self.questions = questions
+        # Every bank the config depends on, directly or not
+        self.files = files or {}
+        self.digests = digests or []
+
+
+_banks: "OrderedDict[str, QuestionBank]" = OrderedDict()
+_banks_lock = threading.Lock()
+
+
+def load_bank(path: str, including: Tuple[str, ...] = ()) -> QuestionBank:
+    """Load a bank file, from the process-wide cache while it is unchanged."""
+    path = str(Path(path).resolve())
+    if path in including:
+        cycle = " -> ".join((*including, path))
+        raise ValueError(f"Include cycle between question banks: {cycle}")
+
+    with _banks_lock:
+        bank = _banks.get(path)
+    if bank is not None and bank.is_current():
+        with _banks_lock:
+            _banks.move_to_end(path)
+        return bank
+
+    state = file_state(path)
+    if state is None:
+        raise ValueError(f"Question bank not found: {path}")
+    raw = Path(path).read_bytes()
+    try:
+        data = parse_config_bytes(
+            raw, CONFIG_FORMATS.get(Path(path).suffix.lower(), "yaml")
+        )
+    except ValueError as e:
+        raise ValueError(f"Invalid question bank {path}: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get("questions", []), list):
+        raise ValueError(f"Invalid question bank {path}: expected a 'questions' list")
+
+    resolution = resolve_includes(data, str(Path(path).parent), (*including, path))
+    questions = resolution.data.get("questions") or []
+    models = []
+    for index, question in enumerate(resolution.questions or questions):
+        if isinstance(question, Question):
+            models.append(question)
+            continue
+        try:
+            models.append(Question.model_validate(question))
+        except ValidationError as e:
+            error = e.errors()[0]
+            loc = ".".join(map(str, ("questions", index, *error["loc"])))
+            raise ValueError(f"Invalid question bank {path}: {error['msg']} at {loc}")
+
+    digest = hashlib.sha256(raw)
+    for included in resolution.digests:
+        digest.update(included.encode("utf-8"))
+    bank = QuestionBank(
+        path,
+        digest.hexdigest(),
+        questions,
+        models,
+        {path: state, **resolution.files},
+    )
+    with _banks_lock:
+        _banks[path] = bank
+        while len(_banks) > MAX_BANKS:
+            _banks.popitem(last=False)
+    return bank
+
+
+def _relocate(question: Dict[str, Any], bank_dir: str, base_dir: str) -> Dict[str, Any]:
+    """Make the data file paths of a bank question relative to the including config."""
+    if bank_dir == base_dir:
+        return question
+    items = question.get("marking_items") or []
+    if not any(
+        isinstance(item, dict) and DATA_FILE_FIELDS & item.keys() for item in items
+    ):
+        return question
+    relocated = []
+    for item in items:
+        item = dict(item)
+        for field in DATA_FILE_FIELDS & item.keys():
+            if item[field]:
+                item[field] = os.path.relpath(Path(bank_dir) / item[field], base_dir)
+        relocated.append(item)
+    return {**question, "marking_items": relocated}
+
+
+def resolve_includes(
+    data: Any, base_dir: Optional[str], including: Tuple[str, ...] = ()
+) -> Resolution:
+    """Fill in the questions a config (or bank) takes from question banks.
+
+    Bank questions come first, in the order of questions_from, followed by
+    the config's own questions. Raises ValueError for banks that are
+    missing, invalid or include each other, and for unknown question names.
+    """
+    if not isinstance(data, dict) or "questions_from" not in data:
+        return Resolution(data)
+    if base_dir is None:
+        raise ValueError("questions_from can only be used in configuration files")
+    references = data["questions_from"]
+    if not isinstance(references, list):
+        raise ValueError("questions_from must be a list")
+
+    data = {key: value for key, value in data.items() if key != "questions_from"}
+    config_dir = str(Path(base_dir).resolve())
+    resolved: List[Any] = []
+    models: List[Any] = []
+    files: Dict[str, FileState] = {}
+    digests: List[str] = []
+    for reference in references:
+        if isinstance(reference, str):
+            reference = {"file": reference}
+        try:
+            reference = QuestionsFromModel.model_validate(reference)
+        except ValidationError as e:
+            raise ValueError(f"Invalid questions_from entry: {e.errors()[0]['msg']}")
+
+        bank = load_bank(str(Path(base_dir) / reference.file), including)
+        files.update(bank.files)
+        digests.append(bank.digest)
+        if reference.questions:
+            missing = [name for name in reference.questions if name not in bank.by_name]
+            if missing:
+                raise ValueError(
+                    f"Question(s) {', '.join(map(repr, missing))} not found "
+                    f"in question bank {reference.file}"
+                )
+            picked = [bank.by_name[name] for name in reference.questions]
+        else:
+            picked = list(range(len(bank.questions)))
+
+        bank_dir = str(Path(bank.path).parent)
+        for index in picked:
+            question = _relocate(bank.questions[index], bank_dir, config_dir)
+            resolved.append(question)
+            # Relocated questions are validated with the config
+            relocated = question is not bank.questions[index]
+            models.append(question if relocated else bank.models[index])
+
+    own = data.get("questions") or []
+    if not isinstance(own, list):
+        own = [own]
+    data["questions"] = resolved + own
+    return Resolution(data, models + own, files, digests)
+
+
+def depends_on(loaded: Any, changed: Set[str]) -> bool:
+    """Whether a loaded config is, or is built from, one of the changed files.
+
+    Those are the config itself, its question banks and its data files;
+    changed holds resolved paths. A config that isn't a file, or is invalid,
+    is always considered affected.
+    """
+    if loaded.path is None:
+        return True
+    if str(Path(loaded.path).resolve()) in changed:
+        return True
+    try:
+        return not changed.isdisjoint(loaded.dependencies)
+    except ValueError:
+        return True
@@ -0,0 +1,312 @@
+"""
+Batch generation of autograders for a whole course.
+
+Configurations can come from a directory, a glob pattern or a multi-document
+YAML stream. All of them are validated and generated in one process, sharing
+one warmed template environment and, with jobs > 1, one worker pool. Given
+the files that changed, only the configs built from one of them (the
+config itself, a question bank or a data file) are regenerated.
+"""
+
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import yaml
+
+from autograder_gen.banks import depends_on
+from autograder_gen.cache import PackageCache
+from autograder_gen.config import CONFIG_FORMATS, LoadedConfig, YamlLoader
+from autograder_gen.generator import AutograderGenerator
+from autograder_gen.package import DEFAULT_COMPRESSION
+from autograder_gen.templating import warm_templates
+from autograder_gen.utils import allow_gc_pauses, available_cpus
+from autograder_gen.validator import ConfigValidator
+
+
+NamedConfig = Tuple[str, Union[Dict[str, Any], LoadedConfig]]
+
+
+def _names_for_paths(paths: List[Path]) -> List[str]:
+    """Derive output names from config paths relative to their common parent."""
+    if not paths:
+        return []
+    common = Path(os.path.commonpath([str(p.parent.resolve()) for p in paths]))
+
+    names = []
+    for path in paths:
+        relative = path.resolve().relative_to(common)
+        # course/week1/config.yaml -> week1, course/week1.yaml -> week1
+        if relative.stem == "config" and relative.parent != Path("."):
+            names.append(relative.parent.as_posix())
+        else:
+            names.append(relative.with_suffix("").as_posix())
+    return names
+
+
+def _is_assessment(data: Any) -> bool:
+    """Whether a parsed file is a config, not a bank or data file next to the configs."""
+    return isinstance(data, dict) and "version" in data
+
+
+def _load_config_files(paths: List[Path]) -> Iterator[NamedConfig]:
+    for name, path in zip(_names_for_paths(paths), paths):
+        try:
+            # Keeps the raw bytes, which are packaged verbatim
+            loaded = LoadedConfig.from_bytes(
+                path.read_bytes(), str(path), CONFIG_FORMATS.get(path.suffix.lower(), "yaml")
+            )
+            if _is_assessment(loaded.data):
+                yield name, loaded
+        except OSError as e:
+            # Report unreadable files as failures of that config, not the batch
+            yield name, ValueError(f"Could not read configuration file: {e}")
+        except ValueError as e:
+            yield name, e
+
+
+def configs_from_directory(config_dir: str) -> Iterator[NamedConfig]:
+    """Yield (name, config) pairs for every YAML or JSON config below a directory.
+
+    Question banks and JSON data files found there (files without a top-level
+    version) are skipped.
+    """
+    root = Path(config_dir)
+    if not root.is_dir():
+        raise FileNotFoundError(f"Configuration directory not found: {config_dir}")
+    paths = sorted(
+        p for p in root.rglob("*") if p.is_file() and p.suffix.lower() in CONFIG_FORMATS
+    )
+    return _load_config_files(paths)
+
+
+def configs_from_glob(pattern: str) -> Iterator[NamedConfig]:
+    """Yield (name, config) pairs for every config matching a glob pattern.
+
+    Like configs_from_directory, files without a top-level version are skipped.
+    """
+    paths = sorted(Path(p) for p in glob.glob(pattern, recursive=True))
+    return _load_config_files([p for p in paths if p.is_file()])
+
+
+def configs_from_stream(stream_path: str) -> Iterator[NamedConfig]:
+    """Yield (name, config) pairs from a multi-document YAML file, one document at a time."""
+    path = Path(stream_path)
+    with open(path, "r", encoding="utf-8") as f:
+        for index, data in enumerate(yaml.load_all(f, Loader=YamlLoader), 1):
+            if data is None:
+                continue
+            yield f"{path.stem}_{index}", data
+
+
+def generate_one(
+    name: str,
+    data: Union[Dict[str, Any], LoadedConfig],
+    output_dir: str,
+    with_description: bool = False,
+    with_skeletons: bool = False,
+    validate_only: bool = False,
+    reproducible: bool = False,
+    compression: str = DEFAULT_COMPRESSION,
+    compresslevel: Optional[int] = None,
+    incremental: bool = False,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Validate and generate a single assessment, returning its summary record.
+
+    incremental and the package cache (cache_dir, or AUTOGRADER_GEN_CACHE_DIR)
+    work as for a single config.
+    """
+    result: Dict[str, Any] = {
+        "name": name,
+        "status": "ok",
+        "output": None,
+        "errors": [],
+        "warnings": [],
+        # Question banks the config depends on
+        "includes": [],
+        "seconds": {},
+    }
+    started = time.perf_counter()
+
+    try:
+        if isinstance(data, Exception):
+            raise data
+
+        loaded = data if isinstance(data, LoadedConfig) else LoadedConfig(data)
+        validator = ConfigValidator()
+        is_valid = validator.validate_loaded(loaded)
+        result["warnings"] = validator.get_warnings()
+        result["seconds"]["validate"] = time.perf_counter() - started
+        if not is_valid:
+            result["status"] = "invalid"
+            result["errors"] = validator.get_errors()
+            return result
+        result["includes"] = loaded.includes
+        if validate_only:
+            return result
+
+        stage_started = time.perf_counter()
+        generator = AutograderGenerator(
+            loaded,
+            reproducible=reproducible,
+            compression=compression,
+            compresslevel=compresslevel,
+        )
+        if generator.config.variants is not None:
+            variants = generator.generate_variants(
+                str(Path(output_dir) / name),
+                with_description=with_description,
+                with_skeletons=with_skeletons,
+                incremental=incremental,
+            )
+            result["output"] = str(Path(output_dir) / name)
+            result["variants"] = {
+                variant_name: variant["parameters"]
+                for variant_name, variant in variants.items()
+            }
+            result["seconds"]["generate"] = time.perf_counter() - stage_started
+            return result
+
+        artifacts = generator.generate_all(
+            str(Path(output_dir) / name),
+            with_description=with_description,
+            with_skeletons=with_skeletons,
+            incremental=incremental,
+            cache=PackageCache.for_options(cache_dir, cache_max_bytes),
+        )
+        package = artifacts["autograder.zip"]
+        result["output"] = package["path"]
+        result["cached"] = package["cached"]
+        if incremental:
+            result["rebuilt"] = package["rebuilt"]
+        if reproducible:
+            result["sha256"] = package["sha256"]
+        for artifact_name, artifact in artifacts.items():
+            result["seconds"][artifact_name] = artifact["seconds"]
+        result["seconds"]["generate"] = time.perf_counter() - stage_started
+
+    except Exception as e:
+        result["status"] = "error"
+        result["errors"] = [str(e)]
+
+    finally:
+        result["seconds"]["total"] = time.perf_counter() - started
+
+    return result
+
+
+def _init_worker():
+    # Worker processes only run builds
+    allow_gc_pauses()
+    warm_templates()
+
+
+def _unchanged_result(name: str, loaded: LoadedConfig) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "status": "unchanged",
+        "output": None,
+        "errors": [],
+        "warnings": [],
+        "includes": loaded.includes,
+        "seconds": {},
+    }
+
+
+def generate_many(
+    configs: Iterable[Union[NamedConfig, Dict[str, Any]]],
+    output_dir: str = "./output",
+    jobs: int = 1,
+    with_description: bool = False,
+    with_skeletons: bool = False,
+    validate_only: bool = False,
+    reproducible: bool = False,
+    compression: str = DEFAULT_COMPRESSION,
+    compresslevel: Optional[int] = None,
+    changed: Optional[Iterable[str]] = None,
+    incremental: bool = False,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Validate and generate many assessments in one process.
+
+    configs may contain (name, config) pairs or bare configs, which are named
+    by position; a config is a dict or a LoadedConfig. Each assessment is written to output_dir/<name>.
+    jobs > 1 generates assessments in a shared process pool (0 uses all CPUs).
+    With changed (file paths), config files that aren't built from one of
+    the changed files (see depends_on) are skipped and reported as
+    "unchanged". incremental, cache_dir and cache_max_bytes apply to every
+    assessment (see generate_one).
+    Returns a machine-readable summary with per-config timings and failures.
+    """
+    jobs = jobs if jobs > 0 else available_cpus()
+    started = time.perf_counter()
+    changed_paths: Optional[Set[str]] = (
+        {str(Path(path).resolve()) for path in changed} if changed is not None else None
+    )
+    results: List[Dict[str, Any]] = []
+
+    def named(items):
+        for index, item in enumerate(items, 1):
+            yield item if isinstance(item, tuple) else (f"config_{index}", item)
+
+    def unchanged(data) -> bool:
+        return (
+            changed_paths is not None
+            and isinstance(data, LoadedConfig)
+            and not depends_on(data, changed_paths)
+        )
+
+    options = (
+        output_dir,
+        with_description,
+        with_skeletons,
+        validate_only,
+        reproducible,
+        compression,
+        compresslevel,
+        incremental,
+        cache_dir,
+        cache_max_bytes,
+    )
+
+    if jobs <= 1:
+        warm_templates()
+        for name, data in named(configs):
+            if unchanged(data):
+                results.append(_unchanged_result(name, data))
+            else:
+                results.append(generate_one(name, data, *options))
+    else:
+        # Keep a bounded window of pending work so configs are read lazily
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+            pending: deque = deque()
+            for name, data in named(configs):
+                if unchanged(data):
+                    # Kept in line with the others, so results stay in order
+                    skipped: Future = Future()
+                    skipped.set_result(_unchanged_result(name, data))
+                    pending.append(skipped)
+                else:
+                    pending.append(pool.submit(generate_one, name, data, *options))
+                if len(pending) >= jobs * 2:
+                    results.append(pending.popleft().result())
+            while pending:
+                results.append(pending.popleft().result())
+
+    failed = [r for r in results if r["status"] not in ("ok", "unchanged")]
+    up_to_date = [r for r in results if r["status"] == "unchanged"]
+    return {
+        "total": len(results),
+        "succeeded": len(results) - len(failed) - len(up_to_date),
+        "failed": len(failed),
+        "unchanged": len(up_to_date),
+        "seconds": time.perf_counter() - started,
+        "results": results,
+    }
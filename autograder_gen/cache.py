@@ -0,0 +1,165 @@
+"""
+Content-addressed cache of generated autograder artifacts.
+
+Artifacts (autograder.zip, description.docx, skeleton zips) are stored on
+disk under a key derived from the normalized configuration and a digest of
+the package's code and templates. The store is bounded in size and evicts the least
+recently used artifacts first.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from autograder_gen.config import AutograderConfig
+from autograder_gen.utils import atomic_write_bytes, build_digest, get_cache_dir
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class PackageCache:
+    """On-disk store of generated artifacts with size-bounded LRU eviction."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls) -> Optional["PackageCache"]:
+        """Create a cache under AUTOGRADER_GEN_CACHE_DIR, or None if it is unset."""
+        cache_dir = get_cache_dir("packages")
+        if cache_dir is None:
+            return None
+        return cls(str(cache_dir))
+
+    @classmethod
+    def for_options(
+        cls, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None
+    ) -> Optional["PackageCache"]:
+        """The cache in cache_dir (--cache-dir), else the environment's, else None."""
+        if cache_dir:
+            return cls(cache_dir, max_bytes or DEFAULT_MAX_BYTES)
+        return cls.from_environment()
+
+    def make_key(
+        self,
+        config: AutograderConfig,
+        original_config_dict: Optional[Dict[str, Any]] = None,
+        content_digest: Optional[str] = None,
+        **options: Any,
+    ) -> str:
+        """Compute the cache key for a configuration and generator options.
+
+        content_digest (LoadedConfig.digest) identifies a loaded config
+        completely, so the config isn't serialized again to compute the key.
+        """
+        if content_digest is not None:
+            content: Dict[str, Any] = {"digest": content_digest}
+        else:
+            content = {
+                "config": config.model_dump(mode="json"),
+                # The original config is embedded in autograder.zip, so it is part of the key
+                "original": original_config_dict,
+            }
+        payload = {
+            **content,
+            "options": options,
+            # Any change to the code or templates builds different packages
+            "build": build_digest(),
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str, artifact: str) -> Optional[bytes]:
+        """Return a cached artifact, or None on a miss."""
+        path = self._artifact_path(key, artifact)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Touch the file so LRU eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, artifact: str, data: bytes):
+        """Store an artifact and evict old entries if the cache is over budget."""
+        path = self._artifact_path(key, artifact)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Readers never see partial artifacts
+        atomic_write_bytes(path, data)
+        self._evict()
+
+    def get_or_build(
+        self, key: str, artifact: str, build: Callable[[], bytes]
+    ) -> Tuple[bytes, bool]:
+        """Return a cached artifact or build and store it. Also returns whether it was a hit."""
+        data = self.get(key, artifact)
+        if data is not None:
+            return data, True
+
+        data = build()
+        self.put(key, artifact, data)
+        return data, False
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and the current size of the store."""
+        files = self._artifact_files()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(files),
+                "size_bytes": sum(size for _, size, _ in files),
+            }
+
+    def _artifact_path(self, key: str, artifact: str) -> Path:
+        return self.cache_dir / key[:2] / key / artifact
+
+    def _artifact_files(self):
+        """List cached artifacts as (path, size, mtime) tuples."""
+        files = []
+        for path in self.cache_dir.glob("*/*/*"):
+            if path.name.endswith(".tmp"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict(self):
+        """Remove least recently used artifacts until the store fits max_bytes."""
+        files = self._artifact_files()
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return
+
+        for path, size, _ in sorted(files, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                continue
+            try:
+                path.parent.rmdir()
+            except OSError:
+                pass
@@ -8,31 +8,277 @@ and generates Gradescope autograder scripts based on the configuration.
 """
 
 import argparse
+import json
+import os
 import sys
-import yaml
+import time
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 # Add the project root to Python path so we can import autograder_core
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from autograder_gen.config import ConfigParser
-from autograder_gen.generator import AutograderGenerator
-from autograder_gen.validator import ConfigValidator
+# Only light modules are imported up front, so forwarding a request to the
+# generator daemon doesn't pay for pydantic, Jinja and python-docx
+from autograder_gen.daemon import SOCKET_ENV_VAR, default_socket_path, forward_request
+from autograder_gen.package import COMPRESSION_METHODS, DEFAULT_COMPRESSION
+from autograder_gen.watch import FileWatcher, watch
 from autograder_gen.utils import (
+    allow_gc_pauses,
     setup_logging,
     print_success,
     print_error,
     print_warning,
+    print_info,
 )
 
 
-def main():
+def run_batch(args) -> int:
+    """Validate and generate every configuration selected by the batch options."""
+    from autograder_gen.batch import (
+        configs_from_directory,
+        configs_from_glob,
+        configs_from_stream,
+        generate_many,
+    )
+
+    try:
+        if args.config_dir:
+            configs = configs_from_directory(args.config_dir)
+        elif args.config_glob:
+            configs = configs_from_glob(args.config_glob)
+        else:
+            configs = configs_from_stream(args.multi_config)
+
+        summary = generate_many(
+            configs,
+            args.output,
+            jobs=args.jobs,
+            with_description=args.with_description,
+            with_skeletons=args.with_skeletons,
+            validate_only=args.validate_only,
+            reproducible=args.reproducible,
+            compression=args.compression,
+            compresslevel=args.compression_level,
+            changed=args.changed,
+            incremental=args.incremental,
+            cache_dir=args.cache_dir,
+            cache_max_bytes=args.cache_max_mb * 1024 * 1024 if args.cache_max_mb else None,
+        )
+    except Exception as e:
+        print_error(f"Error: {e}")
+        return 1
+
+    summary_json = json.dumps(summary, indent=2)
+    if args.summary:
+        Path(args.summary).write_text(summary_json, encoding="utf-8")
+    else:
+        print(summary_json)
+
+    for result in summary["results"]:
+        if result["status"] not in ("ok", "unchanged"):
+            print_error(f"{result['name']}: {'; '.join(result['errors'])}")
+
+    return 0 if summary["failed"] == 0 else 1
+
+
+def config_request(args) -> Dict[str, Any]:
+    """Build the generator service request for the single-config options in args."""
+    request: Dict[str, Any] = {
+        "action": "validate" if args.validate_only else "generate",
+        # The daemon has its own working directory
+        "config": str(Path(args.config).resolve()),
+    }
+    if not args.validate_only:
+        request.update(
+            output=str(Path(args.output).resolve()),
+            with_description=args.with_description,
+            with_skeletons=args.with_skeletons,
+            incremental=args.incremental,
+            jobs=args.jobs,
+            reproducible=args.reproducible,
+            compression=args.compression,
+            compresslevel=args.compression_level,
+            cache_dir=str(Path(args.cache_dir).resolve()) if args.cache_dir else None,
+            cache_max_bytes=args.cache_max_mb * 1024 * 1024 if args.cache_max_mb else None,
+        )
+    return request
+
+
+def generate_from_config(args, service=None) -> int:
+    """Validate and generate the artifacts for the single configuration in args.config.
+
+    The request goes to the generator daemon at --socket or
+    $AUTOGRADER_GEN_SOCKET when one is given and a compatible daemon is
+    reachable (unless --no-daemon is given), and to service, or a new local
+    service, otherwise.
+    """
+    request = config_request(args)
+    response = None
+    socket_path = args.socket or os.environ.get(SOCKET_ENV_VAR)
+    if socket_path and not args.no_daemon:
+        response = forward_request(request, socket_path)
+        if response is not None and args.verbose:
+            print_info("Request handled by the generator daemon")
+    if response is None:
+        from autograder_gen.daemon import GeneratorService
+
+        response = (service or GeneratorService()).handle(request)
+
+    if not response["ok"]:
+        print_error(f"Error: {response['error']}")
+        return 1
+
+    for warning in response["warnings"]:
+        print_warning(warning)
+
+    if not response["valid"]:
+        print_error("Configuration validation failed:")
+        for error in response["errors"]:
+            print_error(f"  - {error}")
+        return 1
+
+    print_success("Configuration validation passed")
+
+    # If validate-only flag is set, stop here
+    if args.validate_only:
+        return 0
+
+    if "variants" in response:
+        for name, variant in response["variants"].items():
+            values = ", ".join(f"{key}={value}" for key, value in variant["parameters"].items())
+            print_info(f"{name}: {values}")
+            print_artifacts(args, variant["artifacts"])
+    else:
+        print_artifacts(args, response["artifacts"])
+
+    if response.get("cache") is not None:
+        stats = response["cache"]
+        print_info(
+            f"Package cache: {stats['hits']} hit(s), {stats['misses']} miss(es)"
+        )
+
+    return 0
+
+
+def print_artifacts(args, artifacts: Dict[str, Dict[str, Any]]):
+    """Report the artifacts generated for one assessment."""
+    package = artifacts["autograder.zip"]
+    if args.incremental:
+        print_info(f"Rebuilt {len(package['rebuilt'])} file(s)")
+        for name in package["rebuilt"]:
+            print_info(f"  - {name}")
+    print_success(f"Autograder generated successfully: {package['path']}")
+    if args.reproducible:
+        print_info(f"SHA-256: {package['sha256']}")
+    if args.with_description:
+        print_success(
+            f"Assessment description generated: {artifacts['description.docx']['path']}"
+        )
+    if args.with_skeletons:
+        print_success(
+            f"Correct answer sample generated: {artifacts['correct_answer.zip']['path']}"
+        )
+        print_success(
+            f"Wrong answer sample generated: {artifacts['wrong_answer.zip']['path']}"
+        )
+
+    if args.verbose:
+        for name, artifact in artifacts.items():
+            source = " (cached)" if artifact["cached"] else ""
+            print_info(f"{name}: {artifact['seconds']:.3f}s{source}")
+
+
+def watched_paths(args, service) -> List[str]:
+    """Files whose changes trigger a rebuild in watch mode.
+
+    That is the config and the expected input/output files it references.
+    """
+    return service.watched_files(args.config)
+
+
+def run_watch(args) -> int:
+    """Generate once, then regenerate incrementally on every configuration change."""
+    from autograder_gen.daemon import GeneratorService
+
+    # The process stays warm between builds, so only the first one pays for
+    # imports and template compilation
+    service = GeneratorService()
+    service.warm()
+    args.incremental = True
+    # Taken before the first build, so edits made during it aren't missed
+    watcher = FileWatcher(watched_paths(args, service))
+    generate_from_config(args, service)
+    print_info(f"Watching {args.config} for changes (press Ctrl+C to stop)")
+    # Output may be piped to a log, show each build as it happens
+    sys.stdout.flush()
+
+    def rebuild(changed: List[str]):
+        print_info(f"Changed: {', '.join(changed)}")
+        started = time.perf_counter()
+        status = generate_from_config(args, service)
+        elapsed = time.perf_counter() - started
+        if status == 0:
+            print_info(f"Regenerated in {elapsed:.2f}s")
+        sys.stdout.flush()
+
+    try:
+        watch(lambda: watched_paths(args, service), rebuild, watcher=watcher)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_serve(argv: List[str]) -> int:
+    """Run the generator daemon in the foreground."""
+    from autograder_gen.daemon import DaemonError, serve
+
     parser = argparse.ArgumentParser(
-        description="Generate Gradescope autograder scripts from YAML configuration"
+        prog="cli.py serve",
+        description="Keep a warm generator running and serve requests on a Unix socket",
     )
     parser.add_argument(
-        "--config", "-c", required=True, help="Path to YAML configuration file"
+        "--socket",
+        help=f"Socket path (defaults to ${SOCKET_ENV_VAR} or a per-user path)",
+    )
+    args = parser.parse_args(argv)
+
+    socket_path = args.socket or default_socket_path()
+    print_info(f"Starting generator daemon on {socket_path} (press Ctrl+C to stop)")
+    try:
+        serve(socket_path)
+    except DaemonError as e:
+        print_error(f"Error: {e}")
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    # The CLI's process runs nothing else
+    allow_gc_pauses()
+    if argv and argv[0] == "serve":
+        return run_serve(argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="Generate Gradescope autograder scripts from YAML configuration",
+        epilog="Run 'cli.py serve' to start a generator daemon that later "
+        "invocations given its --socket forward their requests to.",
+    )
+    sources = parser.add_mutually_exclusive_group(required=True)
+    sources.add_argument("--config", "-c", help="Path to YAML or JSON configuration file")
+    sources.add_argument(
+        "--config-dir",
+        help="Batch mode: generate every YAML or JSON configuration below this directory",
+    )
+    sources.add_argument(
+        "--config-glob",
+        help="Batch mode: generate every configuration matching this glob pattern",
+    )
+    sources.add_argument(
+        "--multi-config",
+        help="Batch mode: generate every document of a multi-document YAML file",
     )
     parser.add_argument(
         "--output",
@@ -60,85 +306,90 @@ def main():
         action="store_true",
         help="Generate correct_answer.zip and wrong_answer.zip skeletons",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Re-render only the files whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of processes used to render question test files "
+        "(0 uses all available CPUs)",
+    )
+    parser.add_argument(
+        "--reproducible",
+        action="store_true",
+        help="Produce byte-for-byte identical packages for identical configs "
+        "and write autograder.zip.sha256",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=sorted(COMPRESSION_METHODS),
+        default=DEFAULT_COMPRESSION,
+        help="Compression used for generated zip files "
+        "(small or incompressible files are always stored)",
+    )
+    parser.add_argument(
+        "--compression-level",
+        type=int,
+        choices=range(0, 10),
+        metavar="{0-9}",
+        help="Deflate compression level (defaults to zlib's default)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and regenerate incrementally whenever the "
+        "configuration file changes",
+    )
+    parser.add_argument(
+        "--summary",
+        help="Batch mode: write the JSON summary to this file instead of stdout",
+    )
+    parser.add_argument(
+        "--changed",
+        nargs="+",
+        metavar="FILE",
+        help="Batch mode: only regenerate the configurations that are, or take "
+        "questions or expected input/output files from, one of these files",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Reuse previously generated artifacts stored in this directory "
+        "(defaults to $AUTOGRADER_GEN_CACHE_DIR/packages when set)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        help="Maximum size of the package cache in megabytes (default: 512)",
+    )
+    parser.add_argument(
+        "--socket",
+        help="Forward the request to the generator daemon started with 'serve' "
+        f"on this socket (defaults to ${SOCKET_ENV_VAR}; without either, "
+        "requests are never forwarded)",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Do the work in this process even if a generator daemon is running",
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Setup logging
     setup_logging(args.verbose)
 
-    try:
-        # Validate configuration first using JSON schema
-        validator = ConfigValidator()
-        is_valid = validator.validate_from_file(args.config)
-
-        # Display validation results
-        errors = validator.get_errors()
-        warnings = validator.get_warnings()
-
-        for warning in warnings:
-            print_warning(warning)
-
-        if not is_valid:
-            print_error("Configuration validation failed:")
-            for error in errors:
-                print_error(f"  - {error}")
-            return 1
-
-        print_success("Configuration validation passed")
-
-        # If validate-only flag is set, stop here
-        if args.validate_only:
-            return 0
-
-        # Parse configuration after validation
-        config_parser = ConfigParser(args.config)
-        config = config_parser.parse()
-
-        # Load original config for preservation in zip
-        original_config_dict = None
-        try:
-            path = Path(args.config)
-            with open(path, "r", encoding="utf-8") as f:
-                if path.suffix.lower() not in [".yaml", ".yml"]:
-                    raise ValueError("File must be a YAML file (.yml or .yaml)")
-                original_config_dict = yaml.safe_load(f)
-        except Exception:
-            pass  # If we can't load original config, proceed without it
-
-        # Generate autograder
-        generator = AutograderGenerator(config, original_config_dict)
-        output_path = generator.generate(args.output)
-        print_success(f"Autograder generated successfully: {output_path}")
-
-        # Generate description if requested
-        if args.with_description:
-            docx_buffer = generator.generate_description_docx()
-            docx_path = Path(args.output) / "description.docx"
-            with open(docx_path, "wb") as f:
-                f.write(docx_buffer.getbuffer())
-            print_success(f"Assessment description generated: {docx_path}")
-
-        # Generate answer samples if requested
-        if args.with_skeletons:
-            # Correct answer
-            correct_buffer = generator.generate_correct_answer_zip()
-            correct_path = Path(args.output) / "correct_answer.zip"
-            with open(correct_path, "wb") as f:
-                f.write(correct_buffer.getbuffer())
-            print_success(f"Correct answer sample generated: {correct_path}")
-
-            # Wrong answer
-            wrong_buffer = generator.generate_wrong_answer_zip()
-            wrong_path = Path(args.output) / "wrong_answer.zip"
-            with open(wrong_path, "wb") as f:
-                f.write(wrong_buffer.getbuffer())
-            print_success(f"Wrong answer sample generated: {wrong_path}")
-
-        return 0
-
-    except Exception as e:
-        print_error(f"Error: {e}")
-        return 1
+    if not args.config:
+        if args.watch:
+            parser.error("--watch requires --config")
+        return run_batch(args)
+    if args.watch:
+        return run_watch(args)
+    return generate_from_config(args)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,31 @@
+import hashlib
+import json
+import threading
 import yaml
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
 from pydantic import BaseModel, Field, field_validator, model_validator, ValidationError
+from pydantic import VERSION as PYDANTIC_VERSION
+
+from autograder_gen.utils import (
+    FileState,
+    atomic_write_bytes,
+    build_digest,
+    file_state,
+    gc_paused,
+    get_cache_dir,
+)
+from autograder_gen.variants import item_placeholders, placeholders
+
+# libyaml's C loader is many times faster on large configs; PyYAML builds
+# without libyaml fall back to the pure-Python loader
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Config file suffixes and the format they are parsed as
+CONFIG_FORMATS = {".yaml": "yaml", ".yml": "yaml", ".json": "json"}
+
+# Marking item fields holding a data file path
+DATA_FILE_FIELDS = frozenset({"expected_input_file", "expected_output_file"})
 
 
 class MarkingItemModel(BaseModel):
@@ -15,6 +39,10 @@ class MarkingItemModel(BaseModel):
     name: str = ""
     expected_input: str = ""
     expected_output: str = ""
+    # Files with the expected input/output, relative to the config file. They
+    # are packaged as data files and read by the tests when they run
+    expected_input_file: str = ""
+    expected_output_file: str = ""
 
     # Function testing fields
     function_name: str = ""
@@ -49,8 +77,21 @@ class MarkingItemModel(BaseModel):
     def validate_type_fields(self) -> "MarkingItemModel":
         if self.type == "function_test" and not self.function_name:
             raise ValueError("function_name is required for function_test")
+        for field in ("expected_input", "expected_output"):
+            if getattr(self, field) and getattr(self, f"{field}_file"):
+                raise ValueError(f"{field} and {field}_file can't both be set")
         return self
 
+    def data_files(self) -> Dict[str, str]:
+        """Expected input/output fields that reference a file -> file path."""
+        if not (self.expected_input_file or self.expected_output_file):
+            return {}
+        return {
+            field: getattr(self, f"{field}_file")
+            for field in ("expected_input", "expected_output")
+            if getattr(self, f"{field}_file")
+        }
+
 
 class QuestionModel(BaseModel):
     """Represents a question with multiple marking items."""
@@ -60,6 +101,53 @@ class QuestionModel(BaseModel):
     marking_items: List[MarkingItemModel] = Field(min_length=1)
 
 
+class QuestionsFromModel(BaseModel):
+    """Questions taken from a question bank file (see autograder_gen.banks)."""
+
+    # Bank file, relative to the config
+    file: str
+    # Names of the questions to take, every question of the bank if empty
+    questions: List[str] = Field(default_factory=list)
+
+
+class VariantsModel(BaseModel):
+    """Generates several variants of an assessment with different test data."""
+
+    # Number of variants, defaults to the number of parameter sets
+    count: int = Field(default=0, ge=0)
+    seed: int = 0
+    # Parameter name -> values to pick from for each variant
+    parameters: Dict[str, List[Any]] = Field(default_factory=dict)
+    # Explicit parameter values for the first variants
+    parameter_sets: List[Dict[str, Any]] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def validate_parameters(self) -> "VariantsModel":
+        for name, values in self.parameters.items():
+            if not values:
+                raise ValueError(f"Variant parameter '{name}' has no values")
+        count = self.count or len(self.parameter_sets)
+        if count == 0:
+            raise ValueError("variants needs a count or parameter_sets")
+        if count < len(self.parameter_sets):
+            raise ValueError("variants count is smaller than the number of parameter_sets")
+        for index, parameter_set in enumerate(self.parameter_sets, 1):
+            extra = set(parameter_set) - set(self.parameters)
+            # Variants beyond the explicit sets only get the random parameters
+            if extra and count > len(self.parameter_sets):
+                raise ValueError(
+                    f"Variant parameter(s) {sorted(extra)} of parameter set {index} "
+                    "need values in 'parameters' for the remaining variants"
+                )
+        return self
+
+    def parameter_names(self) -> set:
+        names = set(self.parameters)
+        for parameter_set in self.parameter_sets:
+            names.update(parameter_set)
+        return names
+
+
 class AutograderConfigModel(BaseModel):
     """Complete autograder configuration."""
 
@@ -68,6 +156,13 @@ class AutograderConfigModel(BaseModel):
     global_time_limit: int = 300
     setup_commands: List[str] = Field(default_factory=list)
     files_necessary: List[str] = Field(default_factory=list)
+    # How much per-question detail README.md includes: full, summary or none
+    readme_detail: str = "full"
+    # Optional: generate several variants with ${name} placeholders substituted
+    variants: Optional[VariantsModel] = None
+    # Question banks whose questions come before the config's own questions.
+    # LoadedConfig fills them in, so validated models always have it empty
+    questions_from: List[Union[str, QuestionsFromModel]] = Field(default_factory=list)
     questions: List[QuestionModel] = Field(min_length=1)
 
     @field_validator("language")
@@ -78,47 +173,454 @@ class AutograderConfigModel(BaseModel):
             raise ValueError(f"language must be one of: {allowed}")
         return v
 
+    @field_validator("readme_detail")
+    @classmethod
+    def check_readme_detail(cls, v: str) -> str:
+        allowed = {"full", "summary", "none"}
+        if v not in allowed:
+            raise ValueError(f"readme_detail must be one of: {allowed}")
+        return v
+
     @model_validator(mode="after")
     def validate_target_files(self) -> "AutograderConfigModel":
+        files_necessary = set(self.files_necessary)
         for i, q in enumerate(self.questions):
             for j, item in enumerate(q.marking_items):
                 target = item.target_file
-                if target and target not in self.files_necessary:
+                if target and target not in files_necessary:
                     raise ValueError(
                         f"Question '{q.name}', Item {j+1}: Target file '{target}' is not listed in 'files_necessary'"
                     )
         return self
 
+    @model_validator(mode="after")
+    def validate_variant_placeholders(self) -> "AutograderConfigModel":
+        if self.variants is None:
+            return self
+        defined = self.variants.parameter_names()
+        for q in self.questions:
+            for j, item in enumerate(q.marking_items):
+                undefined = item_placeholders(item.model_dump()) - defined
+                if undefined:
+                    raise ValueError(
+                        f"Question '{q.name}', Item {j+1}: Undefined variant parameter(s): "
+                        f"{', '.join(sorted(undefined))}"
+                    )
+        return self
+
 
 AutograderConfig = AutograderConfigModel
 Question = QuestionModel
 MarkingItem = MarkingItemModel
+Variants = VariantsModel
+
+
+def parse_config_bytes(raw: bytes, format: str = "yaml") -> Any:
+    """Parse configuration bytes, with libyaml for YAML when it is available."""
+    if format == "json":
+        try:
+            return json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"Invalid format in JSON configuration file: {e}")
+    try:
+        return yaml.load(raw, Loader=YamlLoader)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid format in YAML configuration file: {e}")
+
+
+def resolve_data_file(
+    base_dir: Optional[str], name: str, roots: Optional[List[str]] = None
+) -> Path:
+    """Locate a data file referenced by a config, relative to the config's directory.
+
+    Configs that weren't loaded from a file (e.g. uploaded to the web
+    interface) have no base_dir and can't reference data files. Data files
+    must be inside one of roots (the config's directory by default), so a
+    config can't package arbitrary files of the machine it is built on.
+    """
+    if base_dir is None:
+        raise ValueError(
+            f"Data file '{name}' can only be referenced from a configuration file"
+        )
+    path = Path(base_dir) / name
+    resolved = path.resolve()
+    allowed = [Path(root).resolve() for root in roots or [base_dir]]
+    if not any(resolved.is_relative_to(root) for root in allowed):
+        raise ValueError(
+            f"Data file '{name}' is outside the directory of the configuration "
+            "and of its question banks"
+        )
+    if not path.is_file():
+        raise FileNotFoundError(f"Data file not found: {path}")
+    return path
+
+
+def data_file_references(config: AutograderConfig) -> List[tuple]:
+    """(context, field, name) of every data file referenced by a config.
+
+    Names that still contain variant placeholders are left out; they are
+    only known once each variant is expanded.
+    """
+    references = []
+    for question in config.questions:
+        for j, item in enumerate(question.marking_items):
+            for field, name in item.data_files().items():
+                if not placeholders(name):
+                    references.append(
+                        (f"Question '{question.name}', Item {j+1}", f"{field}_file", name)
+                    )
+    return references
+
+
+class LoadedConfig:
+    """A configuration read and parsed once, shared by every stage that needs it.
+
+    Holds the raw bytes as written (None when the config was given as a
+    dict), the parsed data, the validated model and a content digest. The
+    model is validated on first use and kept; invalid configs raise
+    ValidationError every time it is requested.
+
+    Config files found in the compiled config cache are neither parsed nor
+    validated: their data, model and (when known) validation warnings are
+    loaded from the cache.
+    """
+
+    def __init__(
+        self,
+        data: Any,
+        raw: Optional[bytes] = None,
+        path: Optional[str] = None,
+        format: str = "yaml",
+    ):
+        self.data = data
+        self.raw = raw
+        self.path = path
+        # Format of raw: yaml or json
+        self.format = format
+        self._model: Optional[AutograderConfig] = None
+        self._digest: Optional[str] = None
+        self._resolution = None
+        self._dependencies: Optional[Dict[str, FileState]] = None
+        # Whether data and model come from the compiled config cache
+        self.compiled = False
+        # Validation warnings of a compiled config, None if not known
+        self.warnings: Optional[List[str]] = None
+
+    @classmethod
+    def from_file(cls, config_path: str) -> "LoadedConfig":
+        """Read and parse a YAML or JSON configuration file."""
+        path = Path(config_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Configuration file not found: {config_path}")
+        format = CONFIG_FORMATS.get(path.suffix.lower())
+        if format is None:
+            raise ValueError("Only YAML (.yml, .yaml) and JSON (.json) formats are supported.")
+        return cls.from_bytes(path.read_bytes(), str(path), format)
+
+    @classmethod
+    def from_bytes(
+        cls, raw: bytes, path: Optional[str] = None, format: str = "yaml"
+    ) -> "LoadedConfig":
+        """Parse YAML or JSON configuration bytes.
+
+        Config files (with a path) are looked up in the compiled config
+        cache first, when it is enabled.
+        """
+        if path is not None:
+            cache = compiled_config_cache()
+            if cache is not None:
+                loaded = cache.get(raw, path, format)
+                if loaded is not None:
+                    return loaded
+        return cls(parse_config_bytes(raw, format), raw, path, format)
+
+    def _resolve(self):
+        """Fill in the questions of the question banks in questions_from, once.
+
+        Raises ValueError if a bank can't be used.
+        """
+        if self._resolution is None:
+            from autograder_gen.banks import resolve_includes
+
+            self._resolution = resolve_includes(self.data, self.base_dir)
+        return self._resolution
+
+    @property
+    def resolved_data(self) -> Any:
+        """The config data with the questions of its question banks filled in."""
+        return self._resolve().data
+
+    @property
+    def includes(self) -> List[str]:
+        """Paths of every question bank the config depends on, directly or not."""
+        return list(self._resolve().files)
+
+    @property
+    def data_roots(self) -> List[str]:
+        """Directories data files may be in: the config's and its question banks'."""
+        if self.base_dir is None:
+            return []
+        bank_dirs = (str(Path(path).parent) for path in self.includes)
+        return list(dict.fromkeys([self.base_dir, *bank_dirs]))
+
+    @property
+    def dependencies(self) -> Dict[str, FileState]:
+        """Files other than the config that its artifacts are built from.
+
+        Maps the resolved paths of its question banks (directly or not) and
+        of the data files it references to their state when the config was
+        first looked up. Raises ValueError (or ValidationError) for invalid
+        configs.
+        """
+        if self._dependencies is None:
+            dependencies = dict(self._resolve().files)
+            for _, _, name in data_file_references(self.model):
+                path = str((Path(self.base_dir) / name).resolve())
+                dependencies[path] = file_state(path)
+            self._dependencies = dependencies
+        return self._dependencies
+
+    def includes_changed(self) -> bool:
+        """Whether a question bank changed since the config was resolved."""
+        if self._resolution is None:
+            return False
+        return any(
+            file_state(path) != state for path, state in self._resolution.files.items()
+        )
+
+    @property
+    def model(self) -> AutograderConfig:
+        if self._model is None:
+            resolution = self._resolve()
+            data = resolution.data
+            if resolution.questions is not None:
+                # Bank questions are passed as the models validated with their
+                # bank, so they aren't validated again
+                data = {**data, "questions": resolution.questions}
+            with gc_paused():
+                self._model = AutograderConfig.model_validate(data)
+        return self._model
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the raw bytes, or of the canonical JSON form of a dict config.
+
+        For configs with question banks, the digests of the banks are included.
+        """
+        if self._digest is None:
+            if self.raw is not None:
+                content = self.raw
+            else:
+                content = json.dumps(self.data, sort_keys=True, default=str).encode("utf-8")
+            digest = hashlib.sha256(content)
+            for bank_digest in self._resolve().digests:
+                digest.update(bank_digest.encode("utf-8"))
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    @property
+    def base_dir(self) -> Optional[str]:
+        """Directory that relative data file paths are resolved against."""
+        return str(Path(self.path).resolve().parent) if self.path else None
+
+    def save_compiled(self, warnings: Optional[List[str]] = None):
+        """Store a valid config file in the compiled config cache, if enabled.
+
+        warnings are its validation warnings; without them, loading the
+        config from the cache skips parsing and schema validation but the
+        validation rules still run.
+        """
+        if self.path is None or self.raw is None:
+            return
+        if self.compiled and (warnings is None or self.warnings is not None):
+            return
+        cache = compiled_config_cache()
+        if cache is not None:
+            cache.put(self, warnings)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Batch workers receive loaded configs, the model is rebuilt there on
+        # use unless it came from the compiled config cache
+        if self.compiled:
+            return dict(self.__dict__)
+        return {**self.__dict__, "_model": None, "_resolution": None}
+
+
+def construct_config(data: Dict[str, Any]) -> AutograderConfig:
+    """Rebuild a validated config from its model_dump(), without validating it again."""
+    questions = [
+        Question.model_construct(
+            **{
+                **question,
+                "marking_items": [
+                    MarkingItem.model_construct(**item)
+                    for item in question["marking_items"]
+                ],
+            }
+        )
+        for question in data["questions"]
+    ]
+    variants = data.get("variants")
+    questions_from = [
+        entry if isinstance(entry, str) else QuestionsFromModel.model_construct(**entry)
+        for entry in data.get("questions_from", [])
+    ]
+    return AutograderConfig.model_construct(
+        **{
+            **data,
+            "variants": None if variants is None else Variants.model_construct(**variants),
+            "questions_from": questions_from,
+            "questions": questions,
+        }
+    )
+
+
+def _stored_states(files: Dict[str, FileState]) -> Dict[str, Optional[List[int]]]:
+    return {path: None if state is None else list(state) for path, state in files.items()}
+
+
+def _loaded_states(files: Dict[str, Optional[List[int]]]) -> Dict[str, FileState]:
+    return {path: None if state is None else tuple(state) for path, state in files.items()}
+
+
+class CompiledConfigCache:
+    """On-disk cache of validated config files, as JSON.
+
+    Entries are keyed by the content and location of a config file and by
+    the package's code (build_digest) and the pydantic version, and hold the
+    parsed data, the validated model's fields and the validation warnings.
+    Loading an entry runs neither the YAML parser nor pydantic's validation:
+    the model is rebuilt with model_construct. Entries are plain JSON, so a
+    shared cache directory can't inject code the way pickles could. An entry
+    is only used while the question banks and data files the config
+    references are unchanged.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(raw: bytes, path: str, format: str) -> str:
+        # Relative bank and data file paths depend on the config's location
+        digest = hashlib.sha256(raw)
+        for part in (str(Path(path).resolve()), format, build_digest(), PYDANTIC_VERSION):
+            digest.update(b"\0" + part.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, raw: bytes, path: str, format: str = "yaml") -> Optional[LoadedConfig]:
+        """Return the compiled config for a config file, or None on a miss."""
+        from autograder_gen.banks import Resolution
+
+        loaded: Optional[LoadedConfig] = None
+        try:
+            entry_path = self._entry_path(self.key(raw, path, format))
+            with gc_paused():
+                entry = json.loads(entry_path.read_bytes())
+            files = _loaded_states(entry["files"])
+            if all(file_state(file) == state for file, state in files.items()):
+                loaded = LoadedConfig(entry["data"], raw, path, format)
+                with gc_paused():
+                    loaded._model = construct_config(entry["model"])
+                resolution = entry["resolution"]
+                loaded._resolution = Resolution(
+                    # None when it is the config's own data (no question banks)
+                    entry["data"] if resolution["data"] is None else resolution["data"],
+                    None,
+                    _loaded_states(resolution["files"]),
+                    resolution["digests"],
+                )
+                loaded._digest = entry["digest"]
+                loaded._dependencies = files
+                loaded.compiled = True
+                loaded.warnings = entry["warnings"]
+        except (OSError, ValueError, LookupError, TypeError, AttributeError):
+            # Missing, unreadable or not an entry of this cache
+            loaded = None
+        with self._lock:
+            if loaded is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return loaded
+
+    def put(self, loaded: LoadedConfig, warnings: Optional[List[str]] = None):
+        """Store a loaded config file, which must be valid."""
+        resolution = loaded._resolve()
+        entry = {
+            "data": loaded.data,
+            "model": loaded.model.model_dump(),
+            # Bank questions are in the model, they aren't needed again
+            "resolution": {
+                "data": None if resolution.data is loaded.data else resolution.data,
+                "files": _stored_states(resolution.files),
+                "digests": resolution.digests,
+            },
+            "digest": loaded.digest,
+            "warnings": None if warnings is None else list(warnings),
+            "files": _stored_states(loaded.dependencies),
+        }
+        try:
+            encoded = json.dumps(entry, separators=(",", ":"))
+        except (TypeError, ValueError):
+            # YAML values JSON can't hold (e.g. dates), the config isn't cached
+            return
+        if json.loads(encoded) != entry:
+            # Not kept as is by JSON (e.g. non-string keys)
+            return
+        path = self._entry_path(self.key(loaded.raw, loaded.path, loaded.format))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(path, encoded.encode("utf-8"))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_compiled_caches: Dict[str, CompiledConfigCache] = {}
+_compiled_caches_lock = threading.Lock()
+
+
+def compiled_config_cache() -> Optional[CompiledConfigCache]:
+    """The process-wide compiled config cache, None unless AUTOGRADER_GEN_CACHE_DIR is set."""
+    cache_dir = get_cache_dir("configs")
+    if cache_dir is None:
+        return None
+    with _compiled_caches_lock:
+        cache = _compiled_caches.get(str(cache_dir))
+        if cache is None:
+            cache = _compiled_caches[str(cache_dir)] = CompiledConfigCache(str(cache_dir))
+    return cache
 
 
 class ConfigParser:
-    """Parses YAML configuration files for autograder generation."""
+    """Parses YAML or JSON configuration files for autograder generation."""
 
     def __init__(self, config_path: str):
         self.config_path = Path(config_path)
         if not self.config_path.exists():
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
 
-    def parse(self) -> AutograderConfig:
-        """Parse the configuration file (YAML only)."""
-        if self.config_path.suffix.lower() not in [".yaml", ".yml"]:
-            raise ValueError("Only YAML format (.yml, .yaml) is supported.")
+    def load(self) -> LoadedConfig:
+        """Read and parse the configuration file without validating it."""
+        return LoadedConfig.from_file(str(self.config_path))
 
+    def parse(self) -> AutograderConfig:
+        """Parse the configuration file (YAML or JSON)."""
         try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-
-            return AutograderConfig.model_validate(data)
-
-        except yaml.YAMLError as e:
-            raise ValueError(f"Invalid format in YAML configuration file: {e}")
-        except ValidationError as e:
-            # We let ValidationError bubble up
-            raise e
+            loaded = self.load()
+            model = loaded.model
+            loaded.save_compiled()
+            return model
+        except (ValueError, FileNotFoundError):
+            # Includes ValidationError, which callers report field by field
+            raise
         except Exception as e:
             raise ValueError(f"Error parsing configuration: {e}")
 
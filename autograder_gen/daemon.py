@@ -0,0 +1,414 @@
+"""
+Long-lived generator service reachable over a Unix domain socket.
+
+`cli.py serve` starts a daemon that keeps the validator, the generator and
+the compiled templates warm, so editor integrations and build scripts
+don't pay interpreter and import start-up costs on every call. Given a
+socket (--socket or AUTOGRADER_GEN_SOCKET), the CLI forwards
+single-config requests to the daemon and falls back to doing the work
+itself when none is reachable.
+
+Protocol: the client connects, sends one JSON object terminated by a
+newline and reads one JSON object terminated by a newline. Every request
+has an "action" (ping, validate, generate, export or shutdown) and the
+client's "version", "build" (a digest of its code and templates) and
+"environment" (the variables in FORWARDED_ENV_VARS); every response has
+"ok" and, when it is false, "error". The daemon rejects requests from
+clients whose build or environment differ from its own, which then do the
+work themselves. Paths must be absolute, since the daemon has its own
+working directory.
+
+Only the client half of this module (default_socket_path, send_request,
+forward_request) is imported by the CLI on start-up; the service imports
+the generator lazily.
+"""
+
+import base64
+import json
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from autograder_gen import __version__
+from autograder_gen.utils import CACHE_DIR_ENV_VAR, allow_gc_pauses, build_digest
+
+SOCKET_ENV_VAR = "AUTOGRADER_GEN_SOCKET"
+
+# Environment variables that change what the generator produces; the client
+# and the daemon must agree on them
+FORWARDED_ENV_VARS = ("SOURCE_DATE_EPOCH", CACHE_DIR_ENV_VAR)
+
+# Seconds a client waits for the daemon to accept a connection
+CONNECT_TIMEOUT = 0.5
+
+# Parsed configurations kept in memory by the service, keyed by file state
+MAX_LOADED_CONFIGS = 32
+
+EXPORTABLE_ARTIFACTS = (
+    "autograder.zip",
+    "description.docx",
+    "correct_answer.zip",
+    "wrong_answer.zip",
+)
+
+
+class DaemonError(Exception):
+    """Raised when a request can't be forwarded to the daemon."""
+
+
+def default_socket_path() -> str:
+    """Socket path from AUTOGRADER_GEN_SOCKET, or a per-user default."""
+    configured = os.environ.get(SOCKET_ENV_VAR)
+    if configured:
+        return configured
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return str(Path(runtime_dir) / "autograder-gen.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return str(Path(tempfile.gettempdir()) / f"autograder-gen-{uid}.sock")
+
+
+def client_environment() -> Dict[str, Optional[str]]:
+    """The values of FORWARDED_ENV_VARS in this process."""
+    return {name: os.environ.get(name) for name in FORWARDED_ENV_VARS}
+
+
+def send_request(
+    request: Dict[str, Any], socket_path: str, timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """Send one request to the daemon and return its response.
+
+    Raises DaemonError if no daemon is listening on socket_path.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonError("Unix domain sockets are not supported on this platform")
+
+    request = {
+        "version": __version__,
+        "build": build_digest(),
+        "environment": client_environment(),
+        **request,
+    }
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except OSError as e:
+        raise DaemonError(str(e))
+    with sock:
+        try:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(socket_path)
+        except OSError as e:
+            raise DaemonError(f"No generator daemon at {socket_path}: {e}")
+
+        # Generation of large assessments can take a while
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise DaemonError("The generator daemon closed the connection")
+    return json.loads(line)
+
+
+def forward_request(
+    request: Dict[str, Any], socket_path: str
+) -> Optional[Dict[str, Any]]:
+    """Send a request to a compatible daemon, or return None to run it locally.
+
+    Sockets that aren't owned by the current user (e.g. planted in a shared
+    temp directory) are never connected to.
+    """
+    try:
+        info = os.stat(socket_path)
+    except OSError:
+        return None
+    if not stat.S_ISSOCK(info.st_mode):
+        return None
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        return None
+    try:
+        response = send_request(request, socket_path)
+    except DaemonError:
+        return None
+    if response.get("incompatible"):
+        return None
+    return response
+
+
+class GeneratorService:
+    """Handles validate/generate/export requests with warm state.
+
+    Parsed configurations are kept in memory, keyed by path and file
+    state, so repeated requests for an unchanged config skip YAML parsing
+    and validation.
+    """
+
+    def __init__(self):
+        self._loaded: "OrderedDict[Tuple[str, int, int], Tuple[Any, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.build = build_digest()
+
+    def warm(self):
+        """Import the generator and compile every template."""
+        from autograder_gen.templating import warm_templates
+
+        import autograder_gen.generator  # noqa: F401
+
+        warm_templates()
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Dispatch a request and turn failures into error responses."""
+        action = request.get("action")
+        handlers = {
+            "ping": self.ping,
+            "validate": self.validate,
+            "generate": self.generate,
+            "export": self.export,
+        }
+        incompatible = self._incompatibility(request)
+        if incompatible is not None:
+            return {"ok": False, "incompatible": True, "error": incompatible}
+        if action not in handlers:
+            return {"ok": False, "error": f"Unknown action: {action!r}"}
+        try:
+            return handlers[action](request)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def _incompatibility(self, request: Dict[str, Any]) -> Optional[str]:
+        """Why the daemon can't serve a client, or None if it can.
+
+        Fields a request leaves out (e.g. from other tools) aren't checked.
+        """
+        if request.get("version", __version__) != __version__:
+            return (
+                f"Daemon runs autograder-gen {__version__}, "
+                f"client is {request.get('version')}"
+            )
+        if request.get("build", self.build) != self.build:
+            return "Daemon runs different code or templates than the client, restart it"
+        environment = client_environment()
+        for name, value in (request.get("environment") or {}).items():
+            if name in environment and value != environment[name]:
+                return f"Daemon and client have different values of ${name}"
+        return None
+
+    def ping(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {"ok": True, "pid": os.getpid(), "version": __version__}
+
+    def validate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a configuration file."""
+        errors, warnings, _ = self._load(request["config"])
+        return {"ok": True, "valid": not errors, "errors": errors, "warnings": warnings}
+
+    def generate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a configuration file and write the requested artifacts."""
+        from autograder_gen.cache import PackageCache
+
+        errors, warnings, loaded = self._load(request["config"])
+        response: Dict[str, Any] = {
+            "ok": True,
+            "valid": not errors,
+            "errors": errors,
+            "warnings": warnings,
+        }
+        if errors:
+            return response
+
+        generator = self._generator(loaded, request)
+        if generator.config.variants is not None:
+            response["variants"] = generator.generate_variants(
+                request["output"],
+                with_description=request.get("with_description", False),
+                with_skeletons=request.get("with_skeletons", False),
+                incremental=request.get("incremental", False),
+            )
+            return response
+
+        # Look up previously generated artifacts for this exact configuration
+        cache = PackageCache.for_options(
+            request.get("cache_dir"), request.get("cache_max_bytes")
+        )
+
+        response["artifacts"] = generator.generate_all(
+            request["output"],
+            with_description=request.get("with_description", False),
+            with_skeletons=request.get("with_skeletons", False),
+            incremental=request.get("incremental", False),
+            cache=cache,
+        )
+        if cache is not None:
+            stats = cache.stats()
+            response["cache"] = {"hits": stats["hits"], "misses": stats["misses"]}
+        return response
+
+    def export(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Build one artifact in memory and return it base64-encoded."""
+        name = request["artifact"]
+        if name not in EXPORTABLE_ARTIFACTS:
+            raise ValueError(f"artifact must be one of: {', '.join(EXPORTABLE_ARTIFACTS)}")
+        errors, warnings, loaded = self._load(request["config"])
+        if errors:
+            return {"ok": True, "valid": False, "errors": errors, "warnings": warnings}
+
+        generator = self._generator(loaded, request)
+        builders = {
+            "autograder.zip": generator.generate_to_bytes,
+            "description.docx": lambda: generator.generate_description_docx().getvalue(),
+            "correct_answer.zip": lambda: generator.generate_correct_answer_zip().getvalue(),
+            "wrong_answer.zip": lambda: generator.generate_wrong_answer_zip().getvalue(),
+        }
+        data = builders[name]()
+        return {
+            "ok": True,
+            "valid": True,
+            "errors": [],
+            "warnings": warnings,
+            "artifact": name,
+            "data": base64.b64encode(data).decode("ascii"),
+        }
+
+    def watched_files(self, config_path: str) -> List[str]:
+        """A config file, its question banks and its data files, for watch mode."""
+        paths = [str(Path(config_path))]
+        _, _, loaded = self._load(config_path)
+        if loaded is not None:
+            paths.extend(loaded.dependencies)
+        return paths
+
+    def _generator(self, loaded, request: Dict[str, Any]):
+        from autograder_gen.generator import AutograderGenerator
+        from autograder_gen.package import DEFAULT_COMPRESSION
+
+        return AutograderGenerator(
+            loaded,
+            jobs=request.get("jobs", 1),
+            reproducible=request.get("reproducible", False),
+            compression=request.get("compression") or DEFAULT_COMPRESSION,
+            compresslevel=request.get("compresslevel"),
+        )
+
+    def _load(self, config_path: str):
+        """Return (errors, warnings, LoadedConfig or None) for a config file.
+
+        The file is read and parsed once; validation builds the model that
+        generation then uses.
+        """
+        from autograder_gen.config import LoadedConfig
+        from autograder_gen.validator import ConfigValidator
+
+        path = str(Path(config_path).resolve())
+        try:
+            stat = os.stat(path)
+            key = (path, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            key = None
+
+        with self._lock:
+            cached = self._loaded.get(key) if key is not None else None
+            if cached is not None:
+                self._loaded.move_to_end(key)
+        # A config is also reloaded when one of its question banks changed
+        if cached is not None and not cached[2].includes_changed():
+            return cached
+
+        try:
+            loaded_config = LoadedConfig.from_file(path)
+        except (ValueError, FileNotFoundError) as e:
+            return [str(e)], [], None
+        validator = ConfigValidator()
+        if not validator.validate_loaded(loaded_config):
+            return validator.get_errors(), validator.get_warnings(), None
+        loaded = ([], validator.get_warnings(), loaded_config)
+
+        if key is not None:
+            with self._lock:
+                self._loaded[key] = loaded
+                while len(self._loaded) > MAX_LOADED_CONFIGS:
+                    self._loaded.popitem(last=False)
+        return loaded
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"ok": False, "error": f"Invalid request: {e}"}
+        else:
+            if request.get("action") == "shutdown":
+                response = {"ok": True}
+            else:
+                response = self.server.service.handle(request)
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+        if response.get("ok") and request.get("action") == "shutdown":
+            # shutdown() blocks until serve_forever returns, so call it elsewhere
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class GeneratorDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves GeneratorService requests on a Unix domain socket, one thread per connection."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: Optional[GeneratorService] = None):
+        self.socket_path = socket_path
+        self.service = service or GeneratorService()
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_bind(self):
+        # Only the owner may talk to the daemon, it reads and writes their
+        # files. The socket is created with these permissions, a chmod after
+        # bind would leave a window where others can connect
+        previous = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(previous)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(socket_path: str):
+    """Remove a socket file left behind by a daemon that is no longer running."""
+    if not os.path.exists(socket_path):
+        return
+    try:
+        send_request({"action": "ping"}, socket_path, timeout=CONNECT_TIMEOUT)
+    except DaemonError:
+        os.remove(socket_path)
+        return
+    raise DaemonError(f"A generator daemon is already running at {socket_path}")
+
+
+def serve(socket_path: Optional[str] = None, ready: Optional[threading.Event] = None):
+    """Run the generator daemon until it receives a shutdown request or is interrupted."""
+    socket_path = socket_path or default_socket_path()
+    # The daemon's process only serves builds
+    allow_gc_pauses()
+    service = GeneratorService()
+    service.warm()
+    with GeneratorDaemon(socket_path, service) as server:
+        if ready is not None:
+            ready.set()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
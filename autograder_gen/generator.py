@@ -3,104 +3,757 @@ Autograder generator for creating Gradescope autograder.zip files.
 Uses Jinja2 templates and gradescope-utils for proper test generation.
 """
 
-import os
-import shutil
+import hashlib
+import json
+import time
 import zipfile
-from typing import Optional, List, Dict, Any
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 import yaml
 import re
-from types import SimpleNamespace
 from pathlib import Path
 
 from io import BytesIO
-from docx import Document
-from docx.shared import Pt
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from autograder_gen.config import AutograderConfig
+from autograder_gen.cache import PackageCache
+from autograder_gen.config import AutograderConfig, LoadedConfig, resolve_data_file
+from autograder_gen.package import (
+    COMPRESSION_METHODS,
+    DEFAULT_COMPRESSION,
+    HashingWriter,
+    PackageEntry,
+    PackageWriter,
+    read_compressed_entry,
+    write_checksum_file,
+)
+from autograder_gen.render_model import RenderQuestion, build_render_model
+from autograder_gen.templating import TEMPLATES_DIR, get_jinja_env, template_digest
+from autograder_gen.utils import (
+    atomic_open,
+    atomic_write_bytes,
+    available_cpus,
+    build_digest,
+    process_pool_context,
+)
+from autograder_gen.variants import expand_variants
+
+# Build manifest written next to autograder.zip by incremental generation
+MANIFEST_FILENAME = "autograder.manifest.json"
+
+# Human readable visibility settings used in README.md
+VISIBILITY_LABELS = {
+    "hidden": "Hidden from students",
+    "visible": "Visible to students immediately",
+    "after_due_date": "Visible after due date",
+    "after_published": "Visible after grades published",
+}
+
+
+def _digest(*parts: Any) -> str:
+    """Hash JSON-serializable build inputs into a stable hex digest."""
+    # Hashed chunk by chunk, so large inputs are never encoded in one piece
+    sha256 = hashlib.sha256()
+    for chunk in json.JSONEncoder(sort_keys=True, default=str).iterencode(parts):
+        sha256.update(chunk.encode("utf-8"))
+    return sha256.hexdigest()
+
+
+# A rendered package file: its text (or bytes), or a stream of text or byte chunks
+RenderedContent = Union[str, bytes, Iterable[str], Iterable[bytes]]
+
+# Size of the chunks data files are streamed into the package in
+DATA_CHUNK_SIZE = 1024 * 1024
+
+# Rendered files shared by several variants kept in memory at once, in bytes
+MAX_RENDER_MEMO_BYTES = 64 * 1024 * 1024
+
+
+def _read_data_file(path: Path) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(DATA_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _file_digest(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    for chunk in _read_data_file(path):
+        sha256.update(chunk)
+    return sha256.hexdigest()
+
+# Generator owned by each render worker process, set up once by the pool initializer
+_worker_generator: Optional["AutograderGenerator"] = None
+
+
+def _init_render_worker(config: AutograderConfig):
+    global _worker_generator
+    _worker_generator = AutograderGenerator(config)
+
+
+def _render_question_in_worker(question_number: int) -> str:
+    assert _worker_generator is not None, "render worker was not initialized"
+    question = _worker_generator.render_model.questions[question_number - 1]
+    return _worker_generator._generate_question_test_file(question)
+
+
+MemoKey = Tuple[str, str]
+
+
+class RenderMemo:
+    """Package files rendered once for all the variants of a config that share them.
+
+    Only files whose inputs are the same in several variants are kept, each
+    until the last variant using it has been built, and no more than
+    max_bytes of them at once. Other files are streamed as usual.
+    """
+
+    def __init__(
+        self, uses: Dict[MemoKey, int], max_bytes: int = MAX_RENDER_MEMO_BYTES
+    ):
+        # Variants still to be built that need each shared file
+        self._uses = {key: count for key, count in uses.items() if count > 1}
+        self._files: Dict[MemoKey, Union[str, bytes]] = {}
+        self._size = 0
+        self.max_bytes = max_bytes
+
+    def __contains__(self, key: MemoKey) -> bool:
+        return key in self._files
+
+    def __getitem__(self, key: MemoKey) -> Union[str, bytes]:
+        return self._files[key]
+
+    def wants(self, key: MemoKey) -> bool:
+        """Whether a freshly rendered file should be kept for later variants."""
+        return self._uses.get(key, 0) > 1
+
+    def put(self, key: MemoKey, content: Union[str, bytes]):
+        size = len(content)
+        if self._size + size <= self.max_bytes:
+            self._files[key] = content
+            self._size += size
+
+    def release(self, keys: Iterable[MemoKey]):
+        """Record that a variant using these files was built, dropping unneeded ones."""
+        for key in keys:
+            if key not in self._uses:
+                continue
+            self._uses[key] -= 1
+            if self._uses[key] == 0:
+                del self._uses[key]
+                if key in self._files:
+                    self._size -= len(self._files.pop(key))
 
 
 class AutograderGenerator:
     """Generates Gradescope autograder packages from configuration using Jinja templates."""
 
     def __init__(
-        self, config: AutograderConfig, original_config_dict: Optional[dict] = None
+        self,
+        config: Union[AutograderConfig, LoadedConfig],
+        original_config_dict: Optional[dict] = None,
+        jobs: int = 1,
+        reproducible: bool = False,
+        compression: str = DEFAULT_COMPRESSION,
+        compresslevel: Optional[int] = None,
+        render_memo: Optional[RenderMemo] = None,
+        data_dir: Optional[str] = None,
+        data_roots: Optional[List[str]] = None,
     ):
+        # A loaded config brings its parsed data, and the file's raw bytes,
+        # which are packaged verbatim instead of being dumped again
+        self.original_config_bytes: Optional[bytes] = None
+        self.config_digest: Optional[str] = None
+        if isinstance(config, LoadedConfig):
+            model = config.model
+            if original_config_dict is None:
+                original_config_dict = config.resolved_data
+            # A config with question banks is packaged with the bank questions
+            # filled in, so the package doesn't depend on the bank files
+            if not config.includes:
+                self.original_config_bytes = config.raw
+            self.config_digest = config.digest
+            if data_dir is None:
+                data_dir = config.base_dir
+                data_roots = config.data_roots
+            config = model
+
         self.config = config
         self.original_config_dict = (
             original_config_dict  # Store the original JSON config
         )
-        self.temp_dir: Optional[Path] = None
-        self.templates_dir = Path(__file__).parent / "templates"
-
-        # Set up Jinja environment
-        self.jinja_env = Environment(
-            loader=FileSystemLoader(str(self.templates_dir)),
-            autoescape=select_autoescape(["html", "xml"]),
-            trim_blocks=True,
-            lstrip_blocks=True,
-        )
+        # Number of processes used to render question files (0 = all available CPUs)
+        self.jobs = jobs if jobs > 0 else available_cpus()
+        # Byte-for-byte identical output for identical configs (sorted entries,
+        # fixed timestamps, sorted YAML keys) plus a .sha256 file next to the zip
+        self.reproducible = reproducible
+        # Zip compression strategy for every archive: stored, deflate or lzma
+        if compression not in COMPRESSION_METHODS:
+            raise ValueError(
+                f"compression must be one of: {', '.join(COMPRESSION_METHODS)}"
+            )
+        self.compression = compression
+        self.compresslevel = compresslevel
+        # Rendered package files shared between generators (e.g. the variants
+        # of one config), keyed by file name and input digest
+        self.render_memo = render_memo
+        # Directory expected input/output files are resolved against; None
+        # when the config doesn't come from a file and can't reference any
+        self.data_dir = data_dir
+        # Directories data files must be in, data_dir when None
+        self.data_roots = data_roots
+        self._data_digests: Optional[Dict[str, str]] = None
+        # Precomputed view of the config shared by every artifact
+        self.render_model = build_render_model(config)
+        self.templates_dir = TEMPLATES_DIR
+
+    @property
+    def jinja_env(self):
+        """Shared Jinja environment, so templates are compiled once per process.
+
+        Looked up when a file is rendered, so Jinja isn't even imported by
+        runs that don't render anything.
+        """
+        return get_jinja_env()
 
     def generate(self, output_dir: str) -> str:
         """Generate the autograder.zip file using Jinja templates."""
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
 
-        # Create temporary directory for autograder files
-        self.temp_dir = output_path / "temp_autograder"
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-        self.temp_dir.mkdir()
+        zip_path = output_path / "autograder.zip"
+        self._write_package(zip_path)
+        return str(zip_path)
+
+    def generate_all(
+        self,
+        output_dir: str,
+        with_description: bool = False,
+        with_skeletons: bool = False,
+        incremental: bool = False,
+        cache: Optional[PackageCache] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Generate autograder.zip and the requested extra artifacts concurrently.
+
+        Every artifact is built from this generator's render model in its own
+        thread and renamed into output_dir once complete. With a package
+        cache, artifacts built before for the same config are reused.
+        Returns, per artifact name, its path, build time in seconds and
+        whether it came from the cache (plus the rebuilt files when
+        incremental, and the SHA-256 when reproducible).
+        """
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        cache_key = self.cache_key(cache) if cache is not None else None
+
+        builders: Dict[str, Callable[[], bytes]] = {
+            "autograder.zip": self.generate_to_bytes
+        }
+        if with_description:
+            builders["description.docx"] = (
+                lambda: self.generate_description_docx().getvalue()
+            )
+        if with_skeletons:
+            builders["correct_answer.zip"] = (
+                lambda: self.generate_correct_answer_zip().getvalue()
+            )
+            builders["wrong_answer.zip"] = (
+                lambda: self.generate_wrong_answer_zip().getvalue()
+            )
+
+        def produce(name: str, build: Callable[[], bytes]) -> Dict[str, Any]:
+            started = time.perf_counter()
+            path = output_path / name
+            result: Dict[str, Any] = {"path": str(path), "cached": False}
+
+            if name == "autograder.zip" and incremental:
+                result["path"], result["rebuilt"], digest = (
+                    self._write_incremental_package(output_dir)
+                )
+                if self.reproducible:
+                    result["sha256"] = digest
+            elif name == "autograder.zip" and cache is None:
+                digest = self._write_package(path)
+                if digest is not None:
+                    result["sha256"] = digest
+            else:
+                if cache is not None:
+                    data, result["cached"] = cache.get_or_build(cache_key, name, build)
+                else:
+                    data = build()
+                atomic_write_bytes(path, data)
+                if name == "autograder.zip" and self.reproducible:
+                    result["sha256"] = write_checksum_file(path, data)
+
+            result["seconds"] = time.perf_counter() - started
+            return result
+
+        with ThreadPoolExecutor(max_workers=len(builders)) as pool:
+            futures = {
+                name: pool.submit(produce, name, build) for name, build in builders.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def generate_variants(
+        self,
+        output_dir: str,
+        with_description: bool = False,
+        with_skeletons: bool = False,
+        incremental: bool = False,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Generate every variant of a config that has a `variants` section.
+
+        Each variant is written to output_dir/<variant name> and
+        output_dir/variants.json records the parameters of every variant.
+        Package files whose inputs are the same in several variants are
+        rendered once, and the skeleton zips, which don't depend on variant
+        parameters, are built once. Returns, per variant name, its
+        parameters and its generate_all() results.
+        """
+        if self.config.variants is None:
+            raise ValueError("The configuration has no variants section")
+
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        config_dict = self.original_config_dict or self.config.model_dump(mode="json")
+        skeletons: Dict[str, bytes] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+
+        variants = [
+            (
+                name,
+                parameters,
+                AutograderGenerator(
+                    AutograderConfig.model_validate(variant_dict),
+                    variant_dict,
+                    jobs=self.jobs,
+                    reproducible=self.reproducible,
+                    compression=self.compression,
+                    compresslevel=self.compresslevel,
+                    data_dir=self.data_dir,
+                    data_roots=self.data_roots,
+                ),
+            )
+            for name, parameters, variant_dict in expand_variants(config_dict)
+        ]
+        # Package files each variant needs, to find the ones they share
+        variant_files = [
+            [(entry.arcname, entry.inputs) for entry in generator._package_entries()]
+            for _, _, generator in variants
+        ]
+        render_memo = RenderMemo(Counter(key for keys in variant_files for key in keys))
+
+        for (name, parameters, generator), files in zip(variants, variant_files):
+            generator.render_memo = render_memo
+            variant_dir = output_path / name
+            artifacts = generator.generate_all(
+                str(variant_dir),
+                with_description=with_description,
+                incremental=incremental,
+            )
+
+            if with_skeletons:
+                started = time.perf_counter()
+                if not skeletons:
+                    skeletons = {
+                        "correct_answer.zip": generator.generate_correct_answer_zip().getvalue(),
+                        "wrong_answer.zip": generator.generate_wrong_answer_zip().getvalue(),
+                    }
+                for artifact, data in skeletons.items():
+                    atomic_write_bytes(variant_dir / artifact, data)
+                    artifacts[artifact] = {
+                        "path": str(variant_dir / artifact),
+                        "cached": False,
+                        "seconds": time.perf_counter() - started,
+                    }
+
+            results[name] = {"parameters": parameters, "artifacts": artifacts}
+            render_memo.release(files)
+
+        manifest = {name: result["parameters"] for name, result in results.items()}
+        atomic_write_bytes(
+            output_path / "variants.json",
+            json.dumps(manifest, indent=2, default=str).encode("utf-8"),
+        )
+        return results
+
+    def cache_key(self, cache: PackageCache) -> str:
+        """Key of this generator's artifacts in a package cache."""
+        return cache.make_key(
+            self.config,
+            self.original_config_dict,
+            content_digest=self.config_digest,
+            reproducible=self.reproducible,
+            compression=self.compression,
+            compresslevel=self.compresslevel,
+            data_files=self.data_file_digests(),
+        )
+
+    def data_file_digests(self) -> Dict[str, str]:
+        """SHA-256 of every data file in the package, by name inside the package.
+
+        Files are hashed once per generator, as they are streamed, never
+        loaded whole.
+        """
+        if self._data_digests is None:
+            self._data_digests = {
+                arcname: _file_digest(path) for arcname, path in self._data_files().items()
+            }
+        return self._data_digests
+
+    def _data_files(self) -> Dict[str, Path]:
+        """Source path of every data file in the package, by name inside the package."""
+        files = {}
+        for question in self.render_model.questions:
+            for item in question.marking_items:
+                for name, arcname in (
+                    (item.expected_input_file, item.expected_input_data),
+                    (item.expected_output_file, item.expected_output_data),
+                ):
+                    if arcname:
+                        files[arcname] = resolve_data_file(
+                            self.data_dir, name, self.data_roots
+                        )
+        return files
+
+    def generate_to_bytes(self) -> bytes:
+        """Generate the autograder package and return the zip archive bytes."""
+        buffer = BytesIO()
+        self.generate_to_stream(buffer)
+        return buffer.getvalue()
+
+    def generate_to_stream(self, fileobj: BinaryIO):
+        """Write the autograder package as a zip archive into a binary file object.
+
+        Files are rendered one at a time, as template output chunks, straight
+        into their zip entries, so only one rendered file is in memory at once.
+        """
+        entries = self._package_entries()
+        with self._package_writer(fileobj) as writer:
+            for entry, content in zip(entries, self._render_entries(entries)):
+                writer.add_file(entry.arcname, content, entry.executable)
+
+    def _write_package(self, zip_path: Path) -> Optional[str]:
+        """Stream the package into zip_path and return its SHA-256 when reproducible.
+
+        The archive is written to a temporary file that is renamed into place
+        once complete, so a failed render or a concurrent build never leaves
+        a truncated zip behind.
+        """
+        with atomic_open(zip_path) as f:
+            hashing = HashingWriter(f)
+            self.generate_to_stream(hashing)
+        if not self.reproducible:
+            return None
+        return write_checksum_file(zip_path, digest=hashing.hexdigest())
+
+    def generate_incremental(self, output_dir: str) -> Tuple[str, List[str]]:
+        """Regenerate autograder.zip, re-rendering only files whose inputs changed.
+
+        A manifest of input digests per packaged file is kept next to the zip.
+        Files whose digest matches the previous build are copied from the
+        existing zip as they are, without decompressing them. Returns the zip
+        path and the list of rebuilt files.
+        """
+        zip_path, rebuilt, _ = self._write_incremental_package(output_dir)
+        return zip_path, rebuilt
+
+    def _write_incremental_package(self, output_dir: str) -> Tuple[str, List[str], str]:
+        """generate_incremental(), also returning the SHA-256 of the zip."""
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        zip_path = output_path / "autograder.zip"
+        manifest_path = output_path / MANIFEST_FILENAME
+
+        previous_inputs, previous_zip = self._load_previous_build(manifest_path, zip_path)
+        entries = self._package_entries()
+
+        stale = [
+            entry
+            for entry in entries
+            if previous_inputs.get(entry.arcname) != entry.inputs
+        ]
+        rebuilt = [entry.arcname for entry in stale]
+        # Rendered lazily, in the same order as the stale entries are written
+        rendered = self._render_entries(stale)
+        stale_names = set(rebuilt)
+
+        with atomic_open(zip_path) as f:
+            # Closed before the new zip replaces it, which Windows requires
+            try:
+                hashing = HashingWriter(f)
+                with self._package_writer(hashing) as writer:
+                    for entry in entries:
+                        if entry.arcname in stale_names:
+                            writer.add_file(entry.arcname, next(rendered), entry.executable)
+                        else:
+                            writer.add_compressed(
+                                entry.arcname,
+                                read_compressed_entry(previous_zip, entry.arcname),
+                                entry.executable,
+                            )
+            finally:
+                if previous_zip is not None:
+                    previous_zip.close()
+
+        digest = hashing.hexdigest()
+        if self.reproducible:
+            write_checksum_file(zip_path, digest=digest)
+        manifest = {
+            "generator_build": build_digest(),
+            # Ties the manifest to this exact zip, in case another build
+            # replaces one of the two files in between
+            "package_sha256": digest,
+            # Unchanged files are copied compressed, so they are only reused
+            # with the same compression
+            "compression": [self.compression, self.compresslevel],
+            "files": {entry.arcname: entry.inputs for entry in entries},
+        }
+        atomic_write_bytes(manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+        return str(zip_path), rebuilt, digest
+
+    def _package_writer(self, fileobj: BinaryIO) -> PackageWriter:
+        return PackageWriter(
+            fileobj,
+            self.reproducible,
+            compression=self.compression,
+            compresslevel=self.compresslevel,
+        )
 
-        # Create source directory within temp
-        tests_dir = self.temp_dir / "tests"
-        tests_dir.mkdir()
+    def _load_previous_build(
+        self, manifest_path: Path, zip_path: Path
+    ) -> Tuple[Dict[str, str], Optional[zipfile.ZipFile]]:
+        """Load input digests from a previous build and open its zip.
 
+        Returns ({}, None) if the previous build can't be reused. The zip is
+        checked against the manifest by streaming over the open file, and
+        entries are then copied from that same file, so memory use doesn't
+        depend on the size of the package. The caller closes the zip.
+        """
         try:
-            # Generate all autograder files using templates
-            self._generate_setup_sh()
-            self._generate_run_autograder()
-            self._generate_run_tests(tests_dir)
-            self._generate_requirements_txt()
-            self._generate_metadata_files()
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (ValueError, OSError):
+            return {}, None
+        if manifest.get("generator_build") != build_digest():
+            return {}, None
+        if manifest.get("compression") != [self.compression, self.compresslevel]:
+            return {}, None
 
-            # Create the zip file
-            zip_path = output_path / "autograder.zip"
-            self._create_zip(zip_path)
+        try:
+            zipf = zipfile.ZipFile(zip_path, "r")
+        except (OSError, zipfile.BadZipFile):
+            return {}, None
+        try:
+            sha256 = hashlib.sha256()
+            zipf.fp.seek(0)
+            for chunk in iter(lambda: zipf.fp.read(DATA_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        except OSError:
+            zipf.close()
+            return {}, None
+        if manifest.get("package_sha256") != sha256.hexdigest():
+            zipf.close()
+            return {}, None
+
+        # Only trust digests for files that are actually present in the zip
+        names = set(zipf.namelist())
+        inputs = {
+            name: digest
+            for name, digest in manifest.get("files", {}).items()
+            if name in names
+        }
+        return inputs, zipf
+
+    def _render_entries(self, entries: List[PackageEntry]) -> Iterator[RenderedContent]:
+        """Lazily render entries in order, reusing files already in the render memo."""
+        if self.render_memo is None:
+            yield from self._render_entries_uncached(entries)
+            return
+
+        memo = self.render_memo
+        missing = [entry for entry in entries if (entry.arcname, entry.inputs) not in memo]
+        rendered = self._render_entries_uncached(missing)
+        missing_names = {entry.arcname for entry in missing}
+        for entry in entries:
+            key = (entry.arcname, entry.inputs)
+            if entry.arcname not in missing_names:
+                yield memo[key]
+                continue
+            content = next(rendered)
+            if memo.wants(key):
+                # Streamed content can only be consumed once, so keep it whole
+                if not isinstance(content, (str, bytes)):
+                    chunks = list(content)
+                    binary = bool(chunks) and isinstance(chunks[0], bytes)
+                    content = b"".join(chunks) if binary else "".join(chunks)
+                memo.put(key, content)
+            yield content
+
+    def _render_entries_uncached(
+        self, entries: List[PackageEntry]
+    ) -> Iterator[RenderedContent]:
+        """Lazily render entries in order, fanning question files out to a process pool.
+
+        In-process renders are yielded as template output chunks, so nothing
+        is rendered before the caller asks for it.
+        """
+        question_numbers = [
+            entry.question_number for entry in entries if entry.question_number
+        ]
+        workers = min(self.jobs, len(question_numbers))
+        if workers <= 1:
+            for entry in entries:
+                yield entry.render()
+            return
+
+        # Workers receive the config once through the initializer and then only
+        # question numbers; map() keeps results in submission order. They
+        # aren't forked, since other artifacts (or daemon requests) are being
+        # built in other threads meanwhile
+        chunksize = max(1, len(question_numbers) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=process_pool_context(),
+            initializer=_init_render_worker,
+            initargs=(self.config,),
+        ) as pool:
+            rendered = pool.map(
+                _render_question_in_worker, question_numbers, chunksize=chunksize
+            )
+            for entry in entries:
+                yield next(rendered) if entry.question_number else entry.render()
+
+    def _package_entries(self) -> List[PackageEntry]:
+        """List the files of the autograder package with their input digests."""
+        settings = self.config.model_dump(mode="json", exclude={"questions"})
+        settings_digest = _digest(settings)
+
+        entries = [
+            PackageEntry(
+                "setup.sh",
+                self._generate_setup_sh,
+                _digest(settings_digest, template_digest("setup.sh.j2")),
+                executable=True,
+            ),
+            PackageEntry(
+                "run_autograder",
+                self._generate_run_autograder,
+                _digest(settings_digest, template_digest("run_autograder.j2")),
+                executable=True,
+            ),
+            PackageEntry(
+                "run_tests.py",
+                self._generate_run_tests,
+                _digest(settings_digest, template_digest("run_tests.py.j2")),
+            ),
+        ]
+
+        # Each question file depends only on its own slice of the config
+        question_templates = template_digest("test_question.py.j2", "subtemplates/*.j2")
+        question_digests = []
+        for question, render_question in zip(
+            self.config.questions, self.render_model.questions
+        ):
+            idx = render_question.number
+            # Dumped one question at a time, never the whole config at once
+            question_digest = _digest(question.model_dump(mode="json"))
+            question_digests.append(question_digest)
+            entries.append(
+                PackageEntry(
+                    f"tests/question_{idx}_test.py",
+                    partial(self._stream_question_test_file, render_question),
+                    _digest(settings_digest, question_templates, idx, question_digest),
+                    question_number=idx,
+                )
+            )
 
-            return str(zip_path)
+        # Large expected inputs/outputs are packaged as they are and read by
+        # the tests at run time
+        data_digests = self.data_file_digests()
+        for arcname, path in self._data_files().items():
+            entries.append(
+                PackageEntry(
+                    arcname,
+                    partial(_read_data_file, path),
+                    _digest("data", data_digests[arcname]),
+                )
+            )
 
-        finally:
-            # Clean up temporary directory
-            if self.temp_dir and self.temp_dir.exists():
-                shutil.rmtree(self.temp_dir)
+        entries.append(
+            PackageEntry(
+                "requirements.txt",
+                self._generate_requirements_txt,
+                _digest(settings_digest, template_digest("requirements.txt.j2")),
+            )
+        )
+
+        # Save the original configuration if provided
+        if self.original_config_bytes is not None:
+            entries.append(
+                PackageEntry(
+                    "autograder_config.yaml",
+                    self._copy_config_file,
+                    _digest("raw", self.config_digest),
+                )
+            )
+        elif self.original_config_dict:
+            entries.append(
+                PackageEntry(
+                    "autograder_config.yaml",
+                    self._generate_config_yaml,
+                    _digest(self.original_config_dict, self.reproducible),
+                )
+            )
+
+        entries.append(
+            PackageEntry(
+                "README.md",
+                self._generate_readme,
+                _digest(
+                    settings_digest, question_digests, template_digest("README.md.j2")
+                ),
+            )
+        )
+
+        if self.reproducible:
+            entries.sort(key=lambda entry: entry.arcname)
+        return entries
 
     def generate_description_docx(self) -> BytesIO:
         """Generate a Word document containing the assessment description."""
+        # python-docx (and lxml) take long to import and are only needed here
+        from docx import Document
+
         doc = Document()
         doc.add_heading("Assessment Description", 0)
 
-        for i, question in enumerate(self.config.questions, 1):
-            doc.add_heading(f"Question {i}: {question.name}", level=1)
-            if hasattr(question, "description") and question.description:
+        for question in self.render_model.questions:
+            doc.add_heading(f"Question {question.number}: {question.name}", level=1)
+            if question.description:
                 doc.add_paragraph(question.description)
 
-            # Calculate question total points (excluding hidden file checks)
-            question_points = sum(
-                item.total_mark
-                for item in question.marking_items
-                if item.type != "file_exists"
-            )
+            # Question total points (excluding hidden file checks)
             p = doc.add_paragraph()
-            run = p.add_run(f"Total Points: {question_points}")
+            run = p.add_run(f"Total Points: {question.visible_points}")
             run.bold = True
 
             doc.add_heading("Marking Items", level=2)
-            visible_item_idx = 1
-            for item in question.marking_items:
-                if item.type == "file_exists":
-                    continue
-
-                item_name = getattr(item, "name", "") or f"Marking Item {visible_item_idx}"
+            for visible_item_idx, item in enumerate(question.visible_items, 1):
+                item_name = item.name or f"Marking Item {visible_item_idx}"
                 doc.add_heading(f"{visible_item_idx}. {item_name}", level=3)
                 doc.add_paragraph(f"Points: {item.total_mark}")
                 
@@ -121,8 +774,6 @@ class AutograderGenerator:
                     doc.add_paragraph(f"Requirement: Function '{item.function_name}' in '{item.target_file}' must have correct signature.")
                 elif item.type == "function_test":
                     doc.add_paragraph(f"Requirement: Function '{item.function_name}' in '{item.target_file}' must pass unit tests.")
-                
-                visible_item_idx += 1
 
         buffer = BytesIO()
         doc.save(buffer)
@@ -132,37 +783,38 @@ class AutograderGenerator:
     def generate_correct_answer_zip(self) -> BytesIO:
         """Generate a ZIP file with correct implementation skeletons."""
         buffer = BytesIO()
-        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for filename in self.config.files_necessary:
+        with self._package_writer(buffer) as writer:
+            for filename in self._skeleton_files():
                 content = self._generate_skeleton_content(filename, correct=True)
-                zipf.writestr(filename, content)
+                writer.add_file(filename, content)
         buffer.seek(0)
         return buffer
 
     def generate_wrong_answer_zip(self) -> BytesIO:
         """Generate a ZIP file with incorrect implementation skeletons."""
         buffer = BytesIO()
-        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for filename in self.config.files_necessary:
+        with self._package_writer(buffer) as writer:
+            for filename in self._skeleton_files():
                 content = self._generate_skeleton_content(filename, correct=False)
-                zipf.writestr(filename, content)
+                writer.add_file(filename, content)
         buffer.seek(0)
         return buffer
 
+    def _skeleton_files(self) -> List[str]:
+        """Files included in the skeleton zips, sorted in reproducible mode."""
+        if self.reproducible:
+            return sorted(self.config.files_necessary)
+        return list(self.config.files_necessary)
+
     def _generate_skeleton_content(self, target_file: str, correct: bool = True) -> str:
         """Generate skeleton code for a given file."""
         if self.config.language == "python":
             lines = ["# Skeleton for " + target_file, ""]
             
-            # Find all functions related to this file
-            functions = set()
-            for q in self.config.questions:
-                for item in q.marking_items:
-                    if item.target_file == target_file:
-                        if hasattr(item, "function_name") and item.function_name:
-                            functions.add(item.function_name)
+            # Functions related to this file, sorted by name
+            functions = self.render_model.functions_by_file.get(target_file, ())
             
-            for func in sorted(functions):
+            for func in functions:
                 lines.append(f"def {func}(*args, **kwargs):")
                 if correct:
                     lines.append("    # TODO: Implement correct logic")
@@ -184,14 +836,9 @@ class AutograderGenerator:
             class_name = target_file.replace(".java", "")
             lines = [f"public class {class_name} {{", ""]
             
-            functions = set()
-            for q in self.config.questions:
-                for item in q.marking_items:
-                    if item.target_file == target_file:
-                        if hasattr(item, "function_name") and item.function_name:
-                            functions.add(item.function_name)
+            functions = self.render_model.functions_by_file.get(target_file, ())
             
-            for func in sorted(functions):
+            for func in functions:
                 lines.append(f"    public static Object {func}(Object... args) {{")
                 if correct:
                     lines.append("        // TODO: Implement correct logic")
@@ -207,100 +854,31 @@ class AutograderGenerator:
 
         return "# Skeleton for " + target_file
 
-    def _generate_setup_sh(self):
+    def _generate_setup_sh(self) -> str:
         """Generate setup.sh using Jinja template."""
-        assert self.temp_dir is not None, "temp_dir must be set before generating files"
-
         template = self.jinja_env.get_template("setup.sh.j2")
-        content = template.render(config=self.config)
-
-        setup_file = self.temp_dir / "setup.sh"
-        with open(setup_file, "w", encoding="utf-8") as f:
-            f.write(content)
+        return template.render(config=self.config)
 
-        # Make setup.sh executable
-        os.chmod(setup_file, 0o755)
-
-    def _generate_run_autograder(self):
+    def _generate_run_autograder(self) -> str:
         """Generate run_autograder using Jinja template."""
-        assert self.temp_dir is not None, "temp_dir must be set before generating files"
         template = self.jinja_env.get_template("run_autograder.j2")
-        content = template.render(config=self.config)
-
-        run_autograder_file = self.temp_dir / "run_autograder"
-        with open(run_autograder_file, "w", encoding="utf-8") as f:
-            f.write(content)
+        return template.render(config=self.config)
 
-        # Make run_autograder executable
-        os.chmod(run_autograder_file, 0o755)
-
-    def _generate_run_tests(self, tests_dir: Path):
-        """Generate modular test files: main run_tests.py and individual question test files."""
-        # Generate main test runner
-        assert self.temp_dir is not None, "temp_dir must be set before generating files"
+    def _generate_run_tests(self) -> str:
+        """Generate the main run_tests.py test runner."""
         template = self.jinja_env.get_template("run_tests.py.j2")
-        content = template.render(config=self.config)
-
-        run_tests_file = self.temp_dir / "run_tests.py"
-        with open(run_tests_file, "w", encoding="utf-8") as f:
-            f.write(content)
+        return template.render(config=self.config)
 
-        # Generate individual question test files
-        self._generate_question_test_files(tests_dir)
+    def _generate_question_test_file(self, question: RenderQuestion) -> str:
+        """Generate the test file for a single question."""
+        return "".join(self._stream_question_test_file(question))
 
-    def _generate_question_test_files(self, tests_dir: Path):
-        """Generate individual test files for each question."""
+    def _stream_question_test_file(self, question: RenderQuestion) -> Iterator[str]:
+        """Generate the test file for a single question, as a stream of chunks."""
         question_template = self.jinja_env.get_template("test_question.py.j2")
-
-        for idx, question in enumerate(self.config.questions, 1):
-            # Use question number for filename
-            question_filename = f"question_{idx}"
-
-            # Preprocess marking items to ensure output comparison tests have proper newlines
-            processed_question = self._preprocess_question_for_output_comparison(
-                question
-            )
-
-            # Generate content for this question
-            content = question_template.render(
-                config=self.config, question=processed_question, question_number=idx
-            )
-
-            # Write the question test file
-            test_file = tests_dir / f"{question_filename}_test.py"
-            with open(test_file, "w", encoding="utf-8") as f:
-                f.write(content)
-
-    def _preprocess_question_for_output_comparison(self, question):
-        """Preprocess question to add newlines to expected output for output comparison tests."""
-        # Create a copy of the question with processed marking items
-
-        processed_question = SimpleNamespace()
-        processed_question.name = question.name
-        processed_question.marking_items = []
-
-        for item in question.marking_items:
-            processed_item = SimpleNamespace()
-            # Copy all attributes from the original item
-            for attr in dir(item):
-                if not attr.startswith("_") and not attr.startswith("model_"):
-                    setattr(processed_item, attr, getattr(item, attr))
-
-            # For Python output comparison tests, ensure expected_output has a newline if it doesn't end with one
-            # This matches Python's print() behavior which automatically adds newlines
-            if (
-                self.config.language == "python"
-                and hasattr(processed_item, "type")
-                and processed_item.type == "output_comparison"
-                and hasattr(processed_item, "expected_output")
-                and processed_item.expected_output
-                and not processed_item.expected_output.endswith("\n")
-            ):
-                processed_item.expected_output += "\n"
-
-            processed_question.marking_items.append(processed_item)
-
-        return processed_question
+        return question_template.generate(
+            config=self.config, question=question, question_number=question.number
+        )
 
     def _sanitize_filename(self, name: str) -> str:
         """Convert question name to a safe Python module filename."""
@@ -345,189 +923,42 @@ class AutograderGenerator:
 
         return safe_name
 
-    def _generate_requirements_txt(self):
+    def _generate_requirements_txt(self) -> str:
         """Generate requirements.txt using Jinja template."""
-        assert self.temp_dir is not None, "temp_dir must be set before generating files"
-
         template = self.jinja_env.get_template("requirements.txt.j2")
-        content = template.render(config=self.config)
-
-        requirements_file = self.temp_dir / "requirements.txt"
-        with open(requirements_file, "w", encoding="utf-8") as f:
-            f.write(content)
-
-    def _generate_metadata_files(self):
-        """Generate metadata and configuration files."""
-        assert self.temp_dir is not None, "temp_dir must be set before generating files"
-
-        # Save the original configuration if provided
-        if self.original_config_dict:
-            original_config_file = self.temp_dir / "autograder_config.yaml"
-            with open(original_config_file, "w", encoding="utf-8") as f:
-                yaml.dump(
-                    self.original_config_dict,
-                    f,
-                    default_flow_style=False,
-                    sort_keys=False,
-                )
-
-        # Create a README for the autograder
-        readme_content = f"""# Autograder Package
-
-Generated by TIF Autograder Tool
-
-## Configuration Summary
-- **Language**: {self.config.language}
-- **Questions**: {len(self.config.questions)}
-- **Total Marking Items**: {sum(len(q.marking_items) for q in self.config.questions)}
-- **Total Points**: {sum(sum(item.total_mark for item in q.marking_items) for q in self.config.questions)}
-- **Required Files**: {', '.join(self.config.files_necessary) if self.config.files_necessary else 'None specified'}
-
-## Package Structure
-```
-autograder.zip
-├── setup.sh                 # Environment setup script
-├── run_autograder          # Main autograder execution script
-├── run_tests.py            # Primary test runner using gradescope-utils
-├── requirements.txt        # Python dependencies
-├── tests/                  # Individual test files for each question
-│   ├── question_1_test.py
-│   ├── question_2_test.py
-│   └── ...
-├── autograder_config.yaml  # Original configuration file
-└── README.md              # This file
-```
-
-## Test Types Supported
-- **file_exists**: Checks if required files are present in submission
-- **output_comparison**: Compares program output with expected results
-- **signature_check**: Validates function signatures and parameters
-- **function_test**: Tests function behavior with specific inputs and expected outputs
-
-## Global Settings
-- **Global Time Limit**: {getattr(self.config, 'global_time_limit', 'Not set')} seconds
-- **Points Precision**: {getattr(self.config, 'points_precision', 1)} decimal place(s)
-
-## Questions and Marking Items"""
-
-        for i, question in enumerate(self.config.questions, 1):
-            readme_content += f"\n\n### Question {i}: {question.name}\n"
-
-            # Calculate question total points
-            question_points = sum(item.total_mark for item in question.marking_items)
-            readme_content += f"**Total Points**: {question_points}\n\n"
-
-            for j, item in enumerate(question.marking_items, 1):
-                item_name = getattr(item, "name", "") or f"Marking Item {j}"
-                readme_content += f"#### {j}. {item_name}\n"
-                readme_content += f"- **Type**: {item.type.replace('_', ' ').title()}\n"
-                readme_content += f"- **Target File**: {item.target_file}\n"
-                readme_content += f"- **Points**: {item.total_mark}\n"
-
-                # Add time limit if specified
-                if hasattr(item, "time_limit") and item.time_limit:
-                    readme_content += f"- **Time Limit**: {item.time_limit} seconds\n"
-
-                # Add visibility setting
-                if hasattr(item, "visibility") and item.visibility:
-                    visibility_map = {
-                        "hidden": "Hidden from students",
-                        "visible": "Visible to students immediately",
-                        "after_due_date": "Visible after due date",
-                        "after_published": "Visible after grades published",
-                    }
-                    readme_content += f"- **Visibility**: {visibility_map.get(item.visibility, item.visibility)}\n"
-
-                # Add type-specific details
-                if item.type == "function_test":
-                    if hasattr(item, "function_name") and item.function_name:
-                        readme_content += f"- **Function**: `{item.function_name}()`\n"
-                    if hasattr(item, "test_cases") and item.test_cases:
-                        readme_content += (
-                            f"- **Test Cases**: {len(item.test_cases)} case(s)\n"
-                        )
-
-                elif item.type == "signature_check":
-                    if hasattr(item, "function_name") and item.function_name:
-                        readme_content += f"- **Function**: `{item.function_name}()`\n"
-                    if (
-                        hasattr(item, "expected_parameters")
-                        and item.expected_parameters
-                    ):
-                        readme_content += (
-                            f"- **Expected Parameters**: `{item.expected_parameters}`\n"
-                        )
-
-                elif item.type == "output_comparison":
-                    if hasattr(item, "expected_input") and item.expected_input:
-                        input_lines = item.expected_input.count("\n") + 1
-                        readme_content += f"- **Input Lines**: {input_lines}\n"
-                    if hasattr(item, "expected_output") and item.expected_output:
-                        output_lines = item.expected_output.count("\n") + 1
-                        readme_content += (
-                            f"- **Expected Output Lines**: {output_lines}\n"
-                        )
-
-                readme_content += "\n"
-
-        # Add execution information
-        readme_content += f"""
-## Execution Details
-
-### Setup Process
-1. **Environment Setup**: `setup.sh` installs required packages and prepares the testing environment
-2. **Test Execution**: `run_autograder` executes `run_tests.py` which runs all question test files
-3. **Results Collection**: Results are formatted using gradescope-utils and written to `/autograder/results/results.json`
-
-### File Requirements
-Students must submit the following files:
-"""
-
-        if self.config.files_necessary:
-            for file in self.config.files_necessary:
-                readme_content += f"- `{file}`\n"
-        else:
-            readme_content += (
-                "- No specific files required (will be determined by marking items)\n"
-            )
-
-        readme_content += f"""
-### Points Distribution
-"""
-
-        # Create points breakdown by question
-        for i, question in enumerate(self.config.questions, 1):
-            question_points = sum(item.total_mark for item in question.marking_items)
-            readme_content += f"- **Question {i}**: {question_points} points\n"
-
-        total_points = sum(
-            sum(item.total_mark for item in q.marking_items)
-            for q in self.config.questions
+        return template.render(config=self.config)
+
+    def _copy_config_file(self) -> bytes:
+        """The configuration file exactly as it was written."""
+        return self.original_config_bytes
+
+    def _generate_config_yaml(self) -> Iterator[str]:
+        """Dump the original configuration for preservation in the package, as a stream of chunks.
+
+        Each top-level key, and each question, is dumped on its own, which
+        gives the same document as dumping the whole config at once without
+        ever holding all of it as one string.
+        """
+        config = self.original_config_dict
+        for key in sorted(config) if self.reproducible else config:
+            value = config[key]
+            if key != "questions" or not isinstance(value, list) or not value:
+                yield self._dump_yaml({key: value})
+                continue
+            yield self._dump_yaml({key: value[:1]})
+            # Sequences in a block mapping aren't indented, so the remaining
+            # questions dump exactly like items of a top-level list
+            for question in value[1:]:
+                yield self._dump_yaml([question])
+
+    def _dump_yaml(self, data: Any) -> str:
+        return yaml.dump(data, default_flow_style=False, sort_keys=self.reproducible)
+
+    def _generate_readme(self) -> Iterator[str]:
+        """Generate README.md describing the autograder package, as a stream of chunks."""
+        template = self.jinja_env.get_template("README.md.j2")
+        return template.generate(
+            config=self.config,
+            model=self.render_model,
+            visibility_labels=VISIBILITY_LABELS,
         )
-        readme_content += f"- **Total Possible**: {total_points} points\n"
-
-        readme_content += f"""
-## Technical Notes
-
-- Generated using TIF Autograder Tool
-- Uses gradescope-utils for test framework compatibility
-- Supports Python {self.config.language} submissions
-- All tests run in isolated environments with proper timeout handling
-- Results are automatically formatted for Gradescope integration
-
-For questions about this autograder configuration, refer to the original `autograder_config.yaml` file included in this package.
-"""
-
-        readme_file = self.temp_dir / "README.md"
-        with open(readme_file, "w", encoding="utf-8") as f:
-            f.write(readme_content)
-
-    def _create_zip(self, zip_path: Path):
-        """Create the autograder.zip file with proper structure."""
-        assert self.temp_dir is not None, "temp_dir must be set before creating zip"
-
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in self.temp_dir.rglob("*"):
-                if file_path.is_file():
-                    arcname = file_path.relative_to(self.temp_dir)
-                    zipf.write(file_path, arcname)
@@ -0,0 +1,523 @@
+"""
+Zip package writer for autograder artifacts.
+Writes rendered content straight into archive entries without touching disk.
+
+Entries are compressed in a thread pool (zlib and lzma release the GIL) and
+written in the order they were added. The local headers and the central
+directory are assembled here, because zipfile can't store data that was
+compressed elsewhere.
+"""
+
+import hashlib
+import os
+import struct
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Deque,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from autograder_gen.utils import atomic_write_bytes, available_cpus
+
+# Unix file modes stored in the high 16 bits of ZipInfo.external_attr
+REGULAR_FILE_MODE = 0o100644
+EXECUTABLE_FILE_MODE = 0o100755
+
+# Earliest timestamp representable in a zip entry
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# ZipInfo.create_system value for Unix, so permissions are read the same everywhere
+CREATE_SYSTEM_UNIX = 3
+
+# Compression strategies accepted by PackageWriter
+COMPRESSION_METHODS = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "lzma": zipfile.ZIP_LZMA,
+}
+DEFAULT_COMPRESSION = "deflate"
+
+# Entries smaller than this are stored, compressing them saves next to nothing
+MIN_COMPRESS_SIZE = 256
+
+# Entries smaller than this are compressed inline, a thread hand-off costs more
+MIN_PARALLEL_SIZE = 64 * 1024
+
+# Compressed entries kept in flight before the oldest one is written out
+MAX_PENDING_ENTRIES = 64
+
+# Blocks of a streamed entry waiting to be compressed before rendering pauses
+MAX_PENDING_BLOCKS = 16
+
+_ZIP_VERSION = 20
+_ZIP_LZMA_VERSION = 63
+_ZIP64_VERSION = 45
+_ZIP_MAX_COUNT = 0xFFFF
+_ZIP_MAX_SIZE = 0xFFFFFFFF
+_FLAG_LZMA_EOS = 0x02
+_FLAG_UTF8 = 0x800
+
+
+def reproducible_date_time() -> Tuple[int, int, int, int, int, int]:
+    """Fixed entry timestamp for reproducible builds, honouring SOURCE_DATE_EPOCH."""
+    source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if not source_date_epoch:
+        return ZIP_EPOCH
+    date_time = time.gmtime(int(source_date_epoch))[:6]
+    return max(date_time, ZIP_EPOCH)
+
+
+def write_checksum_file(
+    path: Path, data: Optional[bytes] = None, digest: Optional[str] = None
+) -> str:
+    """Write <path>.sha256 in sha256sum format and return the hex digest.
+
+    Pass the bytes that were written to path, or their digest, to avoid
+    reading the file back, which could pick up another writer's file.
+    """
+    if digest is None:
+        if data is None:
+            data = Path(path).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+    line = f"{digest}  {Path(path).name}\n"
+    atomic_write_bytes(Path(str(path) + ".sha256"), line.encode("utf-8"))
+    return digest
+
+
+class HashingWriter:
+    """Binary file wrapper that computes the SHA-256 of everything written through it."""
+
+    def __init__(self, fileobj: BinaryIO):
+        self.fileobj = fileobj
+        self._sha256 = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self._sha256.update(data)
+        return self.fileobj.write(data)
+
+    def tell(self) -> int:
+        return self.fileobj.tell()
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+
+class PackageEntry(NamedTuple):
+    """A file of the package, how to render it, and a digest of its inputs."""
+
+    arcname: str
+    render: Callable[[], Union[str, bytes, Iterable[str], Iterable[bytes]]]
+    inputs: str
+    executable: bool = False
+    # Set for per-question test files, which may be rendered in worker processes
+    question_number: Optional[int] = None
+
+
+class CompressedEntry(NamedTuple):
+    """An archive entry whose data has already been compressed."""
+
+    arcname: str
+    method: int
+    crc: int
+    size: int
+    data: bytes
+    date_time: Tuple[int, int, int, int, int, int]
+    external_attr: int
+
+
+def _compressor(method: int, level: Optional[int]):
+    if method == zipfile.ZIP_DEFLATED:
+        # Raw deflate stream, as zipfile writes it
+        return zlib.compressobj(
+            zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, -15
+        )
+    # zipfile's LZMA compressor writes the properties header zip readers expect
+    return zipfile.LZMACompressor()
+
+
+class _StreamedContent:
+    """Compresses an entry fed chunk by chunk, holding only its compressed form.
+
+    Chunks must be fed in order, but not necessarily from the same thread.
+    """
+
+    def __init__(self, method: int, level: Optional[int] = None):
+        self.method = method
+        self.crc = 0
+        self.size = 0
+        self._stored: List[bytes] = []
+        self._parts: List[bytes] = []
+        self._compressor = None if method == zipfile.ZIP_STORED else _compressor(method, level)
+
+    def feed(self, chunk: bytes):
+        self.crc = zlib.crc32(chunk, self.crc)
+        self.size += len(chunk)
+        if self._compressor is None:
+            self._stored.append(chunk)
+            return
+        self._parts.append(self._compressor.compress(chunk))
+        # Keep the raw chunks only while the entry might still be stored
+        if self.size < MIN_COMPRESS_SIZE:
+            self._stored.append(chunk)
+        else:
+            self._stored = []
+
+    def finish(self) -> Tuple[int, int, int, bytes]:
+        """Return (method, crc, size, data), as compress_content does."""
+        if self._compressor is None or self.size < MIN_COMPRESS_SIZE:
+            return zipfile.ZIP_STORED, self.crc, self.size, b"".join(self._stored)
+        self._parts.append(self._compressor.flush())
+        compressed = b"".join(self._parts)
+        if len(compressed) >= self.size:
+            # Incompressible content, decompress it back to store it
+            content = _decompress(self.method, compressed)
+            return zipfile.ZIP_STORED, self.crc, self.size, content
+        return self.method, self.crc, self.size, compressed
+
+
+def compress_content(
+    content: Union[bytes, Iterable[bytes]], method: int, level: Optional[int] = None
+) -> Tuple[int, int, int, bytes]:
+    """Compress content and return (method, crc, size, data).
+
+    Falls back to storing the content when it is small or when compression
+    doesn't make it smaller.
+    """
+    if not isinstance(content, bytes):
+        # Compress streamed chunks as they arrive, so only the compressed
+        # form of the entry is held in memory
+        streamed = _StreamedContent(method, level)
+        for chunk in content:
+            streamed.feed(chunk)
+        return streamed.finish()
+
+    crc = zlib.crc32(content)
+    size = len(content)
+    if method == zipfile.ZIP_STORED or size < MIN_COMPRESS_SIZE:
+        return zipfile.ZIP_STORED, crc, size, content
+    compressor = _compressor(method, level)
+    compressed = compressor.compress(content) + compressor.flush()
+    if len(compressed) >= size:
+        return zipfile.ZIP_STORED, crc, size, content
+    return method, crc, size, compressed
+
+
+def _after(previous: Optional[Future], function: Callable[[], Any]) -> Any:
+    """Run function once previous is done, to chain the steps of one entry in a pool."""
+    if previous is not None:
+        previous.result()
+    return function()
+
+
+def _decompress(method: int, data: bytes) -> bytes:
+    if method == zipfile.ZIP_DEFLATED:
+        return zlib.decompress(data, -15)
+    return zipfile.LZMADecompressor().decompress(data)
+
+
+def read_compressed_entry(source: zipfile.ZipFile, arcname: str) -> Tuple[int, int, int, bytes]:
+    """Return (method, crc, size, data) of an archive entry, leaving its data compressed.
+
+    Used to copy entries between archives without decompressing and
+    compressing them again.
+    """
+    info = source.getinfo(arcname)
+    source.fp.seek(info.header_offset)
+    header = source.fp.read(30)
+    if header[:4] != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"Bad local header for {arcname}")
+    name_length, extra_length = struct.unpack("<2H", header[26:30])
+    source.fp.seek(info.header_offset + 30 + name_length + extra_length)
+    data = source.fp.read(info.compress_size)
+    return info.compress_type, info.CRC, info.file_size, data
+
+
+def _dos_date_time(date_time: Tuple[int, int, int, int, int, int]) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    dos_date = (year - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | second // 2
+    return dos_date, dos_time
+
+
+class PackageWriter:
+    """Writes files directly into a zip archive backed by a binary file object.
+
+    compression selects the strategy for every entry: "stored", "deflate"
+    (at compresslevel, zlib's default when None) or "lzma". Entries that are
+    small or don't shrink are stored either way. Large entries are
+    compressed in a pool of up to jobs threads (all CPUs when None), streamed
+    ones block by block as they are produced, and written in the order they
+    were added.
+
+    In reproducible mode every entry gets the same timestamp, so identical
+    content always produces identical archive bytes. Callers are
+    responsible for adding entries in a stable order.
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        reproducible: bool = False,
+        compression: str = DEFAULT_COMPRESSION,
+        compresslevel: Optional[int] = None,
+        jobs: Optional[int] = None,
+    ):
+        if compression not in COMPRESSION_METHODS:
+            raise ValueError(
+                f"compression must be one of: {', '.join(COMPRESSION_METHODS)}"
+            )
+        self.fileobj = fileobj
+        self.reproducible = reproducible
+        self.date_time = reproducible_date_time() if reproducible else None
+        self.method = COMPRESSION_METHODS[compression]
+        self.compresslevel = compresslevel
+
+        jobs = available_cpus() if jobs is None else jobs
+        self._pool = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        self._pending: Deque[Future] = deque()
+        # (entry without its data, compressed size, flags, local header offset)
+        # for the central directory
+        self._written: List[Tuple[CompressedEntry, int, int, int]] = []
+        try:
+            self._offset = fileobj.tell()
+        except (AttributeError, OSError):
+            self._offset = 0
+        self._closed = False
+
+    def __enter__(self) -> "PackageWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._shutdown()
+
+    def add_file(
+        self,
+        arcname: str,
+        content: Union[str, bytes, Iterable[Union[str, bytes]]],
+        executable: bool = False,
+    ):
+        """Add a file entry to the archive, marking it executable if requested.
+
+        content may also be an iterable of text or byte chunks, which is
+        streamed into the entry without building the whole file in memory.
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        elif not isinstance(content, bytes):
+            content = (
+                chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                for chunk in content
+            )
+
+        date_time = self.date_time or time.localtime(time.time())[:6]
+        mode = EXECUTABLE_FILE_MODE if executable else REGULAR_FILE_MODE
+
+        def entry(compressed: Tuple[int, int, int, bytes]) -> CompressedEntry:
+            method, crc, size, data = compressed
+            return CompressedEntry(arcname, method, crc, size, data, date_time, mode << 16)
+
+        if self._pool is None or (
+            isinstance(content, bytes) and len(content) < MIN_PARALLEL_SIZE
+        ):
+            future: Future = Future()
+            future.set_result(
+                entry(compress_content(content, self.method, self.compresslevel))
+            )
+        elif isinstance(content, bytes):
+            future = self._pool.submit(
+                lambda: entry(compress_content(content, self.method, self.compresslevel))
+            )
+        else:
+            future = self._submit_stream(content, entry)
+        self._pending.append(future)
+
+        while len(self._pending) > MAX_PENDING_ENTRIES or (
+            self._pending and self._pending[0].done()
+        ):
+            self._write_entry(self._pending.popleft().result())
+
+    def _submit_stream(
+        self,
+        content: Iterable[bytes],
+        entry: Callable[[Tuple[int, int, int, bytes]], CompressedEntry],
+    ) -> Future:
+        """Compress a streamed entry in the pool, block by block as it is produced.
+
+        Chunks are gathered into blocks of MIN_PARALLEL_SIZE, each compressed
+        in the pool once the previous block of the entry is, so rendering
+        the rest of the entry overlaps with compressing what came before.
+        Entries that turn out smaller than one block are compressed inline.
+        """
+        streamed = _StreamedContent(self.method, self.compresslevel)
+        blocks: Deque[Future] = deque()
+        buffered: List[bytes] = []
+        size = 0
+        for chunk in content:
+            buffered.append(chunk)
+            size += len(chunk)
+            if size < MIN_PARALLEL_SIZE:
+                continue
+            block = b"".join(buffered)
+            previous = blocks[-1] if blocks else None
+            feed = partial(streamed.feed, block)
+            blocks.append(self._pool.submit(_after, previous, feed))
+            buffered = []
+            size = 0
+            # Bound the rendered data waiting to be compressed
+            while len(blocks) > MAX_PENDING_BLOCKS:
+                blocks.popleft().result()
+
+        def finish() -> CompressedEntry:
+            if buffered:
+                streamed.feed(b"".join(buffered))
+            return entry(streamed.finish())
+
+        if not blocks:
+            future: Future = Future()
+            future.set_result(finish())
+            return future
+        return self._pool.submit(_after, blocks[-1], finish)
+
+    def add_compressed(
+        self,
+        arcname: str,
+        compressed: Tuple[int, int, int, bytes],
+        executable: bool = False,
+    ):
+        """Add a file entry from its (method, crc, size, data), as compress_content returns."""
+        method, crc, size, data = compressed
+        date_time = self.date_time or time.localtime(time.time())[:6]
+        mode = EXECUTABLE_FILE_MODE if executable else REGULAR_FILE_MODE
+        future: Future = Future()
+        future.set_result(
+            CompressedEntry(arcname, method, crc, size, data, date_time, mode << 16)
+        )
+        self._pending.append(future)
+        while len(self._pending) > MAX_PENDING_ENTRIES or (
+            self._pending and self._pending[0].done()
+        ):
+            self._write_entry(self._pending.popleft().result())
+
+    def close(self):
+        """Finish the archive by writing the remaining entries and the central directory."""
+        if self._closed:
+            return
+        try:
+            while self._pending:
+                self._write_entry(self._pending.popleft().result())
+            self._write_central_directory()
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        self._closed = True
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    def _write(self, data: bytes):
+        self.fileobj.write(data)
+        self._offset += len(data)
+
+    def _write_entry(self, entry: CompressedEntry):
+        name = entry.arcname.encode("utf-8")
+        flags = 0 if entry.arcname.isascii() else _FLAG_UTF8
+        if entry.method == zipfile.ZIP_LZMA:
+            flags |= _FLAG_LZMA_EOS
+        if max(len(entry.data), entry.size, self._offset) > _ZIP_MAX_SIZE:
+            raise ValueError(f"{entry.arcname} does not fit in a zip archive without zip64")
+
+        # Written data isn't kept, so memory doesn't grow with the archive
+        self._written.append((entry._replace(data=b""), len(entry.data), flags, self._offset))
+        dos_date, dos_time = _dos_date_time(entry.date_time)
+        header = struct.pack(
+            "<4s5H3L2H",
+            b"PK\x03\x04",
+            self._extract_version(entry),
+            flags,
+            entry.method,
+            dos_time,
+            dos_date,
+            entry.crc,
+            len(entry.data),
+            entry.size,
+            len(name),
+            0,
+        )
+        self._write(header + name)
+        self._write(entry.data)
+
+    def _write_central_directory(self):
+        start = self._offset
+        for entry, compressed_size, flags, offset in self._written:
+            name = entry.arcname.encode("utf-8")
+            dos_date, dos_time = _dos_date_time(entry.date_time)
+            version = self._extract_version(entry)
+            record = struct.pack(
+                "<4s6H3L5H2L",
+                b"PK\x01\x02",
+                CREATE_SYSTEM_UNIX << 8 | version,
+                version,
+                flags,
+                entry.method,
+                dos_time,
+                dos_date,
+                entry.crc,
+                compressed_size,
+                entry.size,
+                len(name),
+                0,
+                0,
+                0,
+                0,
+                entry.external_attr,
+                offset,
+            )
+            self._write(record + name)
+
+        count = len(self._written)
+        size = self._offset - start
+        if count >= _ZIP_MAX_COUNT:
+            # Only the entry count overflows, so only the end records need zip64
+            zip64_end = self._offset
+            self._write(
+                struct.pack(
+                    "<4sQ2H2L4Q",
+                    b"PK\x06\x06",
+                    44,
+                    _ZIP64_VERSION,
+                    _ZIP64_VERSION,
+                    0,
+                    0,
+                    count,
+                    count,
+                    size,
+                    start,
+                )
+            )
+            self._write(struct.pack("<4sLQL", b"PK\x06\x07", 0, zip64_end, 1))
+            count = _ZIP_MAX_COUNT
+        self._write(struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, count, count, size, start, 0))
+
+    @staticmethod
+    def _extract_version(entry: CompressedEntry) -> int:
+        return _ZIP_LZMA_VERSION if entry.method == zipfile.ZIP_LZMA else _ZIP_VERSION
@@ -0,0 +1,211 @@
+"""
+Compact, precomputed view of a configuration shared by all generated artifacts.
+
+The render model is built once per configuration. It holds read-only
+records with the values every artifact needs (sanitized test names,
+normalized expected outputs, point totals, file to function indexes), so
+the package, README, description and skeletons don't each walk and
+post-process the pydantic models again.
+"""
+
+from typing import Dict, Set, Tuple
+
+from autograder_gen.config import AutograderConfig, MarkingItem, Question
+
+# Characters replaced when turning a marking item name into a test method name
+_TEST_NAME_TABLE = str.maketrans(
+    {
+        **{char: "_" for char in " -./\\:;,?!@#$%^&*+=|<>"},
+        **{char: "" for char in "()[]"},
+    }
+)
+
+# Item types whose generated tests import functions from the submission
+IMPORTING_TYPES = {"function_test", "signature_check"}
+
+
+class _Record:
+    """Base for immutable records stored in __slots__."""
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+
+class RenderItem(_Record):
+    """A marking item, ready for rendering."""
+
+    __slots__ = (
+        "index",
+        "type",
+        "name",
+        "test_name",
+        "target_file",
+        "total_mark",
+        "time_limit",
+        "visibility",
+        "expected_input",
+        "expected_output",
+        "adds_trailing_newline",
+        # Source path of a data file and its name inside the package, or ""
+        "expected_input_file",
+        "expected_input_data",
+        "expected_output_file",
+        "expected_output_data",
+        "function_name",
+        "test_cases",
+        "expected_parameters",
+        "expected_return_type",
+    )
+
+    @property
+    def normalized_expected_output(self) -> str:
+        """expected_output as the generated test compares it.
+
+        Built on use, so large outputs aren't kept twice in the model.
+        """
+        if self.adds_trailing_newline:
+            return self.expected_output + "\n"
+        return self.expected_output
+
+
+class RenderQuestion(_Record):
+    """A question with its items and precomputed totals."""
+
+    __slots__ = (
+        "number",
+        "name",
+        "description",
+        "marking_items",
+        "visible_items",
+        "total_points",
+        "visible_points",
+        "needs_imports",
+        "needs_timeout",
+        "needs_data_files",
+    )
+
+
+class RenderModel(_Record):
+    """Everything the generator needs to render one configuration."""
+
+    __slots__ = (
+        "language",
+        "questions",
+        "files_necessary",
+        "functions_by_file",
+        "total_items",
+        "total_points",
+    )
+
+
+def sanitize_test_name(name: str) -> str:
+    """Turn a marking item name into the suffix of a test method name."""
+    return name.lower().translate(_TEST_NAME_TABLE)
+
+
+def _adds_trailing_newline(language: str, item: MarkingItem) -> bool:
+    # Python's print() always ends with a newline, so expected output must too
+    return (
+        language == "python"
+        and item.type == "output_comparison"
+        and bool(item.expected_output)
+        and not item.expected_output.endswith("\n")
+    )
+
+
+def data_file_name(number: int, index: int, field: str) -> str:
+    """Name inside the package of the data file behind an expected input/output."""
+    return f"data/question_{number}/item_{index}_{field}.txt"
+
+
+def _build_item(language: str, number: int, index: int, item: MarkingItem) -> RenderItem:
+    data_files = item.data_files()
+    return RenderItem(
+        index=index,
+        type=item.type,
+        name=item.name,
+        test_name=sanitize_test_name(item.name) if item.name else f"item_{index}",
+        target_file=item.target_file,
+        total_mark=item.total_mark,
+        time_limit=item.time_limit,
+        visibility=item.visibility,
+        expected_input=item.expected_input,
+        expected_output=item.expected_output,
+        adds_trailing_newline=_adds_trailing_newline(language, item),
+        expected_input_file=item.expected_input_file,
+        expected_input_data=(
+            data_file_name(number, index, "expected_input")
+            if "expected_input" in data_files
+            else ""
+        ),
+        expected_output_file=item.expected_output_file,
+        expected_output_data=(
+            data_file_name(number, index, "expected_output")
+            if "expected_output" in data_files
+            else ""
+        ),
+        function_name=item.function_name,
+        test_cases=item.test_cases,
+        expected_parameters=item.expected_parameters,
+        expected_return_type=item.expected_return_type,
+    )
+
+
+def _build_question(language: str, number: int, question: Question) -> RenderQuestion:
+    items = tuple(
+        _build_item(language, number, index, item)
+        for index, item in enumerate(question.marking_items, 1)
+    )
+    # File existence checks are hidden from the assessment description
+    visible_items = tuple(item for item in items if item.type != "file_exists")
+    types = {item.type for item in items}
+
+    return RenderQuestion(
+        number=number,
+        name=question.name,
+        description=question.description,
+        marking_items=items,
+        visible_items=visible_items,
+        total_points=sum(item.total_mark for item in items),
+        visible_points=sum(item.total_mark for item in visible_items),
+        needs_imports=bool(types & IMPORTING_TYPES),
+        needs_timeout="function_test" in types,
+        needs_data_files=any(
+            item.expected_input_data or item.expected_output_data for item in items
+        ),
+    )
+
+
+def build_render_model(config: AutograderConfig) -> RenderModel:
+    """Build the render model for a configuration in a single pass."""
+    questions = tuple(
+        _build_question(config.language, number, question)
+        for number, question in enumerate(config.questions, 1)
+    )
+
+    functions: Dict[str, Set[str]] = {}
+    for question in questions:
+        for item in question.marking_items:
+            if item.function_name:
+                functions.setdefault(item.target_file, set()).add(item.function_name)
+    functions_by_file: Dict[str, Tuple[str, ...]] = {
+        target_file: tuple(sorted(names)) for target_file, names in functions.items()
+    }
+
+    return RenderModel(
+        language=config.language,
+        questions=questions,
+        files_necessary=tuple(config.files_necessary),
+        functions_by_file=functions_by_file,
+        total_items=sum(len(q.marking_items) for q in questions),
+        total_points=sum(q.total_points for q in questions),
+    )
@@ -0,0 +1,254 @@
+"""
+Validation rules, run over a validated configuration in a single pass.
+
+Rules are registered on a RuleEngine for a scope: the whole config, each
+question, or each marking item (optionally only items of some types). The
+engine builds the indexes rules share (e.g. question name counts) once,
+then visits every question and marking item exactly once, so a run is
+linear in the size of the config. Rules yield findings, errors and
+warnings alike:
+
+    @default_rules.item("output_comparison")
+    def check_output(context, question, index, item):
+        if not item.expected_output:
+            yield warning(f"Question '{question.name}', Item {index}: ...")
+"""
+
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from autograder_gen.config import (
+    AutograderConfig,
+    MarkingItem,
+    Question,
+    resolve_data_file,
+)
+from autograder_gen.variants import placeholders
+
+ERROR = "error"
+WARNING = "warning"
+
+
+class Finding(NamedTuple):
+    severity: str
+    message: str
+
+
+def error(message: str) -> Finding:
+    return Finding(ERROR, message)
+
+
+def warning(message: str) -> Finding:
+    return Finding(WARNING, message)
+
+
+class RuleResults:
+    """Errors and warnings found by a rule run, in the order they were found."""
+
+    __slots__ = ("errors", "warnings")
+
+    def __init__(self):
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+
+    def add(self, findings: Iterable[Finding]):
+        for severity, message in findings:
+            (self.errors if severity == ERROR else self.warnings).append(message)
+
+    def extend(self, other: "RuleResults"):
+        self.errors.extend(other.errors)
+        self.warnings.extend(other.warnings)
+
+
+class RuleContext:
+    """What rules may look up about the config, indexed once per run."""
+
+    __slots__ = ("config", "base_dir", "data_roots", "question_name_counts")
+
+    def __init__(
+        self,
+        config: AutograderConfig,
+        base_dir: Optional[str] = None,
+        data_roots: Optional[List[str]] = None,
+    ):
+        self.config = config
+        # Directory data files are resolved against, None if there is none
+        self.base_dir = base_dir
+        # Directories data files must be in, base_dir when None
+        self.data_roots = data_roots
+        self.question_name_counts = Counter(q.name for q in config.questions)
+
+
+ConfigRule = Callable[[RuleContext], Iterable[Finding]]
+QuestionRule = Callable[[RuleContext, Question], Iterable[Finding]]
+ItemRule = Callable[[RuleContext, Question, int, MarkingItem], Iterable[Finding]]
+
+
+class RuleEngine:
+    """A set of registered rules and the single pass that runs them."""
+
+    def __init__(self):
+        self._config_rules: List[ConfigRule] = []
+        self._question_rules: List[QuestionRule] = []
+        # Item rules by item type; None holds the rules for every type
+        self._item_rules: Dict[Optional[str], List[ItemRule]] = {None: []}
+
+    def config(self, rule: ConfigRule) -> ConfigRule:
+        """Register a rule run once per config, before its questions."""
+        self._config_rules.append(rule)
+        return rule
+
+    def question(self, rule: QuestionRule) -> QuestionRule:
+        """Register a rule run for every question, after its marking items.
+
+        Question and item rules must only depend on their question (and the
+        base directory), so their findings can be reused for an unchanged
+        question.
+        """
+        self._question_rules.append(rule)
+        return rule
+
+    def item(self, *types: str) -> Callable[[ItemRule], ItemRule]:
+        """Register a rule run for every marking item, or for items of some types."""
+
+        def register(rule: ItemRule) -> ItemRule:
+            for item_type in types or (None,):
+                self._item_rules.setdefault(item_type, []).append(rule)
+            return rule
+
+        return register
+
+    def check_question(self, context: RuleContext, question: Question) -> RuleResults:
+        """Run the question and item rules for one question."""
+        results = RuleResults()
+        common = self._item_rules[None]
+        for index, item in enumerate(question.marking_items, 1):
+            for rule in common:
+                results.add(rule(context, question, index, item))
+            for rule in self._item_rules.get(item.type, ()):
+                results.add(rule(context, question, index, item))
+        for rule in self._question_rules:
+            results.add(rule(context, question))
+        return results
+
+    def run(
+        self,
+        config: AutograderConfig,
+        base_dir: Optional[str] = None,
+        known: Optional[List[Optional[RuleResults]]] = None,
+        data_roots: Optional[List[str]] = None,
+    ) -> RuleResults:
+        """Run every rule over config in one pass and return all findings.
+
+        known may hold the results of check_question() for questions known
+        to be unchanged (None for the others), which are reused. The results
+        of each question are left in the list, when it is given.
+        """
+        context = RuleContext(config, base_dir, data_roots)
+        results = RuleResults()
+        for rule in self._config_rules:
+            results.add(rule(context))
+        for number, question in enumerate(config.questions):
+            question_results = known[number] if known is not None else None
+            if question_results is None:
+                question_results = self.check_question(context, question)
+                if known is not None:
+                    known[number] = question_results
+            results.extend(question_results)
+        return results
+
+
+# Rules ConfigValidator runs on every config
+default_rules = RuleEngine()
+
+
+@default_rules.config
+def check_global_time_limit(context: RuleContext):
+    if context.config.global_time_limit > 3600:
+        yield warning("Global time limit is very high (>1 hour)")
+
+
+@default_rules.config
+def check_questions_from(context: RuleContext):
+    # LoadedConfig fills in bank questions and clears questions_from
+    if context.config.questions_from:
+        yield error("questions_from can only be used in configuration files")
+
+
+@default_rules.config
+def check_duplicate_question_names(context: RuleContext):
+    for name, count in context.question_name_counts.items():
+        for _ in range(count - 1):
+            yield warning(f"Duplicate question name: '{name}'")
+
+
+@default_rules.question
+def check_total_marks(context: RuleContext, question: Question):
+    total_marks = sum(item.total_mark for item in question.marking_items)
+    if total_marks == 0:
+        yield warning(f"Question '{question.name}': Total marks is 0")
+    elif total_marks > 100:
+        yield warning(
+            f"Question '{question.name}': Total marks is very high ({total_marks})"
+        )
+
+
+@default_rules.item()
+def check_item_time_limit(
+    context: RuleContext, question: Question, index: int, item: MarkingItem
+):
+    if item.time_limit > 300:
+        yield warning(
+            f"Question '{question.name}', Item {index}: "
+            f"Time limit is very high ({item.time_limit}s)"
+        )
+
+
+@default_rules.item()
+def check_data_files(
+    context: RuleContext, question: Question, index: int, item: MarkingItem
+):
+    for field, name in item.data_files().items():
+        # Names with variant placeholders are only known once expanded
+        if placeholders(name):
+            continue
+        try:
+            resolve_data_file(context.base_dir, name, context.data_roots)
+        except (ValueError, FileNotFoundError) as e:
+            yield error(f"Question '{question.name}', Item {index}: {field}_file: {e}")
+
+
+@default_rules.item("output_comparison")
+def check_expected_output(
+    context: RuleContext, question: Question, index: int, item: MarkingItem
+):
+    if not item.expected_output and not item.expected_output_file:
+        yield warning(
+            f"Question '{question.name}', Item {index}: Expected output is empty"
+        )
+
+
+@default_rules.item("signature_check")
+def check_signature_inputs(
+    context: RuleContext, question: Question, index: int, item: MarkingItem
+):
+    if item.expected_input or item.expected_output:
+        yield warning(
+            f"Question '{question.name}', Item {index}: "
+            "expected_input/expected_output not needed for signature check"
+        )
+
+
+@default_rules.item("function_test")
+def check_test_cases(
+    context: RuleContext, question: Question, index: int, item: MarkingItem
+):
+    item_context = f"Question '{question.name}', Item {index}"
+    if not item.test_cases:
+        yield warning(f"{item_context}: No test cases provided for function testing")
+
+    for i, test_case in enumerate(item.test_cases):
+        if not test_case.get("expected") and not test_case.get("should_raise"):
+            yield warning(
+                f"{item_context}: Test case {i+1} has no expected value or exception"
+            )
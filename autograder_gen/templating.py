@@ -0,0 +1,88 @@
+"""
+Shared Jinja environment for rendering autograder templates.
+
+A single environment is created per process and reused by every generator,
+so templates are compiled once and kept in Jinja's in-memory cache. Compiled
+bytecode is also persisted with a FileSystemBytecodeCache, which lets a cold
+process skip template compilation entirely.
+
+Jinja is imported when the environment is first created, so modules that
+import this one (e.g. for template_digest) don't pay for it.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+from autograder_gen.utils import get_cache_dir
+
+if TYPE_CHECKING:
+    from jinja2 import Environment, FileSystemBytecodeCache
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+
+_jinja_env: Optional["Environment"] = None
+_jinja_env_lock = threading.Lock()
+
+
+def _create_bytecode_cache() -> "FileSystemBytecodeCache":
+    """Create the persistent bytecode cache used by the shared environment."""
+    from jinja2 import FileSystemBytecodeCache
+
+    # Defaults to a per-user temp dir unless AUTOGRADER_GEN_CACHE_DIR is set
+    cache_dir = get_cache_dir("jinja")
+    if cache_dir is None:
+        return FileSystemBytecodeCache()
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return FileSystemBytecodeCache(str(cache_dir))
+
+
+def get_jinja_env() -> "Environment":
+    """Return the process-wide Jinja environment, creating it on first use."""
+    global _jinja_env
+    if _jinja_env is None:
+        with _jinja_env_lock:
+            if _jinja_env is None:
+                from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+                # auto_reload makes the loader check template mtimes, and the
+                # bytecode cache discards entries whose source checksum changed
+                _jinja_env = Environment(
+                    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+                    autoescape=select_autoescape(["html", "xml"]),
+                    trim_blocks=True,
+                    lstrip_blocks=True,
+                    auto_reload=True,
+                    bytecode_cache=_create_bytecode_cache(),
+                )
+    return _jinja_env
+
+
+def warm_templates() -> List[str]:
+    """Compile every template ahead of time. Returns the template names loaded."""
+    env = get_jinja_env()
+    names = env.list_templates(filter_func=lambda name: name.endswith(".j2"))
+    for name in names:
+        env.get_template(name)
+    return names
+
+
+def template_digest(*patterns: str) -> str:
+    """Return a SHA-256 digest over the names and contents of matching templates.
+
+    Patterns are globs relative to the templates directory; all templates
+    are included when none are given.
+    """
+    paths = set()
+    for pattern in patterns or ("**/*.j2",):
+        paths.update(TEMPLATES_DIR.glob(pattern))
+
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(path.relative_to(TEMPLATES_DIR).as_posix().encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
@@ -2,9 +2,22 @@
 Utility functions for the TIF Autograder CLI tool.
 """
 
+import gc
+import hashlib
 import logging
+import os
 import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+# Root directory for on-disk caches (template bytecode, built packages, ...)
+CACHE_DIR_ENV_VAR = "AUTOGRADER_GEN_CACHE_DIR"
+
+PACKAGE_DIR = Path(__file__).parent
 
 
 def setup_logging(verbose: bool = False):
@@ -62,6 +75,136 @@ def create_directory(dir_path: str, description: str = "Directory") -> Path:
         )
 
 
+def get_cache_dir(name: str) -> Optional[Path]:
+    """Return the named cache directory under AUTOGRADER_GEN_CACHE_DIR, if set."""
+    cache_root = os.environ.get(CACHE_DIR_ENV_VAR)
+    if not cache_root:
+        return None
+    return Path(cache_root) / name
+
+
+# (mtime_ns, size) of a file, None if it doesn't exist
+FileState = Optional[Tuple[int, int]]
+
+
+def file_state(path: str) -> FileState:
+    """Return (mtime_ns, size) of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@lru_cache(maxsize=None)
+def build_digest() -> str:
+    """SHA-256 of the package's source files and templates.
+
+    Computed once per process, so a daemon reports the code it was started
+    with even if the checkout changed since. On-disk caches are keyed on it,
+    so any code change invalidates what older code produced.
+    """
+    digest = hashlib.sha256()
+    for pattern in ("*.py", "templates/**/*.j2"):
+        for path in sorted(PACKAGE_DIR.glob(pattern)):
+            digest.update(path.relative_to(PACKAGE_DIR).as_posix().encode("utf-8"))
+            digest.update(b"\0" + path.read_bytes() + b"\0")
+    return digest.hexdigest()
+
+
+def available_cpus() -> int:
+    """Return the number of CPUs this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def process_pool_context() -> "multiprocessing.context.BaseContext":
+    """Start method for process pools that may be created while other threads run.
+
+    Forking a process whose other threads hold locks (e.g. inside zlib or
+    lxml) can deadlock the child, so workers are started by a fork server,
+    or spawned where there is none.
+    """
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+@contextmanager
+def atomic_open(path) -> Iterator[BinaryIO]:
+    """Open a temporary file that is atomically renamed to path on success.
+
+    Concurrent writers to the same path never interleave, and readers see
+    either the previous file or the complete new one. If the block raises,
+    the temporary file is removed and path is left untouched.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+def atomic_write_bytes(path, data: bytes) -> Path:
+    """Write data to path through a temporary file and an atomic rename."""
+    with atomic_open(path) as f:
+        f.write(data)
+    return Path(path)
+
+
+_gc_pause_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+_gc_pauses_allowed = False
+
+
+def allow_gc_pauses():
+    """Let gc_paused() pause the garbage collector in this process.
+
+    The collector is shared by every thread, so only processes that run
+    nothing but autograder-gen work (the CLI and the daemon) opt in. In a
+    host process such as the web server, gc_paused() does nothing.
+    """
+    global _gc_pauses_allowed
+    _gc_pauses_allowed = True
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Pause the cyclic garbage collector while building many objects at once.
+
+    Collections triggered while a large config is validated scan every
+    object built so far, which makes validation time grow faster than the
+    config. The objects built are not cyclic, so nothing is lost by
+    collecting once, afterwards. Pauses of several threads overlap: the
+    collector is enabled again when the last one ends.
+    """
+    global _gc_pauses, _gc_was_enabled
+    if not _gc_pauses_allowed:
+        yield
+        return
+    with _gc_pause_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_pause_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
 def get_file_extension(file_path: str) -> str:
     """Get file extension from file path."""
     return Path(file_path).suffix.lower()
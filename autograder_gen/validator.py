@@ -1,52 +1,232 @@
+import hashlib
 import json
+import threading
 import yaml
-from typing import List, Dict, Any
-from autograder_gen.config import AutograderConfig, ConfigParser
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+from autograder_gen.config import AutograderConfig, LoadedConfig, Question
+from autograder_gen.rules import RuleResults, default_rules
 from pydantic import ValidationError
 
+# Questions whose validation results a ValidationCache keeps by default
+DEFAULT_CACHED_QUESTIONS = 50000
+
+
+class QuestionValidation:
+    """Validation results of one question: its model or its pydantic errors.
+
+    findings are the results of the question's validation rules, filled in
+    the first time the question is part of a valid config.
+    """
+
+    __slots__ = ("model", "errors", "findings")
+
+    def __init__(self, model: Optional[Question], errors: List[Dict[str, Any]]):
+        self.model = model
+        self.errors = errors
+        self.findings: Optional[RuleResults] = None
+
+
+class ValidationCache:
+    """Validation results of questions, keyed by a hash of their content.
+
+    Shared by the validators of many requests (e.g. the web editor, which
+    revalidates a config after every edit), so only questions that changed
+    since they were last seen are validated again. Least recently used
+    questions are dropped first.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHED_QUESTIONS):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, QuestionValidation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(question: Any) -> str:
+        encoded = json.dumps(question, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def validate_question(self, question: Any) -> QuestionValidation:
+        """Validate a question, or return its cached results."""
+        key = self.key(question)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        try:
+            result = QuestionValidation(Question.model_validate(question), [])
+        except ValidationError as e:
+            result = QuestionValidation(None, e.errors())
+
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
 
 class ConfigValidator:
     """Validates autograder configuration files using pydantic."""
 
-    def __init__(self):
+    def __init__(self, cache: Optional[ValidationCache] = None):
         self.errors = []
         self.warnings = []
+        # Validation results of questions shared with other validators
+        self.cache = cache
+        # Results of each question of the last config validated with the cache
+        self.question_results: List[QuestionValidation] = []
+
+    def validate_json(
+        self,
+        data: Dict[str, Any],
+        question_results: Optional[List[Optional[QuestionValidation]]] = None,
+    ) -> bool:
+        """Validate configuration data against the schema. Returns True if valid.
+
+        With a validation cache, questions validated before are not
+        validated again; the results are the same either way.
+        question_results may give the results of questions known to be
+        unchanged (e.g. the question_results of the config an edit was made
+        to, None for the edited questions), which are then not even looked
+        up in the cache.
+        """
+        questions = data.get("questions") if isinstance(data, dict) else None
+        if (
+            self.cache is not None
+            and isinstance(questions, list)
+            and questions
+            and "questions_from" not in data
+        ):
+            return self._validate_cached(data, questions, question_results)
+        return self.validate_loaded(LoadedConfig(data))
 
-    def validate_json(self, data: Dict[str, Any]) -> bool:
-        """Validate configuration data against the schema. Returns True if valid."""
+    def _validate_cached(
+        self,
+        data: Dict[str, Any],
+        questions: List[Any],
+        known: Optional[List[Optional[QuestionValidation]]] = None,
+    ) -> bool:
         self.errors.clear()
         self.warnings.clear()
 
+        if known is None or len(known) != len(questions):
+            known = [None] * len(questions)
+        results = [
+            result if result is not None else self.cache.validate_question(question)
+            for question, result in zip(questions, known)
+        ]
+        self.question_results = results
+        models = [result.model for result in results if result.model is not None]
+        settings = {key: value for key, value in data.items() if key != "questions"}
         try:
-            from autograder_gen.config import AutograderConfigModel
+            # Validated question models are taken as they are, so this only
+            # validates the settings and the checks across questions
+            model = AutograderConfig.model_validate(
+                {
+                    **settings,
+                    "questions": models
+                    or [Question.model_construct(name="", marking_items=[])],
+                }
+            )
+            errors = []
+        except ValidationError as e:
+            errors = e.errors()
 
-            AutograderConfigModel.model_validate(data)
+        if len(models) < len(results):
+            # As in a full validation, checks across questions don't run
+            # when a question is invalid
+            errors = [
+                error
+                for error in errors
+                if error["loc"] and error["loc"][0] != "questions"
+            ]
+            for index, result in enumerate(results):
+                errors.extend(
+                    {**error, "loc": ("questions", index, *error["loc"])}
+                    for error in result.errors
+                )
+        if errors:
+            self._add_validation_errors(errors)
+            return False
 
-            # Additional custom validations (warnings only since errors are native)
-            self._validate_custom_rules(data)
+        findings = [result.findings for result in results]
+        self._add_rule_results(default_rules.run(model, known=findings))
+        for result, question_findings in zip(results, findings):
+            result.findings = question_findings
+        return len(self.errors) == 0
 
-            return len(self.errors) == 0
+    def validate_loaded(self, loaded: LoadedConfig) -> bool:
+        """Validate an already parsed configuration. Returns True if valid.
+
+        The validated model is kept on loaded, so generating from it
+        afterwards doesn't validate again. Valid config files are stored in
+        the compiled config cache, and configs loaded from it are valid with
+        the warnings they had then.
+        """
+        self.errors.clear()
+        self.warnings.clear()
+
+        if loaded.warnings is not None:
+            self.warnings.extend(loaded.warnings)
+            return True
+
+        try:
+            loaded.model  # Raises ValidationError if invalid
+
+            # Rules pydantic doesn't cover, mostly warnings
+            self._add_rule_results(
+                default_rules.run(
+                    loaded.model, loaded.base_dir, data_roots=loaded.data_roots
+                )
+            )
+
+            if self.errors:
+                return False
+            loaded.save_compiled(self.warnings)
+            return True
 
         except ValidationError as e:
-            for error in e.errors():
-                loc = ".".join(map(str, error["loc"]))
-                self.errors.append(f"{error['msg']} at {loc}")
+            self._add_validation_errors(e.errors())
+            return False
+
+        except ValueError as e:
+            # Question banks that can't be used
+            self.errors.append(str(e))
             return False
 
+    def _add_rule_results(self, results: RuleResults):
+        self.errors.extend(results.errors)
+        self.warnings.extend(results.warnings)
+
+    def _add_validation_errors(self, errors: List[Dict[str, Any]]):
+        for error in errors:
+            loc = ".".join(map(str, error["loc"]))
+            self.errors.append(f"{error['msg']} at {loc}")
+
     def validate_from_file(self, file_path: str) -> bool:
         """Validate configuration directly from YAML file."""
         try:
-            parser = ConfigParser(file_path)
-            parser.parse()  # This will raise ValidationError if invalid
-            return True
-        except ValidationError as e:
-            for error in e.errors():
-                loc = ".".join(map(str, error["loc"]))
-                self.errors.append(f"{error['msg']} at {loc}")
-            return False
+            loaded = LoadedConfig.from_file(file_path)
         except (ValueError, FileNotFoundError) as e:
+            self.errors.clear()
+            self.warnings.clear()
             self.errors.append(str(e))
             return False
+        return self.validate_loaded(loaded)
 
     def _config_to_dict(self, config: AutograderConfig) -> Dict[str, Any]:
         """Convert AutograderConfig object to dictionary."""
@@ -69,6 +249,8 @@ class ConfigValidator:
                             "name": item.name,
                             "expected_input": item.expected_input,
                             "expected_output": item.expected_output,
+                            "expected_input_file": item.expected_input_file,
+                            "expected_output_file": item.expected_output_file,
                             "function_name": item.function_name,
                             "expected_parameters": item.expected_parameters,
                             "expected_return_type": item.expected_return_type,
@@ -81,100 +263,6 @@ class ConfigValidator:
             ],
         }
 
-    def _validate_custom_rules(self, data: Dict[str, Any]):
-        """Perform additional custom validations not covered by JSON schema."""
-        # Check for warnings about time limits
-        global_time_limit = data.get("global_time_limit", 300)
-        if global_time_limit > 3600:
-            self.warnings.append("Global time limit is very high (>1 hour)")
-
-        # Get list of necessary files
-        files_necessary = data.get("files_necessary", [])
-
-        # Check questions
-        questions = data.get("questions", [])
-        question_names = []
-
-        for i, question in enumerate(questions):
-            question_name = question.get("name", "")
-
-            # Check for duplicate question names
-            if question_name in question_names:
-                self.warnings.append(f"Duplicate question name: '{question_name}'")
-            question_names.append(question_name)
-
-            # Check marking items
-            marking_items = question.get("marking_items", [])
-            total_marks = 0
-
-            for j, item in enumerate(marking_items):
-                total_marks += item.get("total_mark", 0)
-
-                # Check time limits
-                time_limit = item.get("time_limit", 30)
-                if time_limit > 300:
-                    self.warnings.append(
-                        f"Question '{question_name}', Item {j+1}: "
-                        f"Time limit is very high ({time_limit}s)"
-                    )
-
-                # Type-specific validations
-                item_type = item.get("type")
-                if item_type == "output_comparison":
-                    self._validate_output_comparison_warnings(
-                        item, question_name, j + 1
-                    )
-                elif item_type == "signature_check":
-                    self._validate_signature_check_warnings(item, question_name, j + 1)
-                elif item_type == "function_test":
-                    self._validate_function_test(item, question_name, j + 1)
-
-            # Check total marks
-            if total_marks == 0:
-                self.warnings.append(f"Question '{question_name}': Total marks is 0")
-            elif total_marks > 100:
-                self.warnings.append(
-                    f"Question '{question_name}': Total marks is very high ({total_marks})"
-                )
-
-    def _validate_output_comparison_warnings(
-        self, item: Dict[str, Any], question_name: str, item_num: int
-    ):
-        """Generate warnings for output comparison items."""
-        context = f"Question '{question_name}', Item {item_num}"
-
-        if not item.get("expected_output"):
-            self.warnings.append(f"{context}: Expected output is empty")
-
-    def _validate_signature_check_warnings(
-        self, item: Dict[str, Any], question_name: str, item_num: int
-    ):
-        """Generate warnings for signature check items."""
-        context = f"Question '{question_name}', Item {item_num}"
-
-        if item.get("expected_input") or item.get("expected_output"):
-            self.warnings.append(
-                f"{context}: expected_input/expected_output not needed for signature check"
-            )
-
-    def _validate_function_test(
-        self, item: Dict[str, Any], question_name: str, item_num: int
-    ):
-        """Generate warnings for function test items."""
-        context = f"Question '{question_name}', Item {item_num}"
-
-        test_cases = item.get("test_cases", [])
-        if not test_cases:
-            self.warnings.append(
-                f"{context}: No test cases provided for function testing"
-            )
-
-        for i, test_case in enumerate(test_cases):
-            if not test_case.get("expected") and not test_case.get("should_raise"):
-                self.warnings.append(
-                    f"{context}: Test case {i+1} has no expected value or exception"
-                )
-
     def get_errors(self) -> List[str]:
         """Get validation errors."""
         return self.errors.copy()
@@ -0,0 +1,113 @@
+"""
+Assessment variants: one config, N packages with different test data.
+
+A config with a `variants` section is expanded into concrete configs by
+substituting `${name}` placeholders in expected_input, expected_output,
+their *_file paths and test_cases. Parameter values come from explicit `parameter_sets` or are
+picked from `parameters` choices with a seeded random generator, so the
+same config always expands to the same variants.
+
+    variants:
+      count: 3
+      seed: 2024
+      parameters:
+        n: [3, 5, 8, 13]
+        word: [apple, pear, plum]
+      parameter_sets:      # optional, used for the first variants
+        - {n: 21, word: fig}
+"""
+
+import copy
+import random
+import re
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+# ${name} placeholders, name being a Python identifier
+PLACEHOLDER_RE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+# Marking item fields in which placeholders are substituted
+SUBSTITUTED_FIELDS = (
+    "expected_input",
+    "expected_output",
+    "expected_input_file",
+    "expected_output_file",
+    "test_cases",
+)
+
+
+def variant_name(index: int) -> str:
+    return f"variant_{index}"
+
+
+def placeholders(value: Any) -> Set[str]:
+    """Names of all placeholders in a string or nested list/dict structure."""
+    if isinstance(value, str):
+        return set(PLACEHOLDER_RE.findall(value))
+    if isinstance(value, dict):
+        return set().union(*(placeholders(v) for v in value.values()))
+    if isinstance(value, list):
+        return set().union(*(placeholders(v) for v in value))
+    return set()
+
+
+def item_placeholders(item: Dict[str, Any]) -> Set[str]:
+    """Names of the placeholders used by a marking item."""
+    return set().union(*(placeholders(item.get(field)) for field in SUBSTITUTED_FIELDS))
+
+
+def substitute(value: Any, parameters: Dict[str, Any], typed: bool = False) -> Any:
+    """Replace placeholders in value.
+
+    With typed, a string that is exactly one placeholder is replaced by the
+    parameter value itself (so test case arguments keep their type);
+    otherwise values are formatted into the surrounding text.
+    """
+    if isinstance(value, str):
+        match = PLACEHOLDER_RE.fullmatch(value)
+        if typed and match:
+            return parameters[match.group(1)]
+        return PLACEHOLDER_RE.sub(lambda m: str(parameters[m.group(1)]), value)
+    if isinstance(value, dict):
+        return {k: substitute(v, parameters, typed) for k, v in value.items()}
+    if isinstance(value, list):
+        return [substitute(v, parameters, typed) for v in value]
+    return value
+
+
+def variant_parameters(variants: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Parameter values of every variant described by a `variants` section."""
+    parameter_sets = variants.get("parameter_sets") or []
+    choices = variants.get("parameters") or {}
+    count = variants.get("count") or len(parameter_sets)
+    seed = variants.get("seed", 0)
+
+    result = []
+    for index in range(1, count + 1):
+        # Seeded per variant, so variant N is the same whatever the count
+        rng = random.Random(f"{seed}:{index}")
+        parameters = {name: rng.choice(choices[name]) for name in sorted(choices)}
+        if index <= len(parameter_sets):
+            parameters.update(parameter_sets[index - 1])
+        result.append(parameters)
+    return result
+
+
+def expand_variants(
+    config_dict: Dict[str, Any],
+) -> Iterator[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+    """Yield (name, parameters, concrete config dict) for every variant of a config.
+
+    The concrete configs have their placeholders substituted and no
+    `variants` section.
+    """
+    base = {key: value for key, value in config_dict.items() if key != "variants"}
+    for index, parameters in enumerate(variant_parameters(config_dict["variants"]), 1):
+        variant = copy.deepcopy(base)
+        for question in variant.get("questions", []):
+            for item in question.get("marking_items", []):
+                for field in SUBSTITUTED_FIELDS[:-1]:
+                    if field in item:
+                        item[field] = substitute(item[field], parameters)
+                if "test_cases" in item:
+                    item["test_cases"] = substitute(item["test_cases"], parameters, typed=True)
+        yield variant_name(index), parameters, variant
@@ -0,0 +1,94 @@
+"""
+Polling file watcher used by the CLI's --watch mode.
+
+Files are compared by modification time and size, which works the same on
+every platform and filesystem (including network mounts where inotify
+events are not delivered).
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from autograder_gen.utils import FileState, file_state
+
+# Seconds between two polls of the watched files
+DEFAULT_INTERVAL = 0.1
+
+# Seconds a change must stay quiet before it is reported, so editors that
+# save in several steps (truncate, write, rename) trigger one rebuild
+SETTLE_DELAY = 0.05
+
+class FileWatcher:
+    """Reports which of a set of files changed since the last poll."""
+
+    def __init__(self, paths: Iterable[str], interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self._states: Dict[str, FileState] = {}
+        self.set_paths(paths)
+
+    @property
+    def paths(self) -> List[str]:
+        return list(self._states)
+
+    def set_paths(self, paths: Iterable[str]):
+        """Replace the watched files, keeping the known state of files still watched."""
+        self._states = {
+            path: self._states[path] if path in self._states else file_state(path)
+            for path in dict.fromkeys(paths)
+        }
+
+    def poll(self) -> List[str]:
+        """Return the watched files that changed since the previous poll."""
+        changed = []
+        for path, previous in self._states.items():
+            current = file_state(path)
+            if current != previous:
+                self._states[path] = current
+                changed.append(path)
+        return changed
+
+    def wait(self, stop: Optional[threading.Event] = None) -> List[str]:
+        """Block until a watched file changes and return the changed files.
+
+        Returns an empty list if stop is set first.
+        """
+        while stop is None or not stop.is_set():
+            changed = self.poll()
+            if changed:
+                # Collect follow-up writes of the same save
+                while True:
+                    time.sleep(SETTLE_DELAY)
+                    more = self.poll()
+                    if not more:
+                        return changed
+                    changed.extend(path for path in more if path not in changed)
+            if stop is not None:
+                stop.wait(self.interval)
+            else:
+                time.sleep(self.interval)
+        return []
+
+
+def watch(
+    paths: Callable[[], Iterable[str]],
+    on_change: Callable[[List[str]], None],
+    interval: float = DEFAULT_INTERVAL,
+    stop: Optional[threading.Event] = None,
+    watcher: Optional[FileWatcher] = None,
+):
+    """Call on_change with the changed files every time a watched file changes.
+
+    paths is called again after every change, so the set of watched files
+    can follow the configuration (e.g. data files it references). A watcher
+    created earlier also reports the changes made since it was created.
+    Runs until stop is set or the process is interrupted.
+    """
+    if watcher is None:
+        watcher = FileWatcher(paths(), interval)
+    while stop is None or not stop.is_set():
+        changed = watcher.wait(stop)
+        if not changed:
+            break
+        on_change(changed)
+        watcher.set_paths(paths())
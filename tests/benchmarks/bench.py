@@ -0,0 +1,364 @@
+"""
+Generator benchmarks over synthetic configurations.
+
+Times and memory-profiles each stage of the pipeline (validation, parsing,
+generate(), the description docx and the skeleton zips), writes the results
+as JSON and compares them against a stored baseline.
+
+Usage:
+    python -m tests.benchmarks.bench --output bench.json
+    python -m tests.benchmarks.bench --baseline tests/benchmarks/baseline.json --threshold 0.5
+    python -m tests.benchmarks.bench --sizes 1 10 100 --update-baseline
+    python -m tests.benchmarks.bench --parse [path/to/config.yaml]
+    python -m tests.benchmarks.bench --rules 1000 10000 100000
+    python -m tests.benchmarks.bench --startup
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+
+from autograder_gen import __version__
+from autograder_gen.config import AutograderConfig, ConfigParser, LoadedConfig
+from autograder_gen.generator import AutograderGenerator
+from autograder_gen.rules import default_rules
+from autograder_gen.utils import allow_gc_pauses
+from autograder_gen.validator import ConfigValidator
+from tests.benchmarks.synthetic import MIXES, synthesize_config
+
+# Measure the library as the CLI runs it, pausing the collector in large builds
+allow_gc_pauses()
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+EXAMPLES_DIR = Path(__file__).parent.parent / "examples"
+CLI_PATH = Path(__file__).parent.parent.parent / "autograder_gen" / "cli.py"
+
+DEFAULT_SIZES = (1, 10, 100, 1000, 10000)
+# Marking item counts of the validation rule benchmark
+DEFAULT_RULE_ITEMS = (1000, 10000, 100000)
+DEFAULT_THRESHOLD = 0.5
+
+# CLI runs timed by the startup benchmark, with the options after --config
+STARTUP_COMMANDS = {
+    "validate_only": ["--validate-only"],
+    "generate": [],
+    "description": ["--with-description"],
+}
+# Dependencies that take long to import and only some runs need
+HEAVY_MODULES = ("docx", "lxml", "jinja2")
+
+# Differences below these floors are treated as noise, whatever the ratio
+MIN_SECONDS = 0.005
+MIN_PEAK_BYTES = 256 * 1024
+
+STAGES = ("validate", "parse", "generate", "description", "skeletons")
+
+
+def measure(func: Callable[[], Any], repeat: int = 3, memory: bool = True) -> Dict[str, Any]:
+    """Best wall time of repeat runs and, optionally, peak traced allocation of one more."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    result: Dict[str, Any] = {"seconds": best}
+    if memory:
+        # Measured in a separate run, since tracing slows down allocation-heavy code
+        tracemalloc.start()
+        try:
+            func()
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def case_name(questions: int, mix: str, payload_size: int) -> str:
+    return f"{mix}-q{questions}-p{payload_size}"
+
+
+def benchmark_case(
+    questions: int,
+    mix: str = "balanced",
+    payload_size: int = 64,
+    items_per_question: int = 4,
+    repeat: int = 3,
+    memory: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """Benchmark every stage for one synthesized configuration."""
+    data = synthesize_config(
+        questions, items_per_question=items_per_question, mix=mix, payload_size=payload_size
+    )
+    config = AutograderConfig.model_validate(data)
+    generator = AutograderGenerator(config, data)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = Path(temp_dir) / "config.yaml"
+        config_path.write_text(yaml.safe_dump(data, sort_keys=False), encoding="utf-8")
+        output_dir = str(Path(temp_dir) / "output")
+
+        def skeletons():
+            generator.generate_correct_answer_zip()
+            generator.generate_wrong_answer_zip()
+
+        stages = {
+            "validate": lambda: ConfigValidator().validate_json(data),
+            "parse": lambda: ConfigParser(str(config_path)).parse(),
+            "generate": lambda: generator.generate(output_dir),
+            "description": generator.generate_description_docx,
+            "skeletons": skeletons,
+        }
+        return {name: measure(func, repeat, memory) for name, func in stages.items()}
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES,
+    mixes=("balanced",),
+    payload_sizes=(64,),
+    repeat: int = 3,
+    memory: bool = True,
+) -> Dict[str, Any]:
+    """Run every combination of size, mix and payload size."""
+    cases = {}
+    for mix in mixes:
+        for payload_size in payload_sizes:
+            for questions in sizes:
+                # Large configs are only run once; their timings are stable enough
+                case_repeat = repeat if questions < 1000 else 1
+                cases[case_name(questions, mix, payload_size)] = benchmark_case(
+                    questions, mix, payload_size, repeat=case_repeat, memory=memory
+                )
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": cases,
+    }
+
+
+def largest_example() -> Path:
+    """The largest example configuration shipped with the tests."""
+    return max(EXAMPLES_DIR.glob("*/config.yaml"), key=lambda path: path.stat().st_size)
+
+
+def parse_benchmark(config_path: Optional[str] = None, repeat: int = 3) -> Dict[str, Any]:
+    """Time parsing one config with the pure-Python YAML loader, libyaml and json.
+
+    The config (the largest example by default) is parsed from its YAML
+    form and from the equivalent JSON document.
+    """
+    path = Path(config_path) if config_path else largest_example()
+    data = LoadedConfig.from_file(str(path)).data
+    yaml_raw = yaml.safe_dump(data, sort_keys=False).encode("utf-8")
+    json_raw = json.dumps(data).encode("utf-8")
+
+    parsers: Dict[str, Callable[[], Any]] = {
+        "yaml": lambda: yaml.load(yaml_raw, Loader=yaml.SafeLoader),
+    }
+    if hasattr(yaml, "CSafeLoader"):
+        parsers["yaml_libyaml"] = lambda: yaml.load(yaml_raw, Loader=yaml.CSafeLoader)
+    parsers["json"] = lambda: json.loads(json_raw)
+
+    return {
+        "config": str(path),
+        "yaml_bytes": len(yaml_raw),
+        "json_bytes": len(json_raw),
+        "parsers": {name: measure(func, repeat, memory=False) for name, func in parsers.items()},
+    }
+
+
+def rules_benchmark(
+    item_counts: List[int] = list(DEFAULT_RULE_ITEMS), repeat: int = 3
+) -> Dict[str, Any]:
+    """Time validation on configs with item_counts marking items.
+
+    Configs have 10 items per question and one necessary file per 10 items,
+    so rules that are linear in items x files or in questions squared show
+    up as a growing time per item. Reports the rule pass alone and the whole
+    validation (pydantic plus rules).
+    """
+    cases = {}
+    for items in item_counts:
+        questions = max(1, items // 10)
+        data = synthesize_config(
+            questions, items_per_question=10, payload_size=16, files=questions
+        )
+        config = AutograderConfig.model_validate(data)
+        stages = {
+            "rules": measure(lambda: default_rules.run(config), repeat, memory=False),
+            "validate": measure(
+                lambda: ConfigValidator().validate_json(data), repeat, memory=False
+            ),
+        }
+        for stage in stages.values():
+            stage["us_per_item"] = stage["seconds"] / (questions * 10) * 1e6
+        cases[str(questions * 10)] = stages
+    return {"items": cases}
+
+
+def import_times(args: List[str]) -> Dict[str, int]:
+    """Run python -X importtime with args and return the modules it imported.
+
+    Maps every module to its cumulative import time in microseconds. The
+    modules imported directly by the script (rather than by another module)
+    are the keys without a leading space.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            # Drop the separator's space, keeping the nesting indentation
+            modules[name[1:]] = int(cumulative)
+    return modules
+
+
+def startup_benchmark(
+    commands: List[str] = list(STARTUP_COMMANDS), repeat: int = 3
+) -> Dict[str, Any]:
+    """Time the startup of CLI runs on the smallest example with -X importtime.
+
+    Reports the wall time of the fastest run, the time it spent importing
+    modules and which of HEAVY_MODULES it imported.
+    """
+    config = min(EXAMPLES_DIR.glob("*/config.yaml"), key=lambda path: path.stat().st_size)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in commands:
+            args = [
+                str(CLI_PATH),
+                "--config",
+                str(config),
+                "--output",
+                str(Path(tmp) / name),
+                "--no-daemon",
+                *STARTUP_COMMANDS[name],
+            ]
+            runs = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                modules = import_times(args)
+                runs.append((time.perf_counter() - started, modules))
+            seconds, modules = min(runs, key=lambda run: run[0])
+            imported = {module.strip() for module in modules}
+            results[name] = {
+                "seconds": seconds,
+                "import_seconds": sum(
+                    us for module, us in modules.items() if not module.startswith(" ")
+                )
+                / 1e6,
+                "heavy_modules": [
+                    heavy
+                    for heavy in HEAVY_MODULES
+                    if any(m == heavy or m.startswith(heavy + ".") for m in imported)
+                ],
+            }
+    return {"commands": results}
+
+
+def compare_to_baseline(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD
+) -> List[str]:
+    """List every stage that is slower or uses more memory than baseline * (1 + threshold)."""
+    regressions = []
+    for case, stages in results["cases"].items():
+        baseline_stages = baseline.get("cases", {}).get(case)
+        if baseline_stages is None:
+            continue
+        for stage, current in stages.items():
+            previous = baseline_stages.get(stage)
+            if previous is None:
+                continue
+            for metric, floor in (("seconds", MIN_SECONDS), ("peak_bytes", MIN_PEAK_BYTES)):
+                if metric not in current or metric not in previous:
+                    continue
+                limit = previous[metric] * (1 + threshold)
+                if current[metric] > limit and current[metric] - previous[metric] > floor:
+                    regressions.append(
+                        f"{case} {stage} {metric}: {current[metric]:.4g} > "
+                        f"{previous[metric]:.4g} (+{threshold:.0%} allowed)"
+                    )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the autograder generator")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Numbers of questions to synthesize")
+    parser.add_argument("--mixes", nargs="+", default=["balanced"], choices=sorted(MIXES),
+                        help="Marking item type mixes")
+    parser.add_argument("--payload-sizes", type=int, nargs="+", default=[64],
+                        help="Approximate size of descriptions and expected outputs")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--no-memory", action="store_true", help="Skip memory profiling")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against this baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative regression, e.g. 0.5 for +50%%")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help=f"Store the results as the new baseline ({BASELINE_PATH.name})")
+    parser.add_argument("--parse", nargs="?", const="", metavar="CONFIG",
+                        help="Only compare YAML, libyaml and JSON parse times on CONFIG "
+                        "(default: the largest example)")
+    parser.add_argument("--rules", type=int, nargs="*", metavar="ITEMS",
+                        help="Only time validation on configs with this many marking items "
+                        f"(default: {' '.join(map(str, DEFAULT_RULE_ITEMS))})")
+    parser.add_argument("--startup", nargs="*", choices=sorted(STARTUP_COMMANDS),
+                        metavar="COMMAND",
+                        help="Only time CLI startup and imports with python -X importtime "
+                        f"(default: {' '.join(STARTUP_COMMANDS)})")
+    args = parser.parse_args(argv)
+
+    if args.parse is not None:
+        print(json.dumps(parse_benchmark(args.parse or None, args.repeat), indent=2))
+        return 0
+    if args.rules is not None:
+        item_counts = args.rules or list(DEFAULT_RULE_ITEMS)
+        print(json.dumps(rules_benchmark(item_counts, args.repeat), indent=2))
+        return 0
+    if args.startup is not None:
+        commands = args.startup or list(STARTUP_COMMANDS)
+        print(json.dumps(startup_benchmark(commands, args.repeat), indent=2))
+        return 0
+
+    results = run_benchmarks(
+        args.sizes, args.mixes, args.payload_sizes, args.repeat, memory=not args.no_memory
+    )
+    results_json = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(results_json, encoding="utf-8")
+    else:
+        print(results_json)
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(results_json + "\n", encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Synthetic assessment configurations for benchmarking the generator.
+"""
+
+import random
+from typing import Any, Dict, List
+
+ITEM_TYPES = ("file_exists", "output_comparison", "signature_check", "function_test")
+
+# Relative weights of each item type in a synthesized question
+MIXES = {
+    "balanced": {item_type: 1 for item_type in ITEM_TYPES},
+    "output_heavy": {"file_exists": 1, "output_comparison": 6, "signature_check": 1, "function_test": 1},
+    "function_heavy": {"file_exists": 1, "output_comparison": 1, "signature_check": 2, "function_test": 6},
+}
+
+VISIBILITIES = ("visible", "hidden", "after_due_date", "after_published")
+
+
+def _payload(rng: random.Random, size: int) -> str:
+    """Multi-line text of roughly size characters."""
+    words = []
+    length = 0
+    while length < size:
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+        words.append(word + ("\n" if rng.random() < 0.1 else " "))
+        length += len(words[-1])
+    return "".join(words).strip() or "x"
+
+
+def _marking_item(
+    rng: random.Random, item_type: str, question: int, index: int, target_file: str, payload_size: int
+) -> Dict[str, Any]:
+    function_name = f"func_{question}_{index}"
+    item: Dict[str, Any] = {
+        "name": f"Q{question} item {index} ({item_type})",
+        "target_file": target_file,
+        "total_mark": rng.randint(1, 10),
+        "type": item_type,
+        "time_limit": rng.choice((5, 10, 30)),
+        "visibility": rng.choice(VISIBILITIES),
+    }
+    if item_type == "output_comparison":
+        item["expected_input"] = _payload(rng, payload_size // 4)
+        item["expected_output"] = _payload(rng, payload_size)
+    elif item_type == "signature_check":
+        item["function_name"] = function_name
+        item["expected_parameters"] = "a: int, b: str = 'x', *args, flag: bool = False"
+        item["expected_return_type"] = "dict"
+    elif item_type == "function_test":
+        item["function_name"] = function_name
+        item["test_cases"] = [
+            {
+                "args": [rng.randint(0, 100), _payload(rng, payload_size // 8)],
+                "expected": repr(_payload(rng, payload_size // 4)),
+            }
+            for _ in range(rng.randint(1, 4))
+        ]
+    return item
+
+
+def synthesize_config(
+    questions: int,
+    items_per_question: int = 4,
+    mix: str = "balanced",
+    payload_size: int = 64,
+    files: int = 5,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Build a valid Python assessment config of the requested shape.
+
+    The same arguments always produce the same config.
+    """
+    rng = random.Random(seed)
+    weights = MIXES[mix]
+    types = list(weights)
+    files_necessary: List[str] = [f"module_{n}.py" for n in range(1, files + 1)]
+
+    question_list = []
+    for number in range(1, questions + 1):
+        item_types = rng.choices(types, weights=[weights[t] for t in types], k=items_per_question)
+        question_list.append(
+            {
+                "name": f"Question {number}",
+                "description": _payload(rng, payload_size),
+                "marking_items": [
+                    _marking_item(rng, item_type, number, index, rng.choice(files_necessary), payload_size)
+                    for index, item_type in enumerate(item_types, 1)
+                ],
+            }
+        )
+
+    return {
+        "version": "1.0",
+        "language": "python",
+        "global_time_limit": 300,
+        "setup_commands": ["pip install numpy"],
+        "files_necessary": files_necessary,
+        "questions": question_list,
+    }
+
+
+def large_output_config(questions: int, payload_size: int, seed: int = 0) -> Dict[str, Any]:
+    """A config whose questions each carry one expected output of payload_size characters."""
+    rng = random.Random(seed)
+    return {
+        "version": "1.0",
+        "language": "python",
+        "files_necessary": ["solution.py"],
+        "questions": [
+            {
+                "name": f"Question {number}",
+                "marking_items": [
+                    {
+                        "target_file": "solution.py",
+                        "total_mark": 10,
+                        "type": "output_comparison",
+                        "expected_output": _payload(rng, payload_size),
+                    }
+                ],
+            }
+            for number in range(1, questions + 1)
+        ],
+    }
@@ -0,0 +1,134 @@
+import json
+import os
+import tracemalloc
+
+import pytest
+
+from autograder_gen.config import AutograderConfig
+from autograder_gen.generator import AutograderGenerator
+from autograder_gen.validator import ConfigValidator
+from tests.benchmarks.bench import (
+    BASELINE_PATH,
+    DEFAULT_THRESHOLD,
+    STAGES,
+    benchmark_case,
+    compare_to_baseline,
+    import_times,
+    parse_benchmark,
+    rules_benchmark,
+    run_benchmarks,
+    startup_benchmark,
+)
+from tests.benchmarks.synthetic import (
+    ITEM_TYPES,
+    MIXES,
+    large_output_config,
+    synthesize_config,
+)
+
+
+@pytest.mark.parametrize("mix", sorted(MIXES))
+def test_synthetic_configs_are_valid(mix):
+    data = synthesize_config(25, mix=mix, payload_size=128)
+    validator = ConfigValidator()
+    assert validator.validate_json(data), validator.get_errors()
+    config = AutograderConfig.model_validate(data)
+    assert len(config.questions) == 25
+
+
+def test_synthetic_configs_are_deterministic():
+    assert synthesize_config(10, seed=3) == synthesize_config(10, seed=3)
+    assert synthesize_config(10, seed=3) != synthesize_config(10, seed=4)
+
+
+def test_synthetic_configs_cover_every_item_type():
+    data = synthesize_config(50)
+    types = {item["type"] for q in data["questions"] for item in q["marking_items"]}
+    assert types == set(ITEM_TYPES)
+
+
+def test_benchmark_case_reports_every_stage():
+    result = benchmark_case(1, repeat=1)
+    assert set(result) == set(STAGES)
+    for stage in result.values():
+        assert stage["seconds"] >= 0
+        assert stage["peak_bytes"] > 0
+
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = {"cases": {"c": {"generate": {"seconds": 1.0, "peak_bytes": 10_000_000}}}}
+    same = {"cases": {"c": {"generate": {"seconds": 1.2, "peak_bytes": 10_000_000}}}}
+    slower = {"cases": {"c": {"generate": {"seconds": 2.0, "peak_bytes": 10_000_000}}}}
+    bigger = {"cases": {"c": {"generate": {"seconds": 1.0, "peak_bytes": 40_000_000}}}}
+
+    assert compare_to_baseline(same, baseline, 0.5) == []
+    assert len(compare_to_baseline(slower, baseline, 0.5)) == 1
+    assert len(compare_to_baseline(bigger, baseline, 0.5)) == 1
+    assert compare_to_baseline(slower, baseline, 1.5) == []
+
+
+def test_compare_to_baseline_ignores_noise_and_unknown_cases():
+    baseline = {"cases": {"c": {"validate": {"seconds": 0.0001}}}}
+    assert compare_to_baseline({"cases": {"c": {"validate": {"seconds": 0.001}}}}, baseline) == []
+    assert compare_to_baseline({"cases": {"new": {"validate": {"seconds": 9.0}}}}, baseline) == []
+
+
+def test_validation_rules_scale_linearly():
+    result = rules_benchmark([2000, 20000], repeat=3)["items"]
+    small, large = result["2000"], result["20000"]
+    # Ten times the items (and files, and questions) takes about ten times as long
+    assert large["rules"]["us_per_item"] < 3 * small["rules"]["us_per_item"]
+    assert large["validate"]["us_per_item"] < 3 * small["validate"]["us_per_item"]
+
+
+def test_parse_benchmark_times_every_parser():
+    result = parse_benchmark(repeat=1)
+    assert result["config"].endswith("config.yaml")
+    assert {"yaml", "json"} <= set(result["parsers"])
+    for parser in result["parsers"].values():
+        assert parser["seconds"] >= 0
+
+
+def test_cli_startup_only_imports_what_the_run_needs():
+    result = startup_benchmark(repeat=1)["commands"]
+    assert result["validate_only"]["heavy_modules"] == []
+    assert result["generate"]["heavy_modules"] == ["jinja2"]
+    assert {"docx", "lxml"} <= set(result["description"]["heavy_modules"])
+    for command in result.values():
+        assert 0 < command["import_seconds"] < command["seconds"]
+
+    modules = {m.strip() for m in import_times(["-c", "import autograder_gen.generator"])}
+    assert "autograder_gen.generator" in modules
+    assert not modules & {"docx", "lxml", "jinja2"}
+
+
+def test_generate_peak_memory_does_not_grow_with_large_questions(tmp_path):
+    payload_size = 32 * 1024
+    peaks = {}
+    for questions in (2, 8):
+        data = large_output_config(questions, payload_size)
+        generator = AutograderGenerator(AutograderConfig.model_validate(data), data)
+        tracemalloc.start()
+        try:
+            generator.generate(str(tmp_path / str(questions)))
+            peaks[questions] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # Files are streamed one at a time, so six more questions must cost less
+    # than their payloads; copies of the whole config would cost several times more
+    assert peaks[8] - peaks[2] < 6 * payload_size
+
+
+@pytest.mark.skipif(
+    not os.environ.get("AUTOGRADER_BENCH"),
+    reason="set AUTOGRADER_BENCH=1 to run the benchmark regression check",
+)
+def test_no_regression_against_baseline():
+    sizes = [int(s) for s in os.environ.get("AUTOGRADER_BENCH_SIZES", "1 10 100").split()]
+    threshold = float(os.environ.get("AUTOGRADER_BENCH_THRESHOLD", DEFAULT_THRESHOLD))
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+    results = run_benchmarks(sizes)
+    regressions = compare_to_baseline(results, baseline, threshold)
+    assert regressions == []
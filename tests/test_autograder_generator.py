@@ -1,3 +1,5 @@
+import io
+import json
 import os
 import zipfile
 import tempfile
@@ -6,7 +8,7 @@ import yaml
 import pytest
 
 from autograder_gen.generator import AutograderGenerator
-from autograder_gen.config import ConfigParser
+from autograder_gen.config import ConfigParser, LoadedConfig
 
 from autograder_gen.config import AutograderConfigModel
 
@@ -76,3 +78,167 @@ def test_autograder_zip_contains_expected_files(temp_output_dir):
         for idx, q in enumerate(SAMPLE_CONFIG_DICT["questions"], 1):
             test_file = f"tests/question_{idx}_test.py"
             assert test_file in namelist, f"Missing {test_file} in zip: {namelist}"
+
+
+def test_generate_to_bytes_builds_zip_in_memory():
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG_DICT)
+    generator = AutograderGenerator(config, SAMPLE_CONFIG_DICT)
+
+    data = generator.generate_to_bytes()
+
+    assert data.startswith(b"PK\x03\x04")
+    with zipfile.ZipFile(io.BytesIO(data), "r") as z:
+        assert "tests/question_1_test.py" in z.namelist()
+        assert z.testzip() is None
+
+
+def test_generate_to_stream_sets_executable_bits():
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG_DICT)
+    generator = AutograderGenerator(config, SAMPLE_CONFIG_DICT)
+
+    buffer = io.BytesIO()
+    generator.generate_to_stream(buffer)
+    buffer.seek(0)
+
+    with zipfile.ZipFile(buffer, "r") as z:
+        for name in ["setup.sh", "run_autograder"]:
+            mode = z.getinfo(name).external_attr >> 16
+            assert mode & 0o111, f"{name} should be executable"
+        mode = z.getinfo("run_tests.py").external_attr >> 16
+        assert not mode & 0o111
+
+
+def test_generate_does_not_leave_temp_files(temp_output_dir):
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG_DICT)
+    generator = AutograderGenerator(config, SAMPLE_CONFIG_DICT)
+    generator.generate(temp_output_dir)
+
+    assert os.listdir(temp_output_dir) == ["autograder.zip"]
+
+
+def test_parallel_rendering_matches_serial_output():
+    config_dict = {
+        **SAMPLE_CONFIG_DICT,
+        "questions": [
+            {
+                "name": f"Question {i}",
+                "marking_items": [
+                    {
+                        "target_file": "solution.py",
+                        "total_mark": i,
+                        "type": "file_exists",
+                        "name": f"check_{i}",
+                    }
+                ],
+            }
+            for i in range(1, 7)
+        ],
+    }
+    config = AutograderConfigModel.model_validate(config_dict)
+
+    def read_entries(data):
+        with zipfile.ZipFile(io.BytesIO(data), "r") as z:
+            return [(name, z.read(name)) for name in z.namelist()]
+
+    serial = AutograderGenerator(config, config_dict).generate_to_bytes()
+    parallel = AutograderGenerator(config, config_dict, jobs=3).generate_to_bytes()
+
+    assert read_entries(parallel) == read_entries(serial)
+
+
+def test_generate_all_writes_every_artifact(tmp_path):
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG_DICT)
+    generator = AutograderGenerator(config, SAMPLE_CONFIG_DICT)
+    artifacts = generator.generate_all(
+        str(tmp_path), with_description=True, with_skeletons=True
+    )
+
+    assert sorted(artifacts) == [
+        "autograder.zip",
+        "correct_answer.zip",
+        "description.docx",
+        "wrong_answer.zip",
+    ]
+    for name, artifact in artifacts.items():
+        assert artifact["path"] == str(tmp_path / name)
+        assert artifact["seconds"] >= 0
+        assert not artifact["cached"]
+    assert (tmp_path / "autograder.zip").read_bytes() == generator.generate_to_bytes()
+    assert (tmp_path / "correct_answer.zip").read_bytes() == (
+        generator.generate_correct_answer_zip().getvalue()
+    )
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(artifacts)
+
+
+def test_generate_all_reuses_cached_artifacts(tmp_path):
+    from autograder_gen.cache import PackageCache
+
+    cache = PackageCache(str(tmp_path / "cache"))
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG_DICT)
+    generator = AutograderGenerator(config, SAMPLE_CONFIG_DICT, reproducible=True)
+
+    first = generator.generate_all(str(tmp_path / "a"), with_skeletons=True, cache=cache)
+    second = generator.generate_all(str(tmp_path / "b"), with_skeletons=True, cache=cache)
+
+    assert not any(artifact["cached"] for artifact in first.values())
+    assert all(artifact["cached"] for artifact in second.values())
+    assert first["autograder.zip"]["sha256"] == second["autograder.zip"]["sha256"]
+
+
+def test_loaded_config_is_packaged_verbatim(tmp_path):
+    raw = (
+        "# Week 3 assessment\n"
+        + yaml.dump(SAMPLE_CONFIG_DICT, sort_keys=False)
+        + "# end of config\n"
+    ).encode("utf-8")
+    config_path = tmp_path / "config.yaml"
+    config_path.write_bytes(raw)
+
+    loaded = LoadedConfig.from_file(str(config_path))
+    assert loaded.data == SAMPLE_CONFIG_DICT
+    assert loaded.model is loaded.model
+
+    for reproducible in (False, True):
+        data = AutograderGenerator(loaded, reproducible=reproducible).generate_to_bytes()
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.read("autograder_config.yaml") == raw
+
+
+def test_service_parses_config_file_once(tmp_path, monkeypatch):
+    from autograder_gen.daemon import GeneratorService
+
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(SAMPLE_CONFIG_DICT), encoding="utf-8")
+    calls = []
+    load = yaml.load
+    monkeypatch.setattr(yaml, "load", lambda *a, **k: calls.append(a) or load(*a, **k))
+
+    response = GeneratorService().handle(
+        {
+            "action": "generate",
+            "config": str(config_path),
+            "output": str(tmp_path / "out"),
+            "with_description": True,
+        }
+    )
+
+    assert response["ok"] and response["valid"], response
+    assert len(calls) == 1
+
+
+def test_json_and_yaml_configs_load_the_same(tmp_path):
+    yaml_path = tmp_path / "config.yaml"
+    yaml_path.write_text(yaml.dump(SAMPLE_CONFIG_DICT), encoding="utf-8")
+    json_path = tmp_path / "config.json"
+    json_path.write_text(json.dumps(SAMPLE_CONFIG_DICT), encoding="utf-8")
+
+    from_yaml = LoadedConfig.from_file(str(yaml_path))
+    from_json = LoadedConfig.from_file(str(json_path))
+    assert from_json.format == "json"
+    assert from_json.data == from_yaml.data == SAMPLE_CONFIG_DICT
+    assert ConfigParser(str(json_path)).parse() == from_yaml.model
+
+    toml_path = tmp_path / "config.toml"
+    toml_path.write_text("version = '1.0'", encoding="utf-8")
+    with pytest.raises(ValueError, match="Only YAML"):
+        LoadedConfig.from_file(str(toml_path))
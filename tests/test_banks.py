@@ -0,0 +1,171 @@
+import os
+import zipfile
+
+import pytest
+import yaml
+
+from autograder_gen import banks
+from autograder_gen.batch import configs_from_directory, generate_many
+from autograder_gen.config import LoadedConfig
+from autograder_gen.generator import AutograderGenerator
+from autograder_gen.validator import ConfigValidator
+
+
+def question(name):
+    return {
+        "name": name,
+        "marking_items": [
+            {"target_file": "solution.py", "total_mark": 5, "type": "file_exists"}
+        ],
+    }
+
+
+def write_yaml(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(data, sort_keys=False))
+    return path
+
+
+def config(questions_from, questions=()):
+    return {
+        "version": "1.0",
+        "language": "python",
+        "files_necessary": ["solution.py"],
+        "questions_from": questions_from,
+        "questions": list(questions),
+    }
+
+
+@pytest.fixture
+def bank(tmp_path):
+    return write_yaml(
+        tmp_path / "banks" / "basics.yaml",
+        {"questions": [question("Loops"), question("Lists"), question("Strings")]},
+    )
+
+
+def test_questions_are_taken_from_banks(tmp_path, bank):
+    path = write_yaml(
+        tmp_path / "course" / "week1.yaml",
+        config(
+            [
+                {"file": "../banks/basics.yaml", "questions": ["Strings", "Loops"]},
+            ],
+            [question("Own")],
+        ),
+    )
+    loaded = LoadedConfig.from_file(str(path))
+
+    assert [q.name for q in loaded.model.questions] == ["Strings", "Loops", "Own"]
+    assert loaded.includes == [str(bank.resolve())]
+
+    # The package holds the resolved config, which doesn't need the bank
+    generator = AutograderGenerator(loaded)
+    with zipfile.ZipFile(generator.generate(str(tmp_path / "output"))) as z:
+        packaged = yaml.safe_load(z.read("autograder_config.yaml"))
+        assert "tests/question_3_test.py" in z.namelist()
+    assert "questions_from" not in packaged
+    assert [q["name"] for q in packaged["questions"]] == ["Strings", "Loops", "Own"]
+
+
+def test_banks_are_parsed_once_until_they_change(tmp_path, bank, monkeypatch):
+    parsed = []
+    parse = banks.parse_config_bytes
+    monkeypatch.setattr(
+        banks, "parse_config_bytes", lambda *args: parsed.append(1) or parse(*args)
+    )
+    path = write_yaml(tmp_path / "a.yaml", config(["banks/basics.yaml"]))
+    write_yaml(tmp_path / "b.yaml", config(["banks/basics.yaml"]))
+
+    first = LoadedConfig.from_file(str(path))
+    assert len(first.model.questions) == 3
+    LoadedConfig.from_file(str(tmp_path / "b.yaml")).model
+    assert len(parsed) == 1
+
+    write_yaml(bank, {"questions": [question("Loops")]})
+    stat = bank.stat()
+    os.utime(bank, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert first.includes_changed()
+    second = LoadedConfig.from_file(str(path))
+    assert len(second.model.questions) == 1
+    assert second.digest != first.digest
+    assert len(parsed) == 2
+
+
+def test_unusable_banks_are_reported(tmp_path, bank):
+    validator = ConfigValidator()
+    cases = {
+        "missing.yaml": (["banks/nope.yaml"], "Question bank not found"),
+        "unknown.yaml": (
+            [{"file": "banks/basics.yaml", "questions": ["Nope"]}],
+            "'Nope' not found in question bank",
+        ),
+        "cycle.yaml": (["banks/cycle_a.yaml"], "Include cycle"),
+    }
+    write_yaml(tmp_path / "banks" / "cycle_a.yaml", {"questions_from": ["cycle_b.yaml"]})
+    write_yaml(tmp_path / "banks" / "cycle_b.yaml", {"questions_from": ["cycle_a.yaml"]})
+    for name, (questions_from, message) in cases.items():
+        path = write_yaml(tmp_path / name, config(questions_from))
+        assert not validator.validate_from_file(str(path))
+        assert message in validator.get_errors()[0]
+
+    # Configs that aren't files have nothing to resolve bank paths against
+    assert not validator.validate_json(config(["banks/basics.yaml"], [question("Q")]))
+    assert "only be used in configuration files" in validator.get_errors()[0]
+
+
+def test_batch_only_regenerates_configs_using_a_changed_bank(tmp_path, bank):
+    configs = tmp_path / "configs"
+    write_yaml(configs / "week1.yaml", config(["../banks/basics.yaml"]))
+    write_yaml(configs / "week2.yaml", config([], [question("Own")]))
+
+    summary = generate_many(
+        configs_from_directory(str(configs)),
+        str(tmp_path / "output"),
+        changed=[str(bank)],
+    )
+
+    statuses = {r["name"]: r["status"] for r in summary["results"]}
+    assert statuses == {"week1": "ok", "week2": "unchanged"}
+    assert summary["unchanged"] == 1 and summary["failed"] == 0
+    assert summary["results"][0]["includes"] == [str(bank.resolve())]
+    assert not (tmp_path / "output" / "week2").exists()
+
+
+def test_batch_skips_banks_and_data_files_in_the_config_directory(tmp_path):
+    course = tmp_path / "course"
+    write_yaml(course / "banks" / "basics.yaml", {"questions": [question("Loops")]})
+    (course / "data").mkdir()
+    (course / "data" / "cases.json").write_text('[{"input": "1"}]')
+    write_yaml(course / "week1.yaml", config(["banks/basics.yaml"]))
+
+    summary = generate_many(configs_from_directory(str(course)), str(tmp_path / "output"))
+
+    assert [r["name"] for r in summary["results"]] == ["week1"]
+    assert summary["failed"] == 0
+
+
+def test_batch_regenerates_configs_using_a_changed_data_file(tmp_path):
+    course = tmp_path / "course"
+    course.mkdir()
+    (course / "out.txt").write_text("42\n")
+    with_data = config([], [question("Own")])
+    with_data["questions"][0]["marking_items"].append(
+        {
+            "target_file": "solution.py",
+            "total_mark": 5,
+            "type": "output_comparison",
+            "expected_output_file": "out.txt",
+        }
+    )
+    write_yaml(course / "a.yaml", with_data)
+    write_yaml(course / "b.yaml", config([], [question("Own")]))
+
+    summary = generate_many(
+        configs_from_directory(str(course)),
+        str(tmp_path / "output"),
+        changed=[str(course / "out.txt")],
+    )
+
+    statuses = {r["name"]: r["status"] for r in summary["results"]}
+    assert statuses == {"a": "ok", "b": "unchanged"}
@@ -0,0 +1,118 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import yaml
+
+from autograder_gen.batch import configs_from_glob, configs_from_stream, generate_many
+
+SAMPLE_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py"],
+    "questions": [
+        {
+            "name": "Q1",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 10, "type": "file_exists"}
+            ],
+        }
+    ],
+}
+
+INVALID_CONFIG = {"version": "1.0", "language": "python"}
+
+
+def test_generate_many_reports_successes_and_failures(tmp_path):
+    summary = generate_many(
+        [("week1", SAMPLE_CONFIG), ("broken", INVALID_CONFIG), SAMPLE_CONFIG],
+        str(tmp_path),
+    )
+
+    assert summary["total"] == 3
+    assert summary["succeeded"] == 2
+    assert summary["failed"] == 1
+    statuses = {r["name"]: r["status"] for r in summary["results"]}
+    assert statuses == {"week1": "ok", "broken": "invalid", "config_3": "ok"}
+    assert (tmp_path / "week1" / "autograder.zip").exists()
+    assert (tmp_path / "config_3" / "autograder.zip").exists()
+    assert "total" in summary["results"][0]["seconds"]
+
+
+def test_generate_many_with_worker_pool_keeps_order(tmp_path):
+    configs = [(f"a{i}", SAMPLE_CONFIG) for i in range(5)]
+
+    summary = generate_many(configs, str(tmp_path), jobs=2)
+
+    assert [r["name"] for r in summary["results"]] == [f"a{i}" for i in range(5)]
+    assert summary["failed"] == 0
+
+
+def test_unreadable_config_files_report_the_os_error(tmp_path, monkeypatch):
+    (tmp_path / "week1.yaml").write_text(yaml.safe_dump(SAMPLE_CONFIG))
+
+    def denied(self):
+        raise PermissionError(13, "Permission denied", str(self))
+
+    monkeypatch.setattr(Path, "read_bytes", denied)
+    [(name, error)] = configs_from_glob(str(tmp_path / "*.yaml"))
+
+    assert name == "week1"
+    assert "Could not read configuration file" in str(error)
+    assert "Permission denied" in str(error)
+
+
+def test_generate_many_uses_the_package_cache_and_incremental_builds(tmp_path):
+    configs = [("week1", SAMPLE_CONFIG), ("week2", SAMPLE_CONFIG)]
+    options = {"cache_dir": str(tmp_path / "cache")}
+
+    first = generate_many(configs, str(tmp_path / "a"), **options)
+    second = generate_many(configs, str(tmp_path / "b"), **options)
+    assert [r["cached"] for r in first["results"]] == [False, True]
+    assert [r["cached"] for r in second["results"]] == [True, True]
+
+    generate_many(configs, str(tmp_path / "c"), incremental=True)
+    summary = generate_many(configs, str(tmp_path / "c"), incremental=True)
+    assert [r["rebuilt"] for r in summary["results"]] == [[], []]
+
+
+def test_configs_from_stream_reads_each_document(tmp_path):
+    stream_path = tmp_path / "course.yaml"
+    stream_path.write_text(yaml.safe_dump_all([SAMPLE_CONFIG, SAMPLE_CONFIG]))
+
+    configs = list(configs_from_stream(str(stream_path)))
+
+    assert [name for name, _ in configs] == ["course_1", "course_2"]
+    assert configs[0][1] == SAMPLE_CONFIG
+
+
+def test_cli_batch_from_directory(tmp_path):
+    course_dir = tmp_path / "course"
+    (course_dir / "week1").mkdir(parents=True)
+    (course_dir / "week1" / "config.yaml").write_text(json.dumps(SAMPLE_CONFIG))
+    (course_dir / "week2.yaml").write_text(json.dumps(SAMPLE_CONFIG))
+    (course_dir / "broken.yaml").write_text("questions: [unclosed")
+    summary_path = tmp_path / "summary.json"
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "autograder_gen/cli.py",
+            "--config-dir",
+            str(course_dir),
+            "--output",
+            str(tmp_path / "output"),
+            "--summary",
+            str(summary_path),
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 1
+    summary = json.loads(summary_path.read_text())
+    statuses = {r["name"]: r["status"] for r in summary["results"]}
+    assert statuses == {"broken": "error", "week1": "ok", "week2": "ok"}
+    assert (tmp_path / "output" / "week1" / "autograder.zip").exists()
+    assert (tmp_path / "output" / "week2" / "autograder.zip").exists()
@@ -92,3 +92,53 @@ def test_cli_generates_all_assets(tmp_path):
     assert (output_dir / "description.docx").exists()
     assert (output_dir / "correct_answer.zip").exists()
     assert (output_dir / "wrong_answer.zip").exists()
+
+
+def test_cli_verbose_reports_artifact_timings(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    with open(config_path, "w") as f:
+        json.dump(SAMPLE_CONFIG, f)
+    output_dir = tmp_path / "output"
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "autograder_gen/cli.py",
+            "--config",
+            str(config_path),
+            "--output",
+            str(output_dir),
+            "--with-description",
+            "--with-skeletons",
+            "--verbose",
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, f"CLI failed: {result.stderr}"
+    for name in ["autograder.zip", "description.docx", "correct_answer.zip", "wrong_answer.zip"]:
+        assert f"[INFO] {name}: " in result.stdout
+
+
+def test_cli_accepts_json_config(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(SAMPLE_CONFIG), encoding="utf-8")
+    output_dir = tmp_path / "output"
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "autograder_gen/cli.py",
+            "--config",
+            str(config_path),
+            "--output",
+            str(output_dir),
+            "--no-daemon",
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, f"CLI failed: {result.stderr}"
+    assert (output_dir / "autograder.zip").exists()
@@ -0,0 +1,96 @@
+import copy
+import hashlib
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from autograder_gen.config import AutograderConfigModel
+from autograder_gen.generator import AutograderGenerator, MANIFEST_FILENAME
+
+WORKERS = 16
+BUILDS = 32
+
+SAMPLE_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py"],
+    "questions": [
+        {
+            "name": "Q1",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 5, "type": "file_exists"},
+                {
+                    "target_file": "solution.py",
+                    "total_mark": 5,
+                    "type": "output_comparison",
+                    "expected_output": "hello",
+                },
+            ],
+        }
+    ],
+}
+
+
+def config_variant(n):
+    data = copy.deepcopy(SAMPLE_CONFIG)
+    data["questions"][0]["name"] = f"Question variant {n % 4}"
+    return data
+
+
+def make_generator(data):
+    config = AutograderConfigModel.model_validate(data)
+    return AutograderGenerator(config, data, reproducible=True)
+
+
+def test_concurrent_generations_into_one_directory(tmp_path):
+    variants = [config_variant(n) for n in range(BUILDS)]
+    expected = {make_generator(data).generate_to_bytes() for data in variants}
+
+    def build(data):
+        return make_generator(data).generate(str(tmp_path))
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        paths = list(pool.map(build, variants))
+
+    zip_path = tmp_path / "autograder.zip"
+    assert set(paths) == {str(zip_path)}
+    # The final zip is complete and is exactly one of the generated packages
+    data = zip_path.read_bytes()
+    assert data in expected
+    with zipfile.ZipFile(zip_path) as z:
+        assert z.testzip() is None
+    # No scratch files are left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "autograder.zip",
+        "autograder.zip.sha256",
+    ]
+
+
+def test_concurrent_incremental_generations_stay_consistent(tmp_path):
+    variants = [config_variant(n) for n in range(BUILDS)]
+
+    def build(data):
+        return make_generator(data).generate_incremental(str(tmp_path))
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        list(pool.map(build, variants))
+
+    # Whichever build won, the next incremental build matches a full build
+    zip_path, _ = build(SAMPLE_CONFIG)
+    with open(zip_path, "rb") as f:
+        data = f.read()
+    assert data == make_generator(SAMPLE_CONFIG).generate_to_bytes()
+
+    manifest = json.loads((tmp_path / MANIFEST_FILENAME).read_text(encoding="utf-8"))
+    assert manifest["package_sha256"] == hashlib.sha256(data).hexdigest()
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_concurrent_generations_share_nothing_mutable():
+    generator = make_generator(SAMPLE_CONFIG)
+    expected = generator.generate_to_bytes()
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(lambda _: generator.generate_to_bytes(), range(BUILDS)))
+
+    assert all(result == expected for result in results)
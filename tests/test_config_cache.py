@@ -0,0 +1,97 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from autograder_gen import config as config_module
+from autograder_gen.config import AutograderConfig, ConfigParser, LoadedConfig
+from autograder_gen.validator import ConfigValidator
+
+EXAMPLE = Path(__file__).parent / "examples" / "py_complete" / "config.yaml"
+
+
+@pytest.fixture
+def config_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUTOGRADER_GEN_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "config.yaml"
+    shutil.copy(EXAMPLE, path)
+    return path
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("config was parsed or validated again")
+
+
+def test_unchanged_configs_skip_parsing_and_validation(config_path, monkeypatch):
+    validator = ConfigValidator()
+    assert validator.validate_from_file(str(config_path))
+    warnings = validator.get_warnings()
+    model = ConfigParser(str(config_path)).parse()
+
+    monkeypatch.setattr(config_module, "parse_config_bytes", fail)
+    monkeypatch.setattr(AutograderConfig, "model_validate", fail)
+    monkeypatch.setattr("autograder_gen.validator.default_rules.run", fail)
+
+    cached = ConfigValidator()
+    assert cached.validate_from_file(str(config_path))
+    assert cached.get_warnings() == warnings
+    assert ConfigParser(str(config_path)).parse() == model
+    loaded = LoadedConfig.from_file(str(config_path))
+    assert loaded.compiled
+    assert loaded.digest == LoadedConfig(None, config_path.read_bytes()).digest
+
+
+def test_changed_or_invalid_configs_are_validated_again(config_path, tmp_path):
+    assert ConfigValidator().validate_from_file(str(config_path))
+    assert LoadedConfig.from_file(str(config_path)).compiled
+
+    config_path.write_text(config_path.read_text() + "\nglobal_time_limit: 4000\n")
+    validator = ConfigValidator()
+    assert validator.validate_from_file(str(config_path))
+    assert "Global time limit is very high (>1 hour)" in validator.get_warnings()
+
+    config_path.write_text(config_path.read_text() + "\nlanguage: cobol\n")
+    for _ in range(2):
+        assert not LoadedConfig.from_file(str(config_path)).compiled
+        assert not ConfigValidator().validate_from_file(str(config_path))
+
+    # Entries are only used while the data files they reference are unchanged
+    data = tmp_path / "output.txt"
+    data.write_text("42\n")
+    config_path.write_text(
+        "version: '1.0'\nlanguage: python\nfiles_necessary: [solution.py]\n"
+        "questions:\n- name: Q1\n  marking_items:\n"
+        "  - {target_file: solution.py, total_mark: 5, type: output_comparison,\n"
+        "     expected_output_file: output.txt}\n"
+    )
+    assert ConfigValidator().validate_from_file(str(config_path))
+    assert LoadedConfig.from_file(str(config_path)).compiled
+    data.unlink()
+    validator = ConfigValidator()
+    assert not validator.validate_from_file(str(config_path))
+    assert "Data file not found" in validator.get_errors()[0]
+
+
+def test_entries_are_tied_to_the_package_code(config_path, monkeypatch):
+    assert ConfigValidator().validate_from_file(str(config_path))
+    monkeypatch.setattr(config_module, "build_digest", lambda: "other code")
+    assert not LoadedConfig.from_file(str(config_path)).compiled
+
+
+def test_entries_are_stored_as_json(config_path, tmp_path):
+    validator = ConfigValidator()
+    assert validator.validate_from_file(str(config_path))
+    [entry] = (tmp_path / "cache" / "configs").rglob("*.*")
+    assert entry.suffix == ".json"
+    assert json.loads(entry.read_bytes())["warnings"] == validator.get_warnings()
+
+    # Entries that aren't this cache's JSON are misses, never loaded
+    entry.write_bytes(b"\x80\x04K\x01.")
+    assert not LoadedConfig.from_file(str(config_path)).compiled
+
+
+def test_configs_json_cant_hold_are_not_cached(config_path, tmp_path):
+    config_path.write_text(config_path.read_text() + "\ncreated: 2024-01-01\n")
+    LoadedConfig.from_file(str(config_path)).save_compiled([])
+    assert not LoadedConfig.from_file(str(config_path)).compiled
@@ -0,0 +1,240 @@
+import base64
+import gc
+import io
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from autograder_gen import utils
+from autograder_gen.config import LoadedConfig
+from autograder_gen.daemon import (
+    DaemonError,
+    GeneratorDaemon,
+    forward_request,
+    send_request,
+    serve,
+)
+from autograder_gen.generator import AutograderGenerator
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="requires Unix domain sockets"
+)
+
+SAMPLE_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py"],
+    "questions": [
+        {
+            "name": "Q1",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 10, "type": "file_exists"}
+            ],
+        }
+    ],
+}
+
+
+@pytest.fixture
+def socket_dir():
+    # Socket paths are limited to about 100 characters, so avoid pytest's tmp_path
+    d = tempfile.mkdtemp(prefix="agd-", dir="/tmp")
+    yield Path(d)
+    shutil.rmtree(d, ignore_errors=True)
+
+
+@pytest.fixture
+def daemon(socket_dir):
+    socket_path = str(socket_dir / "daemon.sock")
+    ready = threading.Event()
+    thread = threading.Thread(target=serve, args=(socket_path, ready), daemon=True)
+    thread.start()
+    assert ready.wait(timeout=30)
+    yield socket_path
+    send_request({"action": "shutdown"}, socket_path)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+
+def write_config(path, data=SAMPLE_CONFIG):
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_ping(daemon):
+    response = send_request({"action": "ping"}, daemon)
+    assert response["ok"]
+    assert response["version"]
+
+
+def test_validate_follows_config_changes(daemon, tmp_path):
+    config_path = write_config(tmp_path / "config.yaml")
+    assert send_request({"action": "validate", "config": config_path}, daemon)["valid"]
+
+    invalid = dict(SAMPLE_CONFIG, language="cobol")
+    write_config(tmp_path / "config.yaml", invalid)
+    response = send_request({"action": "validate", "config": config_path}, daemon)
+    assert not response["valid"]
+    assert response["errors"]
+
+
+def test_generate_writes_artifacts(daemon, tmp_path):
+    config_path = write_config(tmp_path / "config.yaml")
+    response = send_request(
+        {
+            "action": "generate",
+            "config": config_path,
+            "output": str(tmp_path / "out"),
+            "with_skeletons": True,
+        },
+        daemon,
+    )
+
+    assert response["ok"] and response["valid"]
+    assert sorted(response["artifacts"]) == [
+        "autograder.zip",
+        "correct_answer.zip",
+        "wrong_answer.zip",
+    ]
+    assert (tmp_path / "out" / "autograder.zip").exists()
+
+
+def test_export_returns_artifact_bytes(daemon, tmp_path):
+    config_path = write_config(tmp_path / "config.yaml")
+    response = send_request(
+        {
+            "action": "export",
+            "config": config_path,
+            "artifact": "autograder.zip",
+            "reproducible": True,
+        },
+        daemon,
+    )
+    data = base64.b64decode(response["data"])
+
+    loaded = LoadedConfig.from_file(config_path)
+    expected = AutograderGenerator(loaded, reproducible=True).generate_to_bytes()
+    assert data == expected
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        assert "run_autograder" in z.namelist()
+
+
+def test_unknown_action_and_version_mismatch(daemon):
+    assert not send_request({"action": "explode"}, daemon)["ok"]
+    assert forward_request({"action": "ping", "version": "0.0.0"}, daemon) is None
+    assert forward_request({"action": "ping", "build": "stale"}, daemon) is None
+    assert forward_request({"action": "ping"}, daemon)["ok"]
+
+
+def test_clients_with_another_environment_run_locally(daemon):
+    # The daemon runs in this process, so the client's environment is faked
+    request = {"action": "ping", "environment": {"SOURCE_DATE_EPOCH": "1700000000"}}
+    response = send_request(request, daemon)
+    assert response["incompatible"]
+    assert "SOURCE_DATE_EPOCH" in response["error"]
+    assert forward_request(request, daemon) is None
+
+
+def test_sockets_of_other_users_are_not_used(daemon, monkeypatch):
+    owner = os.stat(daemon).st_uid
+    monkeypatch.setattr(os, "getuid", lambda: owner + 1)
+    assert forward_request({"action": "ping"}, daemon) is None
+
+
+def test_socket_is_created_owner_only(socket_dir, monkeypatch):
+    monkeypatch.setattr(os, "chmod", lambda *args: pytest.fail("socket mode set after bind"))
+    previous = os.umask(0)
+    try:
+        server = GeneratorDaemon(str(socket_dir / "daemon.sock"))
+    finally:
+        os.umask(previous)
+    with server:
+        assert os.stat(server.socket_path).st_mode & 0o777 == 0o600
+    assert os.umask(previous) == previous
+
+
+def test_gc_pauses_of_concurrent_builds_overlap(monkeypatch):
+    monkeypatch.setattr(utils, "_gc_pauses_allowed", False)
+    with utils.gc_paused():
+        # Host processes (the web server) keep collecting for their other threads
+        assert gc.isenabled()
+
+    monkeypatch.setattr(utils, "_gc_pauses_allowed", True)
+    first = utils.gc_paused()
+    first.__enter__()
+    with utils.gc_paused():
+        assert not gc.isenabled()
+    # Still paused while the first build runs
+    assert not gc.isenabled()
+    first.__exit__(None, None, None)
+    assert gc.isenabled()
+
+
+def test_send_request_without_daemon(socket_dir):
+    with pytest.raises(DaemonError):
+        send_request({"action": "ping"}, str(socket_dir / "missing.sock"))
+    assert forward_request({"action": "ping"}, str(socket_dir / "missing.sock")) is None
+
+
+def test_stale_socket_is_replaced(socket_dir):
+    socket_path = str(socket_dir / "stale.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+
+    ready = threading.Event()
+    thread = threading.Thread(target=serve, args=(socket_path, ready), daemon=True)
+    thread.start()
+    assert ready.wait(timeout=30)
+    assert send_request({"action": "ping"}, socket_path)["ok"]
+    send_request({"action": "shutdown"}, socket_path)
+    thread.join(timeout=10)
+    assert not Path(socket_path).exists()
+
+
+def test_cli_forwards_to_daemon(daemon, tmp_path):
+    config_path = write_config(tmp_path / "config.yaml")
+    output_dir = tmp_path / "output"
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "autograder_gen/cli.py",
+            "--config",
+            config_path,
+            "--output",
+            str(output_dir),
+            "--socket",
+            daemon,
+            "--verbose",
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Request handled by the generator daemon" in result.stdout
+    assert (output_dir / "autograder.zip").exists()
+
+
+def test_cli_only_forwards_when_given_a_socket(daemon, tmp_path, monkeypatch):
+    config_path = write_config(tmp_path / "config.yaml")
+    monkeypatch.delenv("AUTOGRADER_GEN_SOCKET", raising=False)
+    # A daemon on the default socket path isn't used either
+    monkeypatch.setattr("autograder_gen.daemon.default_socket_path", lambda: daemon)
+    monkeypatch.setattr(
+        "autograder_gen.cli.forward_request",
+        lambda *args: pytest.fail("request was forwarded"),
+    )
+    from autograder_gen.cli import main
+
+    assert main(["--config", config_path, "--validate-only"]) == 0
@@ -0,0 +1,139 @@
+import json
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+import yaml
+from pydantic import ValidationError
+
+from autograder_gen.config import AutograderConfig, LoadedConfig
+from autograder_gen.generator import AutograderGenerator
+from autograder_gen.validator import ConfigValidator
+
+DATA_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py"],
+    "questions": [
+        {
+            "name": "Echo",
+            "marking_items": [
+                {
+                    "target_file": "solution.py",
+                    "total_mark": 10,
+                    "type": "output_comparison",
+                    "expected_input_file": "data/input.txt",
+                    "expected_output_file": "data/output.txt",
+                }
+            ],
+        }
+    ],
+}
+
+# Echoes its input back, upper-cased
+SOLUTION = "import sys\nsys.stdout.write(sys.stdin.read().upper())\n"
+
+
+def write_config(tmp_path, lines=1000):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(exist_ok=True)
+    text = "".join(f"line {i}\n" for i in range(lines))
+    (data_dir / "input.txt").write_text(text)
+    (data_dir / "output.txt").write_text(text.upper())
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(DATA_CONFIG))
+    return config_path
+
+
+def test_data_files_are_packaged_and_read_by_tests(tmp_path):
+    config_path = write_config(tmp_path)
+    generator = AutograderGenerator(LoadedConfig.from_file(str(config_path)))
+    zip_path = generator.generate(str(tmp_path / "output"))
+
+    work_dir = tmp_path / "run"
+    with zipfile.ZipFile(zip_path) as z:
+        test_file = z.read("tests/question_1_test.py").decode("utf-8")
+        assert z.read("data/question_1/item_1_expected_output.txt") == (
+            tmp_path / "data" / "output.txt"
+        ).read_bytes()
+        z.extractall(work_dir)
+    # The expected output is not embedded in the test
+    assert "LINE 999" not in test_file
+
+    submission_dir = work_dir / "submission"
+    submission_dir.mkdir()
+    (submission_dir / "solution.py").write_text(SOLUTION)
+    results_path = work_dir / "results.json"
+    subprocess.run(
+        [sys.executable, str(work_dir / "run_tests.py")],
+        cwd=work_dir,
+        capture_output=True,
+        env={
+            **os.environ,
+            "PYTHONPATH": str(work_dir),
+            "GRADESCOPE_RESULTS_PATH": str(results_path),
+            "GRADESCOPE_SOURCE_PATH": str(submission_dir),
+        },
+    )
+    results = json.loads(results_path.read_text())
+    assert sum(test["score"] for test in results["tests"]) == 10
+
+
+def test_expected_output_and_file_are_exclusive():
+    item = DATA_CONFIG["questions"][0]["marking_items"][0]
+    config = {
+        **DATA_CONFIG,
+        "questions": [
+            {"name": "Echo", "marking_items": [{**item, "expected_output": "X\n"}]}
+        ],
+    }
+    with pytest.raises(ValidationError, match="can't both be set"):
+        AutograderConfig.model_validate(config)
+
+
+def test_data_files_need_a_config_file(tmp_path):
+    # Uploaded configs must not read files from the server
+    validator = ConfigValidator()
+    assert not validator.validate_json(DATA_CONFIG)
+    assert "can only be referenced from a configuration file" in validator.get_errors()[0]
+    with pytest.raises(ValueError):
+        AutograderGenerator(LoadedConfig(DATA_CONFIG)).generate_to_bytes()
+
+    config_path = write_config(tmp_path)
+    (tmp_path / "data" / "output.txt").unlink()
+    assert not validator.validate_from_file(str(config_path))
+    assert "Data file not found" in validator.get_errors()[0]
+
+
+@pytest.mark.parametrize("name", ["../secret.txt", "/etc/hostname"])
+def test_data_files_must_be_inside_the_config_directory(tmp_path, name):
+    (tmp_path / "secret.txt").write_text("secret\n")
+    project = tmp_path / "project"
+    project.mkdir()
+    config = json.loads(json.dumps(DATA_CONFIG))
+    config["questions"][0]["marking_items"][0]["expected_output_file"] = name
+    config_path = write_config(project)
+    config_path.write_text(yaml.safe_dump(config))
+
+    validator = ConfigValidator()
+    assert not validator.validate_from_file(str(config_path))
+    assert "is outside the directory" in validator.get_errors()[0]
+    with pytest.raises(ValueError):
+        AutograderGenerator(LoadedConfig.from_file(str(config_path))).generate_to_bytes()
+
+
+def test_changed_data_file_is_rebuilt_incrementally(tmp_path):
+    config_path = write_config(tmp_path)
+    output_dir = str(tmp_path / "output")
+    AutograderGenerator(LoadedConfig.from_file(str(config_path))).generate_incremental(
+        output_dir
+    )
+
+    (tmp_path / "data" / "output.txt").write_text("CHANGED\n")
+    _, rebuilt = AutograderGenerator(
+        LoadedConfig.from_file(str(config_path))
+    ).generate_incremental(output_dir)
+
+    assert rebuilt == ["data/question_1/item_1_expected_output.txt"]
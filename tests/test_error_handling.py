@@ -89,3 +89,20 @@ def test_cli_unsupported_language(temp_config_file):
             or "error" in result.stdout.lower()
             or "error" in result.stderr.lower()
         )
+
+
+def test_cli_rejects_malformed_json_config():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        config_path = os.path.join(temp_dir, "config.json")
+        with open(config_path, "w") as f:
+            f.write('{"version": "1.0", "language": ')
+        result = subprocess.run(
+            [sys.executable, MAIN_PATH, "--config", config_path, "--validate-only", "--no-daemon"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode != 0
+        assert "Invalid format in JSON configuration file" in result.stderr
+    finally:
+        shutil.rmtree(temp_dir)
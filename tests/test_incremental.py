@@ -0,0 +1,156 @@
+import copy
+import hashlib
+import json
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from autograder_gen import generator as generator_module
+from autograder_gen.config import AutograderConfigModel
+from autograder_gen.generator import AutograderGenerator, MANIFEST_FILENAME
+
+SAMPLE_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py"],
+    "questions": [
+        {
+            "name": f"Q{i}",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 5, "type": "file_exists"}
+            ],
+        }
+        for i in range(1, 4)
+    ],
+}
+
+
+def generate_incremental(config_dict, output_dir):
+    config = AutograderConfigModel.model_validate(config_dict)
+    generator = AutograderGenerator(config, config_dict)
+    return generator.generate_incremental(str(output_dir))
+
+
+def read_zip(zip_path):
+    with zipfile.ZipFile(zip_path, "r") as z:
+        return {name: z.read(name) for name in z.namelist()}
+
+
+def test_first_incremental_build_renders_everything(tmp_path):
+    zip_path, rebuilt = generate_incremental(SAMPLE_CONFIG, tmp_path)
+
+    assert sorted(rebuilt) == sorted(read_zip(zip_path))
+    assert (tmp_path / MANIFEST_FILENAME).exists()
+
+
+def test_unchanged_config_rebuilds_nothing(tmp_path):
+    zip_path, _ = generate_incremental(SAMPLE_CONFIG, tmp_path)
+    first = read_zip(zip_path)
+
+    zip_path, rebuilt = generate_incremental(SAMPLE_CONFIG, tmp_path)
+
+    assert rebuilt == []
+    assert read_zip(zip_path) == first
+
+
+def test_changed_package_code_rebuilds_everything(tmp_path, monkeypatch):
+    generate_incremental(SAMPLE_CONFIG, tmp_path)
+
+    monkeypatch.setattr(generator_module, "build_digest", lambda: "other code")
+    zip_path, rebuilt = generate_incremental(SAMPLE_CONFIG, tmp_path)
+
+    assert sorted(rebuilt) == sorted(read_zip(zip_path))
+
+
+def test_editing_one_question_rebuilds_only_its_file(tmp_path):
+    generate_incremental(SAMPLE_CONFIG, tmp_path)
+
+    edited = copy.deepcopy(SAMPLE_CONFIG)
+    edited["questions"][1]["marking_items"][0]["total_mark"] = 7
+    zip_path, rebuilt = generate_incremental(edited, tmp_path)
+
+    assert "tests/question_2_test.py" in rebuilt
+    assert "tests/question_1_test.py" not in rebuilt
+    assert "tests/question_3_test.py" not in rebuilt
+    assert "setup.sh" not in rebuilt
+
+    # The patched zip matches a full build of the edited config
+    config = AutograderConfigModel.model_validate(edited)
+    full_dir = tmp_path / "full"
+    full_zip = AutograderGenerator(config, edited).generate(str(full_dir))
+    assert read_zip(zip_path) == read_zip(full_zip)
+
+
+def test_unchanged_files_are_copied_without_decompressing(tmp_path, monkeypatch):
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG)
+    AutograderGenerator(config, SAMPLE_CONFIG, reproducible=True).generate_incremental(
+        str(tmp_path)
+    )
+    edited = copy.deepcopy(SAMPLE_CONFIG)
+    edited["questions"][0]["name"] = "Renamed"
+    edited_config = AutograderConfigModel.model_validate(edited)
+    full_zip = AutograderGenerator(edited_config, edited, reproducible=True).generate(
+        str(tmp_path / "full")
+    )
+
+    monkeypatch.setattr(
+        zipfile.ZipFile, "open", lambda *args, **kwargs: pytest.fail("entry was decompressed")
+    )
+    generator = AutograderGenerator(edited_config, edited, reproducible=True)
+    zip_path, rebuilt = generator.generate_incremental(str(tmp_path))
+
+    assert "setup.sh" not in rebuilt
+    with open(zip_path, "rb") as patched, open(full_zip, "rb") as full:
+        assert patched.read() == full.read()
+
+
+def test_incremental_sha256_is_not_read_back(tmp_path, monkeypatch):
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG)
+    read_text = Path.read_text
+
+    def no_checksum(self, *args, **kwargs):
+        assert self.suffix != ".sha256", "the checksum file was read back"
+        return read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", no_checksum)
+    artifacts = AutograderGenerator(config, SAMPLE_CONFIG, reproducible=True).generate_all(
+        str(tmp_path), incremental=True
+    )
+
+    package = artifacts["autograder.zip"]
+    assert package["sha256"] == hashlib.sha256(Path(package["path"]).read_bytes()).hexdigest()
+
+
+def test_removed_question_is_dropped_from_zip(tmp_path):
+    generate_incremental(SAMPLE_CONFIG, tmp_path)
+
+    edited = copy.deepcopy(SAMPLE_CONFIG)
+    edited["questions"].pop()
+    zip_path, _ = generate_incremental(edited, tmp_path)
+
+    assert "tests/question_3_test.py" not in read_zip(zip_path)
+
+
+def test_cli_incremental_reports_rebuilt_files(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(json.dumps(SAMPLE_CONFIG))
+    command = [
+        sys.executable,
+        "autograder_gen/cli.py",
+        "--config",
+        str(config_path),
+        "--output",
+        str(tmp_path / "output"),
+        "--incremental",
+    ]
+
+    first = subprocess.run(command, capture_output=True, text=True)
+    second = subprocess.run(command, capture_output=True, text=True)
+
+    assert first.returncode == 0, first.stderr
+    assert "tests/question_1_test.py" in first.stdout
+    assert second.returncode == 0, second.stderr
+    assert "Rebuilt 0 file(s)" in second.stdout
@@ -55,3 +55,23 @@ def test_autograder_config_schema_full():
     assert result.version == "1.0"
     assert result.language == "python"
     assert len(result.questions) == 1
+
+
+def test_readme_detail_must_be_known_value():
+    data = {
+        "version": "1.0",
+        "language": "python",
+        "readme_detail": "verbose",
+        "files_necessary": ["solution.py"],
+        "questions": [
+            {
+                "name": "Q1",
+                "marking_items": [
+                    {"target_file": "solution.py", "total_mark": 1, "type": "file_exists"}
+                ],
+            }
+        ],
+    }
+    with pytest.raises(ValidationError) as excinfo:
+        AutograderConfigModel(**data)
+    assert any(error["loc"] == ("readme_detail",) for error in excinfo.value.errors())
@@ -0,0 +1,144 @@
+import io
+import random
+import zipfile
+
+import pytest
+
+from autograder_gen import package
+from autograder_gen.config import AutograderConfigModel
+from autograder_gen.generator import AutograderGenerator
+from autograder_gen.package import MIN_PARALLEL_SIZE, PackageWriter
+
+COMPRESSIBLE = ("print('hello world')\n" * 10000).encode()
+INCOMPRESSIBLE = random.Random(0).randbytes(MIN_PARALLEL_SIZE * 2)
+
+SAMPLE_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py"],
+    "questions": [
+        {
+            "name": "Q1",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 5, "type": "file_exists"}
+            ],
+        }
+    ],
+}
+
+
+def write_package(files, **options):
+    buffer = io.BytesIO()
+    with PackageWriter(buffer, reproducible=True, **options) as writer:
+        for name, content in files:
+            writer.add_file(name, content)
+    return buffer.getvalue()
+
+
+def read_package(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        assert z.testzip() is None
+        return {info.filename: (info.compress_type, z.read(info)) for info in z.infolist()}
+
+
+@pytest.mark.parametrize(
+    "compression, method",
+    [
+        ("stored", zipfile.ZIP_STORED),
+        ("deflate", zipfile.ZIP_DEFLATED),
+        ("lzma", zipfile.ZIP_LZMA),
+    ],
+)
+def test_compression_strategies(compression, method):
+    files = [("big.py", COMPRESSIBLE), ("small.py", b"x = 1\n"), ("random.bin", INCOMPRESSIBLE)]
+    entries = read_package(write_package(files, compression=compression))
+
+    assert entries["big.py"] == (method, COMPRESSIBLE)
+    # Small and incompressible entries are always stored
+    assert entries["small.py"] == (zipfile.ZIP_STORED, b"x = 1\n")
+    assert entries["random.bin"] == (zipfile.ZIP_STORED, INCOMPRESSIBLE)
+
+
+def test_compression_level_changes_output():
+    files = [("big.py", COMPRESSIBLE + INCOMPRESSIBLE[:1000])]
+    fast = write_package(files, compresslevel=1)
+    best = write_package(files, compresslevel=9)
+    assert fast != best
+    assert read_package(fast) == read_package(best)
+
+
+def test_parallel_compression_matches_serial():
+    files = [
+        (f"file_{n}.py", COMPRESSIBLE + str(n).encode() if n % 3 else INCOMPRESSIBLE)
+        for n in range(24)
+    ]
+    assert write_package(files, jobs=4) == write_package(files, jobs=1)
+
+
+def test_streamed_entries_match_in_memory_entries():
+    chunks = [COMPRESSIBLE.decode()[i : i + 1000] for i in range(0, len(COMPRESSIBLE), 1000)]
+    random_text = INCOMPRESSIBLE.hex()
+    streamed = write_package([("a.py", iter(chunks)), ("b.txt", iter([random_text])), ("c.py", iter(["x"]))])
+    joined = write_package([("a.py", "".join(chunks)), ("b.txt", random_text), ("c.py", "x")])
+    assert streamed == joined
+
+
+def test_many_entries_use_zip64_end_record():
+    files = [(f"f{n}", b"") for n in range(70000)]
+    entries = read_package(write_package(files, jobs=1))
+    assert len(entries) == 70000
+
+
+def test_unicode_names_round_trip():
+    entries = read_package(write_package([("données/é.py", b"x")]))
+    assert "données/é.py" in entries
+
+
+def test_unknown_compression_is_rejected():
+    with pytest.raises(ValueError):
+        PackageWriter(io.BytesIO(), compression="zstd")
+
+
+def test_generator_uses_selected_compression():
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG)
+    data = AutograderGenerator(config, compression="stored").generate_to_bytes()
+    entries = read_package(data)
+    assert {method for method, _ in entries.values()} == {zipfile.ZIP_STORED}
+    assert "run_autograder" in entries
+
+
+def test_streamed_generator_entries_are_compressed_in_the_pool(monkeypatch):
+    output = "".join(f"line {i}\n" for i in range(50000))
+    config = AutograderConfigModel.model_validate(
+        {
+            **SAMPLE_CONFIG,
+            "questions": [
+                {
+                    "name": f"Q{n}",
+                    "marking_items": [
+                        {
+                            "target_file": "solution.py",
+                            "total_mark": 5,
+                            "type": "output_comparison",
+                            "expected_output": output + str(n),
+                        }
+                    ],
+                }
+                for n in range(8)
+            ],
+        }
+    )
+    submitted = []
+    submit = package.ThreadPoolExecutor.submit
+    monkeypatch.setattr(
+        package.ThreadPoolExecutor,
+        "submit",
+        lambda self, *args: submitted.append(args) or submit(self, *args),
+    )
+
+    monkeypatch.setattr(package, "available_cpus", lambda: 4)
+    parallel = AutograderGenerator(config, reproducible=True).generate_to_bytes()
+    # The question files are rendered as streams of chunks
+    assert len(submitted) >= 8
+    monkeypatch.setattr(package, "available_cpus", lambda: 1)
+    assert AutograderGenerator(config, reproducible=True).generate_to_bytes() == parallel
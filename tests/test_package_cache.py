@@ -0,0 +1,110 @@
+import json
+import subprocess
+import sys
+import time
+
+from autograder_gen import cache as cache_module
+from autograder_gen.cache import PackageCache
+from autograder_gen.config import AutograderConfigModel
+
+SAMPLE_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py"],
+    "questions": [
+        {
+            "name": "Q1",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 10, "type": "file_exists"}
+            ],
+        }
+    ],
+}
+
+
+def test_key_depends_on_config_content(tmp_path):
+    cache = PackageCache(str(tmp_path))
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG)
+    same = AutograderConfigModel.model_validate(json.loads(json.dumps(SAMPLE_CONFIG)))
+    changed = AutograderConfigModel.model_validate({**SAMPLE_CONFIG, "version": "2.0"})
+
+    assert cache.make_key(config) == cache.make_key(same)
+    assert cache.make_key(config) != cache.make_key(changed)
+    assert cache.make_key(config) != cache.make_key(config, SAMPLE_CONFIG)
+
+
+def test_key_depends_on_package_code(tmp_path, monkeypatch):
+    cache = PackageCache(str(tmp_path))
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG)
+    key = cache.make_key(config)
+
+    monkeypatch.setattr(cache_module, "build_digest", lambda: "other code")
+    assert cache.make_key(config) != key
+
+
+def test_get_or_build_counts_hits_and_misses(tmp_path):
+    cache = PackageCache(str(tmp_path))
+    builds = []
+
+    def build():
+        builds.append(1)
+        return b"artifact"
+
+    assert cache.get_or_build("abc123", "autograder.zip", build) == (b"artifact", False)
+    assert cache.get_or_build("abc123", "autograder.zip", build) == (b"artifact", True)
+
+    assert len(builds) == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = PackageCache(str(tmp_path), max_bytes=250)
+    cache.put("aa01", "autograder.zip", b"x" * 100)
+    time.sleep(0.01)
+    cache.put("aa02", "autograder.zip", b"x" * 100)
+    time.sleep(0.01)
+    # Reading the first entry makes the second one the eviction candidate
+    assert cache.get("aa01", "autograder.zip") is not None
+    time.sleep(0.01)
+    cache.put("aa03", "autograder.zip", b"x" * 100)
+
+    assert cache.get("aa01", "autograder.zip") is not None
+    assert cache.get("aa02", "autograder.zip") is None
+    assert cache.get("aa03", "autograder.zip") is not None
+    assert cache.stats()["size_bytes"] <= 250
+
+
+def test_cli_reuses_cached_package(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(json.dumps(SAMPLE_CONFIG))
+    cache_dir = tmp_path / "cache"
+
+    def run_cli(output_dir):
+        return subprocess.run(
+            [
+                sys.executable,
+                "autograder_gen/cli.py",
+                "--config",
+                str(config_path),
+                "--output",
+                str(output_dir),
+                "--cache-dir",
+                str(cache_dir),
+            ],
+            capture_output=True,
+            text=True,
+        )
+
+    first = run_cli(tmp_path / "out1")
+    second = run_cli(tmp_path / "out2")
+
+    assert first.returncode == 0, first.stderr
+    assert second.returncode == 0, second.stderr
+    assert "0 hit(s), 1 miss(es)" in first.stdout
+    assert "1 hit(s), 0 miss(es)" in second.stdout
+    assert (tmp_path / "out1" / "autograder.zip").read_bytes() == (
+        tmp_path / "out2" / "autograder.zip"
+    ).read_bytes()
@@ -0,0 +1,77 @@
+import pytest
+
+from autograder_gen.config import AutograderConfigModel
+from autograder_gen.render_model import build_render_model, sanitize_test_name
+
+CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py", "helpers.py"],
+    "questions": [
+        {
+            "name": "Q1",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 2, "type": "file_exists"},
+                {
+                    "target_file": "solution.py",
+                    "total_mark": 3,
+                    "type": "output_comparison",
+                    "name": "Prints (hello) world!",
+                    "expected_output": "hello",
+                },
+            ],
+        },
+        {
+            "name": "Q2",
+            "marking_items": [
+                {
+                    "target_file": "solution.py",
+                    "total_mark": 5,
+                    "type": "function_test",
+                    "function_name": "sub",
+                },
+                {
+                    "target_file": "solution.py",
+                    "total_mark": 1,
+                    "type": "signature_check",
+                    "function_name": "add",
+                },
+            ],
+        },
+    ],
+}
+
+
+def test_totals_and_indexes():
+    model = build_render_model(AutograderConfigModel.model_validate(CONFIG))
+
+    assert model.total_items == 4
+    assert model.total_points == 11
+    assert [q.total_points for q in model.questions] == [5, 6]
+    assert [q.visible_points for q in model.questions] == [3, 6]
+    assert model.functions_by_file == {"solution.py": ("add", "sub")}
+    assert not model.questions[0].needs_imports
+    assert model.questions[1].needs_imports and model.questions[1].needs_timeout
+
+
+def test_item_names_and_outputs_are_precomputed():
+    model = build_render_model(AutograderConfigModel.model_validate(CONFIG))
+    first, second = model.questions[0].marking_items
+
+    assert first.test_name == "item_1"
+    assert second.test_name == "prints_hello_world_"
+    assert second.expected_output == "hello"
+    assert second.normalized_expected_output == "hello\n"
+
+
+def test_records_are_read_only():
+    model = build_render_model(AutograderConfigModel.model_validate(CONFIG))
+
+    with pytest.raises(AttributeError):
+        model.questions[0].name = "changed"
+    with pytest.raises(AttributeError):
+        model.total_points = 0
+
+
+def test_sanitize_test_name_matches_template_rules():
+    assert sanitize_test_name("Check A-B.c (x) [y]") == "check_a_b_c_x_y"
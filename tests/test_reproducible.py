@@ -0,0 +1,65 @@
+import hashlib
+import io
+import time
+import zipfile
+
+from autograder_gen.config import AutograderConfigModel
+from autograder_gen.generator import AutograderGenerator
+
+SAMPLE_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py", "helpers.py"],
+    "questions": [
+        {
+            "name": f"Q{i}",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 5, "type": "file_exists"}
+            ],
+        }
+        for i in range(1, 12)
+    ],
+}
+
+
+def make_generator(config_dict=SAMPLE_CONFIG):
+    config = AutograderConfigModel.model_validate(config_dict)
+    return AutograderGenerator(config, config_dict, reproducible=True)
+
+
+def test_identical_configs_produce_identical_bytes():
+    first = make_generator().generate_to_bytes()
+    time.sleep(2)  # zip timestamps have a two second resolution
+    second = make_generator().generate_to_bytes()
+
+    assert first == second
+    assert (
+        make_generator().generate_correct_answer_zip().getvalue()
+        == make_generator().generate_correct_answer_zip().getvalue()
+    )
+
+
+def test_entries_are_sorted_with_fixed_metadata():
+    with zipfile.ZipFile(io.BytesIO(make_generator().generate_to_bytes())) as z:
+        names = z.namelist()
+        assert names == sorted(names)
+        for info in z.infolist():
+            assert info.date_time == (1980, 1, 1, 0, 0, 0)
+            assert info.external_attr >> 16 in (0o100644, 0o100755)
+
+
+def test_key_order_does_not_change_package():
+    reordered = dict(reversed(list(SAMPLE_CONFIG.items())))
+
+    assert make_generator(reordered).generate_to_bytes() == (
+        make_generator().generate_to_bytes()
+    )
+
+
+def test_generate_writes_sha256_file(tmp_path):
+    zip_path = make_generator().generate(str(tmp_path))
+
+    checksum_file = tmp_path / "autograder.zip.sha256"
+    digest, name = checksum_file.read_text().split()
+    assert name == "autograder.zip"
+    assert digest == hashlib.sha256(open(zip_path, "rb").read()).hexdigest()
@@ -94,3 +94,32 @@ def test_java_setup_sh_contains_default_jdk(temp_output_dir):
             content = f.read().decode()
             assert "apt-get install -y default-jdk" in content
             assert "Setup completed successfully" in content
+
+
+def read_readme(config_dict, temp_output_dir):
+    config = AutograderConfigModel.model_validate(config_dict)
+    zip_path = AutograderGenerator(config, config_dict).generate(temp_output_dir)
+    with zipfile.ZipFile(zip_path, "r") as z:
+        return z.read("README.md").decode()
+
+
+def test_readme_lists_marking_items_by_default(temp_output_dir):
+    content = read_readme(CONFIG_FOR_TEMPLATES, temp_output_dir)
+    assert "### Question 1: Question 1" in content
+    assert "#### 2. basic_addition_test" in content
+    assert "- **Expected Output Lines**: 1" in content
+    assert "- **Total Possible**: 15 points" in content
+
+
+def test_readme_summary_omits_item_details(temp_output_dir):
+    content = read_readme({**CONFIG_FOR_TEMPLATES, "readme_detail": "summary"}, temp_output_dir)
+    assert "### Question 1: Question 1" in content
+    assert "**Marking Items**: 2" in content
+    assert "basic_addition_test" not in content
+
+
+def test_readme_none_omits_question_sections(temp_output_dir):
+    content = read_readme({**CONFIG_FOR_TEMPLATES, "readme_detail": "none"}, temp_output_dir)
+    assert "## Questions and Marking Items" not in content
+    assert "- **Question 1**" not in content
+    assert "- **Total Possible**: 15 points" in content
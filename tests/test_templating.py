@@ -0,0 +1,41 @@
+from jinja2 import FileSystemBytecodeCache
+
+from autograder_gen.config import AutograderConfigModel
+from autograder_gen.generator import AutograderGenerator
+from autograder_gen.templating import get_jinja_env, warm_templates
+
+SAMPLE_CONFIG_DICT = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py"],
+    "questions": [
+        {
+            "name": "Q1",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 10, "type": "file_exists"}
+            ],
+        }
+    ],
+}
+
+
+def test_generators_share_one_environment():
+    config = AutograderConfigModel.model_validate(SAMPLE_CONFIG_DICT)
+    first = AutograderGenerator(config)
+    second = AutograderGenerator(config)
+
+    assert first.jinja_env is second.jinja_env
+    assert first.jinja_env is get_jinja_env()
+    assert isinstance(get_jinja_env().bytecode_cache, FileSystemBytecodeCache)
+
+
+def test_warm_templates_compiles_subtemplates():
+    names = warm_templates()
+
+    assert "test_question.py.j2" in names
+    assert "subtemplates/function_test_method.j2" in names
+    # Warmed templates are served from the environment cache
+    env = get_jinja_env()
+    assert env.get_template("test_question.py.j2") is env.get_template(
+        "test_question.py.j2"
+    )
@@ -0,0 +1,184 @@
+import json
+import subprocess
+import sys
+import zipfile
+
+import pytest
+from pydantic import ValidationError
+
+from autograder_gen.config import AutograderConfig
+from autograder_gen.generator import AutograderGenerator, RenderMemo
+from autograder_gen.variants import expand_variants, variant_parameters
+
+VARIANT_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py"],
+    "variants": {
+        "count": 3,
+        "seed": 7,
+        "parameters": {"n": [2, 3, 5, 8, 13, 21]},
+        "parameter_sets": [{"n": 100}],
+    },
+    "questions": [
+        {
+            "name": "Q1",
+            "marking_items": [
+                {
+                    "target_file": "solution.py",
+                    "total_mark": 5,
+                    "type": "output_comparison",
+                    "expected_input": "${n}",
+                    "expected_output": "Square: ${n}",
+                },
+                {
+                    "target_file": "solution.py",
+                    "total_mark": 5,
+                    "type": "function_test",
+                    "function_name": "double",
+                    "test_cases": [{"args": ["${n}"], "expected": "${n}"}],
+                },
+            ],
+        },
+        {
+            "name": "Q2",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 10, "type": "file_exists"}
+            ],
+        },
+    ],
+}
+
+
+def test_variant_parameters_are_deterministic():
+    first = variant_parameters(VARIANT_CONFIG["variants"])
+    second = variant_parameters(VARIANT_CONFIG["variants"])
+    assert first == second
+    assert len(first) == 3
+    assert first[0] == {"n": 100}
+    # Variant 2 doesn't depend on how many variants are requested
+    assert variant_parameters({**VARIANT_CONFIG["variants"], "count": 5})[1] == first[1]
+
+
+def test_expand_variants_substitutes_placeholders():
+    variants = list(expand_variants(VARIANT_CONFIG))
+    assert [name for name, _, _ in variants] == ["variant_1", "variant_2", "variant_3"]
+
+    name, parameters, config = variants[0]
+    assert "variants" not in config
+    output_item, function_item = config["questions"][0]["marking_items"]
+    assert output_item["expected_input"] == "100"
+    assert output_item["expected_output"] == "Square: 100"
+    # Test case values that are a single placeholder keep the parameter's type
+    assert function_item["test_cases"] == [{"args": [100], "expected": 100}]
+    # The original config is left untouched
+    assert VARIANT_CONFIG["questions"][0]["marking_items"][0]["expected_input"] == "${n}"
+
+
+def test_undefined_variant_parameter_is_rejected():
+    data = json.loads(json.dumps(VARIANT_CONFIG))
+    data["questions"][0]["marking_items"][0]["expected_output"] = "${m}"
+    with pytest.raises(ValidationError, match="Undefined variant parameter"):
+        AutograderConfig.model_validate(data)
+
+
+def test_variants_need_a_count_or_parameter_sets():
+    data = json.loads(json.dumps(VARIANT_CONFIG))
+    data["variants"] = {"parameters": {"n": [1, 2]}}
+    with pytest.raises(ValidationError, match="count or parameter_sets"):
+        AutograderConfig.model_validate(data)
+
+
+def test_generate_variants(tmp_path):
+    config = AutograderConfig.model_validate(VARIANT_CONFIG)
+    generator = AutograderGenerator(config, VARIANT_CONFIG, reproducible=True)
+    results = generator.generate_variants(
+        str(tmp_path), with_description=True, with_skeletons=True
+    )
+
+    assert list(results) == ["variant_1", "variant_2", "variant_3"]
+    manifest = json.loads((tmp_path / "variants.json").read_text(encoding="utf-8"))
+    assert manifest == {name: result["parameters"] for name, result in results.items()}
+
+    tests = {}
+    shared = {}
+    for name in results:
+        variant_dir = tmp_path / name
+        for artifact in ["autograder.zip", "description.docx", "correct_answer.zip", "wrong_answer.zip"]:
+            assert (variant_dir / artifact).exists()
+        with zipfile.ZipFile(variant_dir / "autograder.zip") as zf:
+            tests[name] = zf.read("tests/question_1_test.py")
+            shared[name] = zf.read("tests/question_2_test.py"), zf.read("run_autograder")
+            packaged_config = zf.read("autograder_config.yaml").decode("utf-8")
+        assert "${n}" not in packaged_config
+        assert "variants" not in packaged_config
+
+    assert b"100" in tests["variant_1"]
+    assert len(set(tests.values())) == len(set(map(str, manifest.values())))
+    assert len(set(shared.values())) == 1
+    skeletons = {(tmp_path / name / "correct_answer.zip").read_bytes() for name in results}
+    assert len(skeletons) == 1
+
+
+def test_cli_generates_variants(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(json.dumps(VARIANT_CONFIG), encoding="utf-8")
+    output_dir = tmp_path / "output"
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "autograder_gen/cli.py",
+            "--config",
+            str(config_path),
+            "--output",
+            str(output_dir),
+            "--no-daemon",
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, f"CLI failed: {result.stderr}"
+    assert "variant_1: n=100" in result.stdout
+    for name in ["variant_1", "variant_2", "variant_3"]:
+        assert (output_dir / name / "autograder.zip").exists()
+    assert (output_dir / "variants.json").exists()
+
+
+def test_only_files_shared_by_variants_are_kept_in_memory(tmp_path, monkeypatch):
+    kept = []
+    memos = []
+    put = RenderMemo.put
+    init = RenderMemo.__init__
+
+    def spy_init(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        memos.append(self)
+
+    monkeypatch.setattr(RenderMemo, "__init__", spy_init)
+    monkeypatch.setattr(
+        RenderMemo,
+        "put",
+        lambda self, key, content: kept.append(key[0]) or put(self, key, content),
+    )
+    data = json.loads(json.dumps(VARIANT_CONFIG))
+    data["variants"] = {"parameter_sets": [{"n": 1}, {"n": 2}, {"n": 3}], "parameters": {"n": [1]}}
+    generator = AutograderGenerator(AutograderConfig.model_validate(data), data)
+    generator.generate_variants(str(tmp_path))
+
+    # Q1 differs in every variant, the other files are the same in all of them
+    assert "tests/question_1_test.py" not in kept
+    assert "tests/question_2_test.py" in kept
+    assert len(kept) == len(set(kept))
+    # Files are dropped once the last variant using them is built
+    [memo] = memos
+    assert not memo._files and memo._size == 0
+
+
+def test_render_memo_is_bounded():
+    memo = RenderMemo({("a", "1"): 3, ("b", "1"): 3, ("c", "1"): 1}, max_bytes=10)
+    assert memo.wants(("a", "1")) and not memo.wants(("c", "1"))
+    memo.put(("a", "1"), "x" * 8)
+    memo.put(("b", "1"), "y" * 8)
+    assert ("a", "1") in memo and ("b", "1") not in memo
@@ -0,0 +1,131 @@
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+
+from autograder_gen.watch import FileWatcher, watch
+
+SAMPLE_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["solution.py"],
+    "questions": [
+        {
+            "name": "Q1",
+            "marking_items": [
+                {"target_file": "solution.py", "total_mark": 10, "type": "file_exists"}
+            ],
+        }
+    ],
+}
+
+
+def touch(path, content):
+    path.write_text(content)
+    # Make sure the change is visible even on filesystems with coarse mtimes
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_file_watcher_reports_changed_files(tmp_path):
+    a = tmp_path / "a.yaml"
+    b = tmp_path / "b.yaml"
+    a.write_text("a")
+    watcher = FileWatcher([str(a), str(b)])
+
+    assert watcher.poll() == []
+    touch(a, "changed")
+    assert watcher.poll() == [str(a)]
+    assert watcher.poll() == []
+
+    b.write_text("created")
+    a.unlink()
+    assert sorted(watcher.poll()) == sorted([str(a), str(b)])
+
+
+def test_watch_calls_back_until_stopped(tmp_path):
+    config = tmp_path / "config.yaml"
+    config.write_text("v1")
+    stop = threading.Event()
+    changes = []
+
+    def on_change(changed):
+        changes.append(changed)
+        stop.set()
+
+    thread = threading.Thread(
+        target=watch, args=(lambda: [str(config)], on_change, 0.01, stop)
+    )
+    thread.start()
+    time.sleep(0.05)
+    touch(config, "v2")
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert changes == [[str(config)]]
+
+
+def read_question_names(zip_path):
+    with zipfile.ZipFile(zip_path) as z:
+        return z.read("autograder_config.yaml").decode()
+
+
+def test_cli_watch_regenerates_on_config_change(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(json.dumps(SAMPLE_CONFIG))
+    output_dir = tmp_path / "output"
+    zip_path = output_dir / "autograder.zip"
+
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-u",
+            "autograder_gen/cli.py",
+            "--config",
+            str(config_path),
+            "--output",
+            str(output_dir),
+            "--watch",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    # Read output on a thread, so waiting for a line can time out
+    lines: "queue.Queue[str]" = queue.Queue()
+    reader = threading.Thread(
+        target=lambda: [lines.put(line) for line in process.stdout], daemon=True
+    )
+    reader.start()
+    output = []
+
+    def wait_for(text, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                output.append(lines.get(timeout=0.05))
+            except queue.Empty:
+                continue
+            if text in output[-1]:
+                return
+        raise AssertionError(f"{text!r} not printed:\n{''.join(output)}")
+
+    try:
+        wait_for("Watching", 30)
+        assert zip_path.exists()
+
+        edited = json.loads(json.dumps(SAMPLE_CONFIG))
+        edited["questions"][0]["name"] = "Renamed question"
+        touch(config_path, json.dumps(edited))
+
+        wait_for("Regenerated in", 10)
+        assert "Renamed question" in read_question_names(zip_path)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+    assert (output_dir / "autograder.manifest.json").exists()
@@ -1,4 +1,5 @@
 import pytest
+from autograder_gen.validator import ConfigValidator
 from web.app import app
 
 
@@ -24,3 +25,70 @@ def test_api_generate_missing_data(client):
     response = client.post("/api/generate", json={})
     assert response.status_code == 400
     assert b"No config data provided" in response.data
+
+
+EDITOR_CONFIG = {
+    "version": "1.0",
+    "language": "python",
+    "files_necessary": ["a.py", "b.py"],
+    "questions": [
+        {
+            "name": f"Q{i}",
+            "marking_items": [
+                {"target_file": "a.py", "total_mark": 5, "type": "file_exists"}
+            ],
+        }
+        for i in range(3)
+    ],
+}
+
+
+def test_api_validate_patch_only_validates_the_edit(client):
+    from web.app import validation_cache
+
+    response = client.post("/api/validate", json=EDITOR_CONFIG)
+    base = response.get_json()
+    assert base["valid"] is True
+
+    item = {"target_file": "a.py", "total_mark": 5, "type": "bogus"}
+    misses = validation_cache.stats()["misses"]
+    response = client.post(
+        "/api/validate",
+        json={"base": base["config_id"], "patch": {"question": 1, "item": 0, "value": item}},
+    )
+    patched = response.get_json()
+
+    assert validation_cache.stats()["misses"] == misses + 1
+    assert patched["valid"] is False
+    assert patched["errors"][0].endswith("at questions.1.marking_items.0.type")
+
+    # Same results as validating the edited config from scratch
+    config = {**EDITOR_CONFIG, "questions": list(EDITOR_CONFIG["questions"])}
+    config["questions"][1] = {**config["questions"][1], "marking_items": [item]}
+    validator = ConfigValidator()
+    assert not validator.validate_json(config)
+    assert patched["errors"] == validator.get_errors()
+
+    # Patches can build on patches
+    response = client.post(
+        "/api/validate",
+        json={"base": patched["config_id"], "patch": {"settings": {"version": "1.0"}}},
+    )
+    assert response.get_json()["errors"] == [
+        "Field required at language",
+        *validator.get_errors(),
+    ]
+
+
+def test_api_validate_patch_needs_a_known_base(client):
+    response = client.post(
+        "/api/validate", json={"base": "unknown", "patch": {"question": 0, "value": {}}}
+    )
+    assert response.status_code == 409
+
+    base = client.post("/api/validate", json=EDITOR_CONFIG).get_json()["config_id"]
+    response = client.post(
+        "/api/validate", json={"base": base, "patch": {"question": 7, "value": {}}}
+    )
+    assert response.status_code == 400
+    assert b"Invalid question index" in response.data
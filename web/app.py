@@ -6,12 +6,17 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from flask import Flask, request, send_file, jsonify, render_template
-import tempfile
+import hashlib
 import os
-import yaml
-from autograder_gen.config import ConfigParser, AutograderConfig
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+from autograder_gen.config import CONFIG_FORMATS, LoadedConfig
 from autograder_gen.generator import AutograderGenerator
-from autograder_gen.validator import ConfigValidator
+from autograder_gen.validator import ConfigValidator, ValidationCache
+from autograder_gen.templating import warm_templates
+from autograder_gen.cache import PackageCache
 import json
 from flask_cors import CORS
 from flask_bootstrap import Bootstrap5
@@ -26,6 +31,122 @@ bootstrap = Bootstrap5(app)
 
 CORS(app)
 
+# Compile all templates up front so the first request doesn't pay for it
+warm_templates()
+
+# Optional cache of generated artifacts, enabled by AUTOGRADER_GEN_CACHE_DIR
+package_cache = PackageCache.from_environment()
+
+# Question validation results shared by every /api/validate request, so the
+# editor's revalidations only validate what changed
+validation_cache = ValidationCache()
+
+# Recently validated configs by id, with the validation results of their
+# questions, which editor patches are applied to
+MAX_EDITOR_CONFIGS = 1000
+editor_configs: "OrderedDict[str, Tuple[Dict[str, Any], List[Any]]]" = OrderedDict()
+editor_configs_lock = threading.Lock()
+
+
+def _patched_list(items: Any, index: Any, value: Any, what: str) -> list:
+    if not isinstance(items, list):
+        raise ValueError(f"The base config has no {what} list")
+    if not isinstance(index, int) or not 0 <= index <= len(items):
+        raise ValueError(f"Invalid {what} index: {index}")
+    items = list(items)
+    if value is None:
+        if index < len(items):
+            del items[index]
+    elif index == len(items):
+        items.append(value)
+    else:
+        items[index] = value
+    return items
+
+
+def apply_config_patch(config: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """Return config with one edit applied, sharing everything the edit didn't touch.
+
+    A patch is {"settings": {...}}, which replaces the top-level fields
+    other than questions, or {"question": i, "value": {...}}, or
+    {"question": i, "item": j, "value": {...}} for a single marking item.
+    Indexes start at 0; the index after the last element appends and a
+    null value removes the element.
+    """
+    if not isinstance(patch, dict):
+        raise ValueError("patch must be an object")
+    if "settings" in patch:
+        if not isinstance(patch["settings"], dict):
+            raise ValueError("settings must be an object")
+        return {**patch["settings"], "questions": config.get("questions")}
+
+    index = patch.get("question")
+    value = patch.get("value")
+    if "item" in patch:
+        questions = config.get("questions")
+        if (
+            not isinstance(questions, list)
+            or not isinstance(index, int)
+            or not 0 <= index < len(questions)
+        ):
+            raise ValueError(f"Invalid question index: {index}")
+        question = questions[index]
+        if not isinstance(question, dict):
+            raise ValueError(f"Question {index} is not an object")
+        items = _patched_list(
+            question.get("marking_items"), patch["item"], value, "marking item"
+        )
+        value = {**question, "marking_items": items}
+    questions = _patched_list(config.get("questions"), index, value, "question")
+    return {**config, "questions": questions}
+
+
+def unchanged_question_results(
+    results: List[Any], patch: Dict[str, Any]
+) -> List[Optional[Any]]:
+    """Validation results of a config's questions that still hold after a patch.
+
+    Edited questions get None, so only they are validated again.
+    """
+    if "settings" in patch:
+        return results
+    known: List[Optional[Any]] = list(results)
+    index = patch["question"]
+    if index == len(known):
+        known.append(None)
+    elif "item" not in patch and patch.get("value") is None:
+        del known[index]
+    else:
+        known[index] = None
+    return known
+
+
+def remember_editor_config(config_id: str, config: Dict[str, Any], results: List[Any]):
+    with editor_configs_lock:
+        editor_configs[config_id] = (config, results)
+        editor_configs.move_to_end(config_id)
+        while len(editor_configs) > MAX_EDITOR_CONFIGS:
+            editor_configs.popitem(last=False)
+
+
+def send_artifact(generator, name, build, mimetype):
+    """Send a generated artifact, serving it from the package cache when possible."""
+    if package_cache is None:
+        data, cache_status = build(), "disabled"
+    else:
+        key = generator.cache_key(package_cache)
+        data, hit = package_cache.get_or_build(key, name, build)
+        cache_status = "hit" if hit else "miss"
+
+    response = send_file(
+        BytesIO(data),
+        as_attachment=True,
+        download_name=name,
+        mimetype=mimetype,
+    )
+    response.headers["X-Autograder-Cache"] = cache_status
+    return response
+
 
 @app.route("/", methods=["GET"])
 def index():
@@ -34,7 +155,7 @@ def index():
 
 @app.route("/upload-config", methods=["POST"])
 def upload_config():
-    """Handle YAML config file upload and return the parsed configuration."""
+    """Handle YAML or JSON config file upload and return the parsed configuration."""
     if "config_file" not in request.files:
         return jsonify({"error": "No config file provided"}), 400
 
@@ -42,19 +163,21 @@ def upload_config():
     if file.filename == "":
         return jsonify({"error": "No file selected"}), 400
 
-    if not file.filename or not (
-        file.filename.endswith(".yaml") or file.filename.endswith(".yml")
-    ):
-        return jsonify({"error": "File must be a YAML file (.yml or .yaml)"}), 400
+    config_format = CONFIG_FORMATS.get(Path(file.filename or "").suffix.lower())
+    if config_format is None:
+        return (
+            jsonify({"error": "File must be a YAML (.yml, .yaml) or JSON (.json) file"}),
+            400,
+        )
 
     try:
-        # Read and parse the YAML content
-        content = file.read().decode("utf-8")
-        config_data = yaml.safe_load(content)
+        # Read and parse the YAML or JSON content
+        loaded = LoadedConfig.from_bytes(file.read(), format=config_format)
+        config_data = loaded.data
 
         # Validate the configuration
         validator = ConfigValidator()
-        if not validator.validate_json(config_data):
+        if not validator.validate_loaded(loaded):
             return (
                 jsonify(
                     {
@@ -82,40 +205,18 @@ def generate_autograder():
     data = request.get_json()
     if not data:
         return jsonify({"error": "No config data provided"}), 400
-    tmp_path = None
     try:
-        # Write config to a temp file
-        with tempfile.NamedTemporaryFile("w+", delete=False, suffix=".yml") as tmp:
-            yaml.dump(data, tmp)
-            tmp_path = tmp.name
-        # Parse and validate config
-        config_parser = ConfigParser(tmp_path)
-        config: AutograderConfig = config_parser.parse()
-        generator = AutograderGenerator(config, data)  # Pass original config dict
-        with tempfile.TemporaryDirectory() as out_dir:
-            zip_path = generator.generate(out_dir)
-            # Read the file into memory before sending to avoid file locking issues
-            with open(zip_path, "rb") as zip_file:
-                zip_data = zip_file.read()
-            # Create a BytesIO object to send the file data
-            from io import BytesIO
-
-            zip_buffer = BytesIO(zip_data)
-            zip_buffer.seek(0)
-            return send_file(
-                zip_buffer,
-                as_attachment=True,
-                download_name="autograder.zip",
-                mimetype="application/zip",
-            )
+        # Validate the posted config as is, it is also preserved in the zip
+        generator = AutograderGenerator(LoadedConfig(data))
+        # Build the package in memory, no intermediate files on disk
+        return send_artifact(
+            generator,
+            "autograder.zip",
+            generator.generate_to_bytes,
+            "application/zip",
+        )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        if tmp_path is not None and os.path.exists(tmp_path):
-            try:
-                os.remove(tmp_path)
-            except OSError:
-                pass
 
 
 @app.route("/api/export/description", methods=["POST"])
@@ -124,14 +225,12 @@ def export_description():
     if not data:
         return jsonify({"error": "No config data provided"}), 400
     try:
-        config = AutograderConfig.model_validate(data)
-        generator = AutograderGenerator(config)
-        buffer = generator.generate_description_docx()
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name="description.docx",
-            mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        generator = AutograderGenerator(LoadedConfig(data))
+        return send_artifact(
+            generator,
+            "description.docx",
+            lambda: generator.generate_description_docx().getvalue(),
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
         )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -143,14 +242,12 @@ def export_correct():
     if not data:
         return jsonify({"error": "No config data provided"}), 400
     try:
-        config = AutograderConfig.model_validate(data)
-        generator = AutograderGenerator(config)
-        buffer = generator.generate_correct_answer_zip()
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name="correct_answer.zip",
-            mimetype="application/zip",
+        generator = AutograderGenerator(LoadedConfig(data))
+        return send_artifact(
+            generator,
+            "correct_answer.zip",
+            lambda: generator.generate_correct_answer_zip().getvalue(),
+            "application/zip",
         )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -162,32 +259,68 @@ def export_wrong():
     if not data:
         return jsonify({"error": "No config data provided"}), 400
     try:
-        config = AutograderConfig.model_validate(data)
-        generator = AutograderGenerator(config)
-        buffer = generator.generate_wrong_answer_zip()
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name="wrong_answer.zip",
-            mimetype="application/zip",
+        generator = AutograderGenerator(LoadedConfig(data))
+        return send_artifact(
+            generator,
+            "wrong_answer.zip",
+            lambda: generator.generate_wrong_answer_zip().getvalue(),
+            "application/zip",
         )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    validation = validation_cache.stats()
+    if package_cache is None:
+        return jsonify({"enabled": False, "validation": validation})
+    return jsonify({"enabled": True, **package_cache.stats(), "validation": validation})
+
+
 @app.route("/api/validate", methods=["POST"])
 def validate_config():
+    """Validate a full config, or an edit of a config validated before.
+
+    An edit is sent as {"base": <config_id>, "patch": {...}} (see
+    apply_config_patch). Every response carries the config_id of the
+    validated config, for the next edit to be based on.
+    """
     data = request.get_json()
     if not data:
         return jsonify({"error": "No config data provided"}), 400
     try:
-        validator = ConfigValidator()
-        valid = validator.validate_json(data)
+        if isinstance(data, dict) and "base" in data and "patch" in data:
+            with editor_configs_lock:
+                base = editor_configs.get(data["base"])
+            if base is None:
+                return (
+                    jsonify({"error": "Unknown base config, send the full config"}),
+                    409,
+                )
+            base_config, base_results = base
+            try:
+                config = apply_config_patch(base_config, data["patch"])
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            known = unchanged_question_results(base_results, data["patch"])
+            # Derived from the edit, so the config isn't hashed as a whole
+            edit = [data["base"], data["patch"]]
+            encoded = json.dumps(edit, sort_keys=True, default=str).encode("utf-8")
+            config_id = hashlib.sha256(encoded).hexdigest()
+        else:
+            config, known = data, None
+            config_id = ValidationCache.key(config)
+
+        validator = ConfigValidator(validation_cache)
+        valid = validator.validate_json(config, known)
+        remember_editor_config(config_id, config, validator.question_results)
         return jsonify(
             {
                 "valid": valid,
                 "errors": validator.get_errors(),
                 "warnings": validator.get_warnings(),
+                "config_id": config_id,
             }
         )
     except Exception as e: